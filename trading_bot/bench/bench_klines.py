@@ -0,0 +1,107 @@
+"""
+Benchmark: decodificación de klines de Binance.
+Compara el camino DataFrame original de BTCFuturesBot.get_data con
+KlineDecoder sobre respuestas de 1.500 velas (límite máximo de la API).
+
+Uso: python trading_bot/bench/bench_klines.py
+"""
+
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.kline_decoder import KlineDecoder  # noqa: E402
+from core.market_data import klines_to_frame  # noqa: E402
+
+COLUMNS = [
+    "time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time",
+    "qav",
+    "num_trades",
+    "taker_base_vol",
+    "taker_quote_vol",
+    "ignore",
+]
+
+
+def make_klines(n=1500, start_ms=1_700_000_000_000, step_ms=300_000, seed=1):
+    """Respuesta sintética con el mismo formato que futures_klines."""
+    rnd = random.Random(seed)
+    price = 30000.0
+    klines = []
+    for i in range(n):
+        open_ = price
+        close = open_ + rnd.gauss(0, 20)
+        high = max(open_, close) + abs(rnd.gauss(0, 10))
+        low = min(open_, close) - abs(rnd.gauss(0, 10))
+        volume = abs(rnd.gauss(100, 30))
+        t = start_ms + i * step_ms
+        klines.append(
+            [
+                t,
+                f"{open_:.2f}",
+                f"{high:.2f}",
+                f"{low:.2f}",
+                f"{close:.2f}",
+                f"{volume:.3f}",
+                t + step_ms - 1,
+                f"{volume * close:.5f}",
+                rnd.randint(100, 5000),
+                f"{volume / 2:.3f}",
+                f"{volume * close / 2:.5f}",
+                "0",
+            ]
+        )
+        price = close
+    return klines
+
+
+def dataframe_path(klines):
+    """Camino original de BTCFuturesBot.get_data."""
+    df = pd.DataFrame(klines, columns=COLUMNS)
+    df["time"] = pd.to_datetime(df["time"], unit="ms")
+    df["close"] = df["close"].astype(float)
+    df["high"] = df["high"].astype(float)
+    df["low"] = df["low"].astype(float)
+    return df
+
+
+def timeit(fn, repeat=7, number=50):
+    """Mejor media (µs por llamada) de `repeat` tandas de `number` llamadas."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def run(n=1500):
+    klines = make_klines(n)
+    decoder = KlineDecoder(capacity=n)
+    results = {
+        "dataframe_path": timeit(lambda: dataframe_path(klines)),
+        "decoder_columns": timeit(lambda: decoder.decode(klines)),
+        "decoder_records": timeit(lambda: decoder.records(klines)),
+        "decoder_to_frame": timeit(lambda: klines_to_frame(decoder.decode(klines))),
+    }
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    base = results["dataframe_path"]
+    for name, us in results.items():
+        print(f"{name:<18} {us:10.1f} µs  x{base / us:.2f}")
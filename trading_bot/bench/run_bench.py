@@ -0,0 +1,237 @@
+"""
+Microbenchmarks de los caminos calientes de indicadores y señales.
+El broker se sustituye por core.fake_mt5, así que no hace falta terminal.
+
+Uso (desde la raíz del repo):
+    python trading_bot/bench/run_bench.py            # compara con la baseline
+    python trading_bot/bench/run_bench.py --save     # guarda nueva baseline
+    python trading_bot/bench/run_bench.py --data velas.csv --sizes 20 1000
+
+Los resultados (µs por llamada, mejor de varias tandas) se guardan en
+bench/baseline.json; una ejecución normal marca como regresión cualquier
+caso más lento que la baseline por encima de --tolerance.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from core.fake_mt5 import FakeMT5, synthetic_rates  # noqa: E402
+from core.indicators import RSI  # noqa: E402
+from core.kline_decoder import KlineDecoder  # noqa: E402
+from core.market_data import rates_to_frame  # noqa: E402
+from bench_klines import dataframe_path, make_klines  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SIZES = [20, 100, 1_000, 10_000, 100_000]
+
+
+# =============================
+# ENTORNO
+# =============================
+@contextlib.contextmanager
+def _scratch_cwd():
+    # Los bots abren su FileHandler al importarse con rutas relativas
+    old = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    for d in ("trading_bot/logs", "trading-bot/logs"):
+        os.makedirs(os.path.join(tmp, d))
+    os.chdir(tmp)
+    try:
+        yield tmp
+    finally:
+        os.chdir(old)
+
+
+def load_bots():
+    logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+    FakeMT5().install()
+
+    import cfg.config as config
+
+    with _scratch_cwd() as tmp:
+        config.state["dir"] = os.path.join(tmp, "state")
+        import gold_cross_bot
+        import gold_fibonacci_bot
+        import gold_hammer_bot
+
+    return gold_cross_bot, gold_fibonacci_bot, gold_hammer_bot
+
+
+def bare(cls, **attrs):
+    """Instancia sin __init__ (evita config y conexión) con los atributos dados."""
+    obj = object.__new__(cls)
+    obj.__dict__.update(attrs)
+    return obj
+
+
+def load_data(path):
+    if path is None:
+        return synthetic_rates(max(DEFAULT_SIZES))
+    df = pd.read_csv(path)
+    if not np.issubdtype(df["time"].dtype, np.number):
+        df["time"] = pd.to_datetime(df["time"]).astype("int64") // 10**9
+    rates = np.zeros(len(df), dtype=synthetic_rates(1).dtype)
+    for col in rates.dtype.names:
+        if col in df:
+            rates[col] = df[col].to_numpy()
+    return rates
+
+
+# =============================
+# CASOS
+# =============================
+def build_cases(data):
+    cross, fib, hammer = load_bots()
+    trend_bot = bare(cross.GoldTrendBot)
+    fib_bot = bare(fib.FibonacciBot, atr_period=14)
+    hammer_bot = bare(hammer.GoldPullbackBot)
+    decoder = KlineDecoder()
+
+    def frame(n):
+        return rates_to_frame(data[-n:])
+
+    def with_frame(bot, fn):
+        def setup(n):
+            df = frame(n)
+            bot.get_data = lambda *args, **kwargs: df
+            return fn
+
+        return setup
+
+    def with_rsi(bot, fn):
+        # Estado estable: el RSI se siembra en la llamada de calentamiento
+        def setup(n):
+            rates = data[-n:]
+            bot.get_rates = lambda n=500, timeframe=None: rates[-n:]
+            bot.rsi, bot.rsi_time, bot.rsi_warmup = RSI(14), None, n - 1
+            return fn
+
+        return setup
+
+    def klines(fn):
+        def setup(n):
+            raw = make_klines(n)
+            return lambda: fn(raw)
+
+        return setup
+
+    # nombre -> (setup(n) -> callable, tamaño mínimo, tamaño máximo)
+    return {
+        "calc_atr": (lambda n: (lambda df: lambda: trend_bot.calc_atr(df, 14))(frame(n)), 20, None),
+        "GoldTrendBot.check_signal": (with_frame(trend_bot, trend_bot.check_signal), 50, None),
+        "FibonacciBot.check_fibonacci_filter": (
+            with_frame(fib_bot, fib_bot.check_fibonacci_filter),
+            20,
+            10_000,  # bucle con iloc por vela: O(n) muy lento
+        ),
+        "FibonacciBot.check_momentum_filter": (
+            with_rsi(fib_bot, fib_bot.check_momentum_filter),
+            20,
+            None,
+        ),
+        "detect_hammer": (lambda n: (lambda df: lambda: hammer_bot.detect_hammer(df))(frame(n)), 20, None),
+        "is_downtrend": (lambda n: (lambda df: lambda: hammer_bot.is_downtrend(df, 5))(frame(n)), 20, None),
+        "klines.dataframe_path": (klines(dataframe_path), 20, None),
+        "klines.decoder": (klines(decoder.decode), 20, None),
+    }
+
+
+def measure(fn, repeat=5, min_time=0.05):
+    """µs por llamada: mejor media de `repeat` tandas de al menos `min_time` s."""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def run(data, sizes, only=None):
+    results = {}
+    for name, (setup, min_n, max_n) in build_cases(data).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        results[name] = {}
+        for n in sizes:
+            if n < min_n or (max_n and n > max_n) or n > len(data):
+                continue
+            results[name][str(n)] = measure(setup(n))
+    return results
+
+
+# =============================
+# BASELINE
+# =============================
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'caso':<38} {'n':>7} {'µs':>12} {'baseline':>12} {'cambio':>8}")
+    for name, by_size in results.items():
+        for n, us in by_size.items():
+            base = baseline.get(name, {}).get(n)
+            if base is None:
+                print(f"{name:<38} {n:>7} {us:12.1f} {'-':>12} {'':>8}")
+                continue
+            change = us / base - 1
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESIÓN"
+                regressions.append((name, n, change))
+            print(f"{name:<38} {n:>7} {us:12.1f} {base:12.1f} {change:+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de indicadores y señales")
+    parser.add_argument("--save", action="store_true", help="guardar como nueva baseline")
+    parser.add_argument("--data", help="CSV con velas grabadas (time, open, high, low, close)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", help="filtrar casos por subcadena")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = parser.parse_args()
+
+    results = run(load_data(args.data), args.sizes, args.only)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        for name, by_size in results.items():
+            baseline.setdefault(name, {}).update(by_size)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline guardada en {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regresiones por encima de {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 import pandas as pd
-import time
 import logging
 import numpy as np
 import os
-from binance.client import Client
 import cfg.config as config
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.state_store import StateStore
+from core.market_data import last_kline_time, klines_to_frame
+from core.kline_decoder import KlineDecoder
+from core.binance_client import FuturesClient, WeightLimiter
+from core.brackets import BracketManager
 
 # =============================
 # LOGGING
@@ -23,52 +28,63 @@ logger = logging.getLogger(__name__)
 
 class BTCFuturesBot:
     def __init__(self):
+        self.profiler = LoopProfiler(filename, **config.profiling)
+        self.metrics = BotMetrics(filename)
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics, config.metrics["host"], config.metrics["ports"][filename]
+            ).start()
         self.symbol = config.bitcoin_bot["symbol"]  # "BTCUSDT"
         self.timeframe = config.bitcoin_bot["timeframe"]  # "1m", "5m", etc
         self.lot = config.bitcoin_bot["lot"]  # cantidad a operar
         self.max_open_positions = config.bitcoin_bot["max_positions"]
 
-        # Cliente Binance Futures Testnet
-        self.client = Client(
+        # Cliente Binance Futures (testnet según config) con control de peso
+        limits = config.binance_limits
+        self.client = FuturesClient(
             config.binance_api["api_key"],
             config.binance_api["api_secret"],
-            testnet=True,
+            base_url=(
+                "https://testnet.binancefuture.com"
+                if config.binance_api["testnet"]
+                else "https://fapi.binance.com"
+            ),
+            limiter=WeightLimiter(limits["weight_per_minute"], limits["safety"]),
+            pool_size=limits["pool_size"],
+            max_retries=limits["max_retries"],
         )
-        # Override URL para Futures Testnet
-        self.client.FUTURES_URL = "https://testnet.binancefuture.com/fapi"
 
-        self.in_position = False
+        self.store = StateStore(
+            filename,
+            directory=config.state["dir"],
+            compact_every=config.state["compact_every"],
+        )
+        self.in_position = self.store.get("in_position", False)
+        self.metrics.positions(int(self.in_position))
+        self.decoder = KlineDecoder()
+
+        # SL/TP como órdenes reduce-only en el exchange
+        self.brackets = BracketManager(
+            self.client,
+            self.symbol,
+            price_precision=config.bitcoin_bot["price_precision"],
+        )
+        self.brackets.load_state(self.store.get("brackets"))
         logger.info("BTCFuturesBot inicializado - Estrategia EMA9/21 + EMA5/13")
 
     # =============================
     # DATA
     # =============================
-    def get_data(self, n=100):
-        klines = self.client.futures_klines(
-            symbol=self.symbol, interval=self.timeframe, limit=n
-        )
-        df = pd.DataFrame(
-            klines,
-            columns=[
-                "time",
-                "open",
-                "high",
-                "low",
-                "close",
-                "volume",
-                "close_time",
-                "qav",
-                "num_trades",
-                "taker_base_vol",
-                "taker_quote_vol",
-                "ignore",
-            ],
+    def get_klines(self, n=100):
+        return self.metrics.call(
+            self.client.futures_klines,
+            symbol=self.symbol,
+            interval=self.timeframe,
+            limit=n,
         )
-        df["time"] = pd.to_datetime(df["time"], unit="ms")
-        df["close"] = df["close"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        return df
+
+    def get_data(self, n=100):
+        return klines_to_frame(self.decoder.decode(self.get_klines(n)))
 
     def calc_atr(self, df, period=14):
         high_low = df["high"] - df["low"]
@@ -151,9 +167,9 @@ class BTCFuturesBot:
         sl = price - atr * 2
         tp = price + atr * 3
 
-        order = self.client.futures_create_order(
-            symbol=self.symbol, side="BUY", type="MARKET", quantity=self.lot
-        )
+        order = self.brackets.open("BUY", self.lot, sl, tp)
+        self.metrics.order(order)
+        self.store.put("brackets", self.brackets.to_state())
 
         logger.info(f"COMPRA {price:.2f} | SL {sl:.2f} | TP {tp:.2f} | ATR {atr:.2f}")
         return order
@@ -167,7 +183,11 @@ class BTCFuturesBot:
             side="SELL",
             type="MARKET",
             quantity=self.lot,
+            reduceOnly="true",
         )
+        self.metrics.order(order)
+        self.brackets.cancel()
+        self.store.put("brackets", self.brackets.to_state())
 
         logger.info(f"VENTA {price:.2f} | Cerrando posición")
         return order
@@ -175,41 +195,57 @@ class BTCFuturesBot:
     # =============================
     # LOOP PRINCIPAL
     # =============================
+    def set_in_position(self, value):
+        self.in_position = value
+        self.store.put("in_position", value)
+        self.metrics.positions(int(value))
+
     def run(self):
-        last_check_time = None
+        last_check_time = self.store.get("last_check_time")
+        if self.in_position:
+            logger.info("Estado restaurado: posición abierta, gestionando salida")
         while True:
+            self.profiler.tick()
+            self.metrics.loop()
             try:
-                df = self.get_data(n=5)
-                current_time = df["time"].iloc[-1]
+                current_time = last_kline_time(self.get_klines(n=2))
 
                 if current_time != last_check_time:
                     last_check_time = current_time
+                    self.metrics.bar(current_time // 1000)
+                    self.store.put("last_check_time", current_time)
 
                     # Entrada
                     signal = self.check_ma_crossover_entry()
                     if signal == "buy" and not self.in_position:
                         self.place_buy_order()
-                        self.in_position = True
+                        self.set_in_position(True)
                         logger.info("Esperando 5 minutos antes de nueva entrada...")
-                        time.sleep(300)
+                        self.metrics.sleep(300)
+
+                # Salida en exchange (SL/TP ejecutado)
+                if self.in_position and self.brackets.sync():
+                    self.store.put("brackets", self.brackets.to_state())
+                    self.set_in_position(False)
+                    logger.info("Posición cerrada por SL/TP en exchange")
 
                 # Salida
                 if self.in_position and (
                     self.check_ma_crossover_exit() or self.detect_early_weakness()
                 ):
                     self.place_sell_order()
-                    self.in_position = False
+                    self.set_in_position(False)
                     logger.info("Posición cerrada")
-                    time.sleep(60)
+                    self.metrics.sleep(60)
 
-                time.sleep(15)
+                self.metrics.sleep(15)
 
             except KeyboardInterrupt:
                 logger.info("Bot detenido por usuario")
                 break
             except Exception as e:
                 logger.error(f"Error inesperado: {e}")
-                time.sleep(30)
+                self.metrics.sleep(30)
 
 
 if __name__ == "__main__":
@@ -28,6 +28,9 @@ bot = {
     "max_positions": 1,  # máximo de posiciones abiertas
     "near_ema_pct": 0.0015,  # porcentaje para considerar "cerca" de la EMA20 (0.15%)
     "max_distance_pct": 0.003,  # distancia máxima desde EMA20 para entrada (0.3%)
+    "rsi_period": 14,  # RSI del filtro de momentum (FibonacciBot)
+    "rsi_method": "wilder",  # "wilder" (como MT5) o "sma"
+    "rsi_warmup": 250,  # velas con las que se siembra el RSI
 }
 
 bot_eurusd = {
@@ -47,6 +50,7 @@ bitcoin_bot = {
     "timeframe": "5m",  # marco temporal
     "lot": 0.01,  # tamaño de lote
     "max_positions": 1,  # máximo de posiciones abiertas
+    "price_precision": 1,  # decimales del tick de precio (BTCUSDT = 0.1)
 }
 
 binance_api = {
@@ -54,3 +58,279 @@ binance_api = {
     "api_secret": "c8bd50a0243d7cff9b3fc6c0fdee80f94edc3ef6d10d078dff3602aa84644925",
     "testnet": True,
 }
+
+binance_limits = {
+    "weight_per_minute": 2400,  # límite de peso de Futures por IP
+    "safety": 0.8,  # fracción del límite que nos permitimos usar
+    "pool_size": 4,  # conexiones keep-alive reutilizables
+    "max_retries": 5,  # reintentos ante errores transitorios
+}
+
+# ==============================
+# Persistencia de estado
+# ==============================
+state = {
+    "dir": "trading_bot/data/state",  # carpeta de snapshots y WAL
+    "compact_every": 500,  # escrituras en el WAL antes de compactar
+    "bars_window": 200,  # velas que se guardan para el arranque en caliente
+}
+
+# ==============================
+# Bus de datos en memoria compartida (market_data_daemon.py)
+# ==============================
+market_bus = {
+    "enabled": False,  # los bots leen del bus si el daemon está corriendo
+    "symbol": "XAUUSD",  # símbolo que publica el daemon
+    "timeframes": ["M15", "H1", "H4"],  # timeframes publicados
+    "bars": 500,  # velas por timeframe en el ring
+    "ticks": 4096,  # ticks en el ring
+    "poll": 0.1,  # segundos entre consultas del daemon al terminal
+    "prefix": "mdbus",  # prefijo de los segmentos de memoria compartida
+    "stale_after": 5,  # segundos sin heartbeat para ignorar el bus
+}
+
+# ==============================
+# Snapshot de posiciones compartido (market_data_daemon.py)
+# ==============================
+position_bus = {
+    "enabled": False,  # los bots leen posiciones del snapshot si está vivo
+    "poll": 0.5,  # segundos entre positions_get() del daemon
+    "capacity": 256,  # máximo de posiciones en el snapshot
+    "prefix": "posbus",  # prefijo de los segmentos de memoria compartida
+    "stale_after": 5,  # segundos sin heartbeat para ignorar el snapshot
+    "max_symbol_lots": {"XAUUSD": 0.5, "EURUSD": 0.5},  # exposición neta máxima
+}
+
+# ==============================
+# Profiling bajo demanda (SIGUSR1 o logs/<bot>.profile)
+# ==============================
+profiling = {
+    "iterations": 50,  # iteraciones del bucle a capturar
+    "mode": "cprofile",  # "cprofile" o "sampling"
+    "trace_malloc": False,  # snapshot de tracemalloc por iteración
+    "check_every": 5,  # segundos entre comprobaciones del fichero de control
+    "sample_interval": 0.005,  # periodo del muestreo en modo "sampling"
+}
+
+# ==============================
+# Métricas Prometheus locales (GET http://host:puerto/metrics)
+# ==============================
+metrics = {
+    "enabled": False,
+    "host": "127.0.0.1",  # sólo local; exponer con un proxy si hace falta
+    "ports": {
+        "gold_cross_bot": 9101,
+        "eurusd_cross_bot": 9102,
+        "gold_fibonacci_bot": 9103,
+        "gold_hammer_bot": 9104,
+        "gold_pullback_bot": 9105,
+        "gold_threshold_bot copy": 9106,
+        "bitcoin_bot": 9107,
+        "market_data_daemon": 9108,
+        "strategy_engine": 9109,
+    },
+}
+
+# ==============================
+# Histórico de velas en disco (core/bar_store.py)
+# ==============================
+bar_store = {
+    "dir": "trading_bot/data/bars",  # un .npy por símbolo y timeframe
+}
+
+# ==============================
+# Validación de velas (core/bar_quality.py)
+# ==============================
+bar_quality = {
+    # "flag": registrar y seguir; "ffill": rellenar huecos y velas inválidas
+    # con el cierre anterior; "refetch": volver a pedir la ventana (una vez)
+    "policy": "flag",
+    "symbols": {},  # política por símbolo, p. ej. {"XAUUSD": "ffill"}
+    "outlier_sigma": 10.0,  # retorno atípico: veces la escala robusta de |r|
+    "scale_bars": 50,  # velas mínimas de una ventana para recalcular la escala
+}
+
+# ==============================
+# Descarga de histórico (core/history.py, download_history.py)
+# ==============================
+history = {
+    "since": "2015-01-01",  # inicio por defecto si la serie no existe
+    "workers": 4,  # tramos descargados a la vez (todas las series)
+    "mt5_chunk_bars": 50000,  # velas por copy_rates_range
+    "binance_chunk_bars": 1000,  # velas por futures_klines (peso 5)
+    "flush_bars": 500000,  # velas acumuladas antes de escribir en el BarStore
+    "retries": 3,  # reintentos de un tramo antes de dejar la serie
+    "retry_sleep": 1.0,  # segundos del primer reintento (se duplica)
+}
+
+# ==============================
+# Optimización walk-forward (optimize.py)
+# ==============================
+walk_forward = {
+    "symbol": "XAUUSD",
+    "timeframe": "H1",
+    "train": 2000,  # velas in-sample por ventana
+    "test": 500,  # velas out-of-sample por ventana (y paso entre ventanas)
+    "anchored": False,  # True: in-sample desde el inicio del histórico
+    "metric": "profit_factor",  # "profit_factor", "net", "sharpe", "expectancy_r"
+    "min_trades": 10,  # mínimo de operaciones in-sample para puntuar
+    "cost": 0.3,  # coste por operación en precio (spread + comisión)
+    "workers": None,  # None = todos los núcleos
+    "grid": {
+        "tp_atr_mult": [2.0, 2.5, 3.0, 3.5, 4.0],
+        "sl_atr_mult": [1.0, 1.5, 2.0, 2.5],
+        "tolerance": [0.5, 0.75, 1.0, 1.25],
+    },
+}
+
+# ==============================
+# Monte Carlo de robustez (robustness.py)
+# ==============================
+monte_carlo = {
+    "paths": 100_000,  # caminos simulados
+    "method": "bootstrap",  # "bootstrap" o "shuffle"
+    "slippage": 0.0,  # desviación del deslizamiento por operación (precio)
+    "capital": 10_000.0,  # capital inicial
+    "scale": 5.0,  # pnl en precio -> dinero (lote 0.05 x 100 oz)
+    "ruin": 0.5,  # pérdida del capital que cuenta como ruina
+    "max_mb": 256,  # memoria máxima por tanda de caminos
+}
+
+# ==============================
+# Conexión con MT5 (core/connection.py)
+# ==============================
+connection = {
+    "probe_interval": 5.0,  # segundos entre comprobaciones de terminal_info
+    "backoff_initial": 1.0,  # primera espera entre intentos de reconexión
+    "backoff_max": 60.0,  # espera máxima (se duplica en cada fallo)
+    "intent_ttl": 120.0,  # segundos que vale una orden retenida durante el corte
+    "max_intents": 100,  # órdenes retenidas como máximo
+}
+
+# ==============================
+# Envío de órdenes, cierres y reversiones (core/execution.py)
+# ==============================
+execution = {
+    "workers": 8,  # order_send simultáneos al cerrar o revertir posiciones
+    # Deviation adaptativa: spread_mult * spread + vol_mult * σ del precio
+    # durante la latencia de order_send, en puntos y dentro de [min, max]
+    "deviation": 50,  # puntos mientras no haya estadísticas suficientes
+    "min_deviation": 5,
+    "max_deviation": 200,
+    "spread_mult": 0.5,
+    "vol_mult": 3.0,
+    "alpha": 0.05,  # peso de cada muestra en las medias móviles
+    "min_samples": 30,  # ticks de una hora antes de usar su media propia
+    "retries": 2,  # reenvíos inmediatos tras REQUOTE / PRICE_CHANGED / PRICE_OFF
+    "tick_stale": 1.0,  # segundos tras los que send pide un tick nuevo
+}
+
+# ==============================
+# Diario de operaciones (core/journal.py)
+# ==============================
+journal = {
+    "dir": "trading_bot/data/journal",  # <bot>.jsonl + tramos compactados
+    "flush_interval": 1.0,  # segundos máximos de un registro en memoria
+    "batch_size": 256,  # registros pendientes que adelantan la escritura
+    "fsync": "interval",  # "always", "interval" o "never"
+    "fsync_interval": 5.0,  # con "interval", segundos entre fsync
+    "compact_mb": 8,  # tamaño del JSONL que dispara la compactación
+}
+
+# ==============================
+# Motor de estrategias (run_strategies.py)
+# ==============================
+engine = {
+    "bar_poll": 5.0,  # segundos entre consultas de velas
+    "bars_window": 300,  # velas en caché por símbolo/timeframe
+    "error_sleep": 30,  # pausa tras un error inesperado del bucle
+    # Un magic distinto por estrategia: el motor asigna las posiciones por magic
+    "strategies": [
+        {
+            "class": "TrendCross",
+            "name": "GoldTrendBot",
+            "symbol": "XAUUSD",
+            "timeframe": "H1",
+            "magic": 999001,
+            "lot": 0.1,
+            "max_positions": 1,
+        },
+        {
+            "class": "TrendCross",
+            "name": "EurusdTrendBot",
+            "symbol": "EURUSD",
+            "timeframe": "H1",
+            "magic": 999002,
+            "lot": 0.1,
+            "max_positions": 1,
+        },
+        {
+            "class": "Fibonacci",
+            "symbol": "XAUUSD",
+            "timeframe": "H1",
+            "magic": 123456,
+            "lot": 0.05,
+            "max_positions": 1,
+            "trailing_atr_mult": 1.0,
+            "sl_atr_mult": 2.0,
+            "tp_atr_mult": 3.0,
+        },
+        {
+            "class": "Hammer",
+            "symbol": "XAUUSD",
+            "timeframe": "M15",
+            "magic": 999003,
+            "lot": 0.05,
+            "max_positions": 1,
+        },
+        {
+            "class": "EmaPullback",
+            "symbol": "XAUUSD",
+            "timeframe": "H1",
+            "magic": 999004,
+            "lot": 0.1,
+        },
+        {
+            "class": "ThresholdMomentum",
+            "symbol": "XAUUSD",
+            "magic": 999005,
+            "lot": 0.05,
+            "enabled": False,  # opera por ticks; activar a propósito
+        },
+    ],
+}
+
+# ==============================
+# Horario de mercado (core/market_hours.py)
+# ==============================
+market_hours = {
+    "enabled": True,  # dormir con el mercado cerrado en vez de sondear
+    "prewarm": 120,  # segundos antes de la apertura para reconectar y cargar velas
+    # Horas locales de `timezone`; el cambio de horario se aplica solo
+    "sessions": {
+        "metals": {
+            "timezone": "America/New_York",
+            "open": ("sun", "18:00"),
+            "close": ("fri", "17:00"),
+            "daily_break": ("17:00", "18:00"),
+        },
+        "fx": {
+            "timezone": "America/New_York",
+            "open": ("sun", "17:00"),
+            "close": ("fri", "17:00"),
+        },
+        "crypto": {"always_open": True},
+    },
+    # "MM-DD" todos los años o "YYYY-MM-DD"; día local completo cerrado
+    "holidays": {
+        "metals": ["01-01", "12-25"],
+        "fx": ["01-01", "12-25"],
+    },
+    "symbols": {
+        "XAUUSD": "metals",
+        "XAGUSD": "metals",
+        "EURUSD": "fx",
+        "BTCUSDT": "crypto",
+    },
+    "default": "fx",
+}
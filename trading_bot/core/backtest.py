@@ -0,0 +1,286 @@
+"""
+Backtest vectorizado sobre arrays de velas (RATES_DTYPE).
+
+Los indicadores se calculan una sola vez sobre todo el histórico y las
+señales se obtienen por máscaras de NumPy; sólo la simulación de salidas
+recorre operación a operación (una posición abierta a la vez).
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.bar_store import resample
+from core.indicators import rsi
+
+TRADE_DTYPE = np.dtype(
+    [
+        ("entry_time", "<i8"),
+        ("exit_time", "<i8"),
+        ("direction", "i1"),  # 1 compra, -1 venta
+        ("entry", "<f8"),
+        ("exit", "<f8"),
+        ("sl", "<f8"),
+        ("tp", "<f8"),
+        ("pnl", "<f8"),  # en unidades de precio por unidad de volumen, neto de coste
+        ("r", "<f8"),  # pnl / riesgo inicial
+        ("reason", "i1"),  # 1 SL, 2 TP, 0 cierre forzado
+    ]
+)
+
+EXIT_CLOSE, EXIT_SL, EXIT_TP = 0, 1, 2
+
+
+# =============================
+# INDICADORES
+# =============================
+def atr(high, low, close, period=14):
+    """ATR como en los bots: media simple del true range."""
+    prev_close = np.r_[np.nan, close[:-1]]
+    tr = np.fmax(
+        high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    )
+    return pd.Series(tr).rolling(period).mean().to_numpy()
+
+
+def ema(values, span):
+    return pd.Series(values).ewm(span=span).mean().to_numpy()
+
+
+def rolling_max(values, window):
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1 :] = sliding_window_view(values, window).max(axis=1)
+    return out
+
+
+def rolling_min(values, window):
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1 :] = sliding_window_view(values, window).min(axis=1)
+    return out
+
+
+def swing_levels(high, low, swing_period=5, lookback=30):
+    """
+    Máximo swing high / mínimo swing low confirmados en las últimas
+    `lookback` velas, como check_fibonacci_filter: un swing necesita
+    `swing_period` velas a cada lado, así que sólo cuenta hasta t - swing_period.
+    """
+    n = len(high)
+    width = 2 * swing_period + 1
+    swing_high = np.full(n, -np.inf)
+    swing_low = np.full(n, np.inf)
+    if n >= width:
+        centre = slice(swing_period, n - swing_period)
+        is_high = high[centre] == sliding_window_view(high, width).max(axis=1)
+        is_low = low[centre] == sliding_window_view(low, width).min(axis=1)
+        swing_high[centre] = np.where(is_high, high[centre], -np.inf)
+        swing_low[centre] = np.where(is_low, low[centre], np.inf)
+
+    window = lookback - swing_period
+    top = np.full(n, np.nan)
+    bottom = np.full(n, np.nan)
+    top[swing_period:] = rolling_max(swing_high, window)[: n - swing_period]
+    bottom[swing_period:] = rolling_min(swing_low, window)[: n - swing_period]
+    top[~np.isfinite(top)] = np.nan
+    bottom[~np.isfinite(bottom)] = np.nan
+    return top, bottom
+
+
+# =============================
+# ESTRATEGIAS
+# =============================
+class FibonacciStrategy:
+    """
+    Versión vectorizada del consenso de FibonacciBot (Fibonacci + tendencia
+    H1/H4 + momentum RSI). Sin trailing stop: salidas sólo por SL/TP.
+    """
+
+    # Parámetros que cambian las señales (el resto sólo afecta a las salidas)
+    signal_params = ("tolerance", "min_agree")
+    defaults = {
+        "tolerance": 1.0,
+        "min_agree": 2,
+        "sl_atr_mult": 2.0,
+        "tp_atr_mult": 3.0,
+    }
+
+    def __init__(
+        self,
+        atr_period=14,
+        swing_period=5,
+        lookback=30,
+        trend_seconds=14400,
+        rsi_method="wilder",
+    ):
+        self.atr_period = atr_period
+        self.swing_period = swing_period
+        self.lookback = lookback
+        self.trend_seconds = trend_seconds
+        self.rsi_method = rsi_method
+
+    def prepare(self, rates):
+        """Indicadores independientes de los parámetros, una vez por histórico."""
+        high, low, close = rates["high"], rates["low"], rates["close"]
+        ind = {"atr": atr(high, low, close, self.atr_period)}
+        ind["swing_high"], ind["swing_low"] = swing_levels(
+            high, low, self.swing_period, self.lookback
+        )
+
+        # Tendencia: cierre frente a la EMA20 del timeframe y de uno superior.
+        # Con la vela superior en formación, close > EMA ⇔ close > EMA previa.
+        trend_fast = np.sign(close - ema(close, 20))
+        upper = resample(rates, self.trend_seconds)
+        upper_ema = ema(upper["close"], 20)
+        pos = np.searchsorted(upper["time"], rates["time"], side="right") - 2
+        prev_ema = np.where(pos >= 0, upper_ema[np.maximum(pos, 0)], np.nan)
+        trend_slow = np.sign(close - prev_ema)
+        ind["trend"] = np.where(trend_fast == trend_slow, trend_fast, 0).astype(np.int8)
+
+        momentum = rsi(close, 14, self.rsi_method)
+        candle = np.sign(close - rates["open"])
+        with np.errstate(invalid="ignore"):
+            buy = (momentum < 35) & (candle > 0)
+            sell = (momentum > 65) & (candle < 0)
+        ind["momentum"] = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+        return ind
+
+    def fibonacci(self, rates, ind, tolerance):
+        close = rates["close"]
+        top, bottom, atr_ = ind["swing_high"], ind["swing_low"], ind["atr"]
+        span = top - bottom
+        with np.errstate(invalid="ignore"):
+            valid = span >= atr_ * 2
+            near = atr_ * tolerance
+
+            def touches(*ratios):
+                hit = np.zeros(len(close), dtype=bool)
+                for ratio in ratios:
+                    hit |= np.abs(close - (top - span * ratio)) < near
+                return hit
+
+            buy = valid & touches(0.382, 0.5) & (close > bottom * 1.01)
+            sell = valid & ~buy & touches(0.618, 0.786) & (close < top * 0.99)
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+    def signals(self, rates, ind, params):
+        votes = np.stack(
+            [
+                self.fibonacci(rates, ind, params["tolerance"]),
+                ind["trend"],
+                ind["momentum"],
+            ]
+        )
+        buys = (votes == 1).sum(axis=0)
+        sells = (votes == -1).sum(axis=0)
+        need = params["min_agree"]
+        return np.where(buys >= need, 1, np.where(sells >= need, -1, 0)).astype(np.int8)
+
+
+# =============================
+# SIMULACIÓN
+# =============================
+def _first_exit(rates, start, end, direction, sl, tp):
+    """Primera vela en [start, end) que toca SL o TP; SL primero si tocan ambos."""
+    high, low, open_ = rates["high"], rates["low"], rates["open"]
+    chunk = 64
+    i = start
+    while i < end:
+        j = min(end, i + chunk)
+        if direction > 0:
+            sl_hit = low[i:j] <= sl
+            tp_hit = high[i:j] >= tp
+        else:
+            sl_hit = high[i:j] >= sl
+            tp_hit = low[i:j] <= tp
+        hit = sl_hit | tp_hit
+        if hit.any():
+            k = int(hit.argmax())
+            bar = i + k
+            if sl_hit[k]:
+                # Hueco a través del SL: se llena a la apertura
+                gap = open_[bar] if bar > start else sl
+                price = min(sl, gap) if direction > 0 else max(sl, gap)
+                return bar, price, EXIT_SL
+            return bar, tp, EXIT_TP
+        i = j
+        chunk *= 2
+    return end - 1, rates["close"][end - 1], EXIT_CLOSE
+
+
+def simulate(rates, signals, atr_, sl_mult, tp_mult, start=0, end=None, cost=0.0):
+    """
+    Señal al cierre de la vela t, entrada a la apertura de t+1, una posición
+    a la vez. Las operaciones abiertas al llegar a `end` se cierran a mercado.
+    `cost` es el coste total por operación en unidades de precio (spread).
+    """
+    end = len(rates) if end is None else end
+    candidates = np.flatnonzero(signals[start : end - 1]) + start
+    trades = []
+    free_from = start
+    for t in candidates:
+        if t < free_from:
+            continue
+        risk = atr_[t] * sl_mult
+        if not risk > 0:
+            continue
+        direction = int(signals[t])
+        entry_bar = t + 1
+        entry = rates["open"][entry_bar]
+        sl = entry - direction * risk
+        tp = entry + direction * atr_[t] * tp_mult
+        bar, price, reason = _first_exit(rates, entry_bar, end, direction, sl, tp)
+        pnl = direction * (price - entry) - cost
+        trades.append(
+            (
+                rates["time"][entry_bar],
+                rates["time"][bar],
+                direction,
+                entry,
+                price,
+                sl,
+                tp,
+                pnl,
+                pnl / risk,
+                reason,
+            )
+        )
+        # La señal de la vela de salida ya puede abrir otra posición
+        free_from = bar
+    return np.array(trades, dtype=TRADE_DTYPE)
+
+
+def score(trades, metric="profit_factor", min_trades=10):
+    if len(trades) < min_trades:
+        return -np.inf
+    pnl = trades["pnl"]
+    if metric == "net":
+        return float(pnl.sum())
+    if metric == "expectancy_r":
+        return float(trades["r"].mean())
+    if metric == "sharpe":
+        std = pnl.std()
+        return float(pnl.mean() / std * np.sqrt(len(pnl))) if std > 0 else -np.inf
+    if metric == "profit_factor":
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        return float(gains / losses) if losses > 0 else float(gains > 0) * 1e6
+    raise ValueError(f"Métrica desconocida: {metric}")
+
+
+def summary(trades):
+    pnl = trades["pnl"]
+    equity = np.cumsum(pnl)
+    drawdown = (
+        (np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity).max()
+        if len(pnl)
+        else 0.0
+    )
+    return {
+        "trades": len(trades),
+        "net": float(pnl.sum()),
+        "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+        "profit_factor": score(trades, "profit_factor", 1) if len(pnl) else 0.0,
+        "max_drawdown": float(drawdown),
+    }
@@ -0,0 +1,183 @@
+
+import numpy as np
+
+import core.clock as clock
+from core.bar_cache import RATES_DTYPE
+
+
+class _Series:
+    """Velas cerradas en un anillo preasignado + la vela en formación en escalares."""
+
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self.ring = np.zeros(capacity, dtype=RATES_DTYPE)
+        self.capacity = capacity
+        self.head = 0  # próxima posición a escribir
+        self.count = 0
+        self.start = None  # apertura (epoch) de la vela en formación
+        self.closed_until = 0  # fin de la última vela cerrada
+        self.open = self.high = self.low = self.close = 0.0
+        self.ticks = 0
+        self.spread = 0
+
+    def push(self, row):
+        self.ring[self.head] = row
+        idx = self.head
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return idx
+
+    def close_bar(self):
+        self.closed_until = self.start + self.seconds
+        return self.push(
+            (
+                self.start,
+                self.open,
+                self.high,
+                self.low,
+                self.close,
+                self.ticks,
+                self.spread,
+                0,
+            )
+        )
+
+    def last(self, n):
+        n = min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return self.ring[idx]
+
+
+class BarBuilder:
+    """
+    Velas OHLC de varios timeframes a la vez a partir de un flujo de ticks.
+    - `update` es O(1) por tick y timeframe: sólo compara el periodo y
+      actualiza escalares; al cambiar de periodo la vela pasa al anillo.
+    - Al cerrarse una vela se avisa a los callbacks de `on_bar_close`.
+    - `advance` cierra las velas cuyo periodo terminó aunque no llegue un
+      tick nuevo (mercado parado), usando la hora del servidor estimada.
+    Las velas se construyen con el bid, como las de MT5. Con ticks sondeados
+    (symbol_info_tick) pueden perderse extremos intermedios; `seed` permite
+    reanclar con el histórico del broker.
+    """
+
+    def __init__(self, timeframes, capacity=500, point=None):
+        # timeframes: clave (p. ej. "M1" o mt5.TIMEFRAME_M1) -> segundos
+        self.series = {
+            key: _Series(seconds, capacity) for key, seconds in timeframes.items()
+        }
+        self.point = point
+        self.server_offset = None  # hora servidor - hora local (s)
+        self.last_msc = 0
+        self._listeners = []
+
+    def on_bar_close(self, callback):
+        """callback(clave, vela) con la vela cerrada (registro RATES_DTYPE)."""
+        self._listeners.append(callback)
+
+    # =============================
+    # TICKS
+    # =============================
+    def update(self, time_msc, bid, ask=None):
+        """Procesa un tick. Devuelve True si cerró alguna vela."""
+        if time_msc <= self.last_msc:
+            return False  # tick repetido o fuera de orden
+        self.last_msc = time_msc
+        t = time_msc // 1000
+        offset = t - clock.time()
+        if self.server_offset is None or offset > self.server_offset:
+            self.server_offset = offset
+
+        spread = 0
+        if ask is not None and self.point:
+            spread = int(round((ask - bid) / self.point))
+
+        closed = False
+        for key, s in self.series.items():
+            start = t - t % s.seconds
+            if start == s.start:
+                if bid > s.high:
+                    s.high = bid
+                elif bid < s.low:
+                    s.low = bid
+                s.close = bid
+                s.ticks += 1
+                s.spread = spread
+                continue
+            if s.start is not None and start > s.start:
+                self._emit(key, s, s.close_bar())
+                closed = True
+            elif s.start is not None or start < s.closed_until:
+                continue  # tick de una vela anterior
+            s.start = start
+            s.open = s.high = s.low = s.close = bid
+            s.ticks = 1
+            s.spread = spread
+        return closed
+
+    def update_tick(self, tick):
+        return self.update(tick.time_msc, tick.bid, tick.ask)
+
+    def feed(self, ticks):
+        """Ticks grabados (array con time_msc, bid, ask) en orden."""
+        for time_msc, bid, ask in zip(
+            ticks["time_msc"].tolist(), ticks["bid"].tolist(), ticks["ask"].tolist()
+        ):
+            self.update(time_msc, bid, ask)
+
+    def advance(self, now=None):
+        """Cierra las velas cuyo periodo ya terminó según la hora del servidor."""
+        if now is None:
+            if self.server_offset is None:
+                return False
+            now = clock.time() + self.server_offset
+        closed = False
+        for key, s in self.series.items():
+            if s.start is not None and now >= s.start + s.seconds:
+                self._emit(key, s, s.close_bar())
+                s.start = None
+                closed = True
+        return closed
+
+    def _emit(self, key, s, idx):
+        if self._listeners:
+            bar = s.ring[idx].copy()
+            for callback in self._listeners:
+                callback(key, bar)
+
+    # =============================
+    # VELAS
+    # =============================
+    def seed(self, key, rates):
+        """
+        Carga histórico (p. ej. copy_rates_from_pos). La última vela se toma
+        como la que está en formación y se sigue actualizando con los ticks.
+        """
+        s = self.series[key]
+        rates = np.asarray(rates).astype(RATES_DTYPE, copy=False)
+        if not len(rates):
+            return
+        s.head = s.count = 0
+        for row in rates[:-1][-s.capacity :]:
+            s.push(row)
+        last = rates[-1]
+        s.start = int(last["time"])
+        s.closed_until = s.start
+        s.open, s.high, s.low, s.close = (
+            float(last[f]) for f in ("open", "high", "low", "close")
+        )
+        s.ticks = int(last["tick_volume"])
+        s.spread = int(last["spread"])
+
+    def rates(self, key, n, forming=True):
+        """Últimas `n` velas en orden (como copy_rates_from_pos, vela en formación al final)."""
+        s = self.series[key]
+        if not forming or s.start is None:
+            return s.last(n)
+        out = np.empty(min(n, s.count + 1), dtype=RATES_DTYPE)
+        out[:-1] = s.last(len(out) - 1)
+        out[-1] = (s.start, s.open, s.high, s.low, s.close, s.ticks, s.spread, 0)
+        return out
+
+    def count(self, key):
+        return self.series[key].count
@@ -0,0 +1,104 @@
+import numpy as np
+from core.market_data import rates_to_frame
+
+# Mismo layout que el array estructurado de mt5.copy_rates_from_pos
+RATES_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("tick_volume", "<u8"),
+        ("spread", "<i4"),
+        ("real_volume", "<u8"),
+    ]
+)
+
+
+class BarCache:
+    """
+    Ventana de las últimas `maxlen` velas de un símbolo/timeframe.
+    Permite pedir al broker sólo las velas nuevas y fusionarlas por tiempo.
+    Con `validator` (core/bar_quality.py) cada actualización se valida
+    enlazada con la vela anterior ya guardada.
+    """
+
+    def __init__(self, maxlen=200, validator=None):
+        self.maxlen = maxlen
+        self.validator = validator
+        self.rates = np.empty(0, dtype=RATES_DTYPE)
+
+    def __len__(self):
+        return len(self.rates)
+
+    def last_time(self):
+        return int(self.rates["time"][-1]) if len(self.rates) else None
+
+    def covers(self, rates):
+        """True si `rates` empieza dentro de la ventana (no hay hueco)."""
+        return len(self.rates) > 0 and int(rates["time"][0]) <= self.last_time()
+
+    def update(self, rates):
+        """
+        Fusiona velas nuevas; la vela en formación se sobrescribe. False si
+        no hay velas o el validador pide descargar la ventana entera (la
+        caché se vacía).
+        """
+        if rates is None or len(rates) == 0:
+            return False
+        rates = np.asarray(rates)
+        if rates.dtype != RATES_DTYPE:
+            rates = rates.astype(RATES_DTYPE)
+        covers = self.covers(rates)
+        cut = int(np.searchsorted(self.rates["time"], rates["time"][0]))
+        # Mismas velas que ya hay (sólo cambia la en formación): se valida
+        # cuando llegue la siguiente, ya con sus valores finales
+        known = (
+            covers
+            and cut + len(rates) == len(self.rates)
+            and np.array_equal(self.rates["time"][cut:], rates["time"])
+        )
+        if self.validator is not None and not known:
+            # Vela guardada anterior a las nuevas (también si hay hueco)
+            prev = None
+            if cut:
+                prev = (self.rates["time"][cut - 1], self.rates["close"][cut - 1])
+            rates = self.validator.validate(rates, prev)
+            if rates is None:
+                self.rates = np.empty(0, dtype=RATES_DTYPE)
+                return False
+            if not len(rates):
+                return False
+        if not covers:
+            # Hueco respecto a la caché: no se puede enlazar, se reemplaza
+            self.rates = rates[-self.maxlen :].copy()
+            return True
+        if known or cut + len(rates) == len(self.rates):
+            # Caso habitual: sin vela nueva, sólo cambia la que está en formación
+            self.rates[cut:] = rates
+            return True
+        # Copia por bloques: np.concatenate promociona los campos en cada llamada
+        merged = np.empty(cut + len(rates), dtype=RATES_DTYPE)
+        merged[:cut] = self.rates[:cut]
+        merged[cut:] = rates
+        self.rates = merged[-self.maxlen :]
+        return True
+
+    def tail(self, n):
+        return self.rates[-n:]
+
+    def to_frame(self, n=None):
+        return rates_to_frame(self.rates if n is None else self.rates[-n:])
+
+    # =============================
+    # PERSISTENCIA
+    # =============================
+    def to_rows(self):
+        return self.rates.tolist()
+
+    def load_rows(self, rows):
+        if rows:
+            self.rates = np.array([tuple(r) for r in rows], dtype=RATES_DTYPE)[
+                -self.maxlen :
+            ]
@@ -0,0 +1,253 @@
+"""
+Validación vectorizada de velas (RATES_DTYPE).
+
+Una vela que falta o un timestamp repetido desplaza en silencio EMAs, ATR
+y el "velas desde el cruce" de las estrategias. `check` marca cada vela
+con un bit por problema, con operaciones de NumPy sobre el array entero:
+- GAP: le preceden velas ausentes con el mercado abierto (según el
+  calendario del símbolo, así fines de semana y pausas no cuentan);
+- DUPLICATE / DISORDER: tiempo igual o anterior al de la vela previa;
+- RANGE: high < low, precios no positivos u open/close fuera de [low, high];
+- OUTLIER: retorno logarítmico mayor que `outlier_sigma` veces la escala
+  robusta (mediana de |r|) de la serie, normalizado por la raíz de las velas
+  transcurridas para que la apertura tras un fin de semana no cuente.
+
+Sobre 3 velas nuevas cuesta microsegundos (el calendario sólo se consulta
+si hay algún salto); sobre años de M1, lo que tarda NumPy en recorrerlos.
+
+BarValidator aplica la política de config.bar_quality a cada actualización
+de un BarCache: "flag" (registrar y seguir), "ffill" (quitar duplicados y
+rellenar huecos y velas inválidas con el cierre anterior) o "refetch"
+(descartar la ventana para pedirla entera al broker, una vez).
+"""
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+import cfg.config as config
+from core.bar_cache import RATES_DTYPE
+from core.bar_store import TIMEFRAME_SECONDS
+from core.market_hours import calendar_for
+
+logger = logging.getLogger(__name__)
+
+GAP, DUPLICATE, DISORDER, RANGE, OUTLIER = 1, 2, 4, 8, 16
+ISSUES = {
+    "gap": GAP,
+    "duplicate": DUPLICATE,
+    "disorder": DISORDER,
+    "range": RANGE,
+    "outlier": OUTLIER,
+}
+POLICIES = ("flag", "ffill", "refetch")
+
+# flags: un uint8 por vela; gaps: índices de las velas tras un hueco;
+# missing: velas ausentes antes de cada una
+Issues = namedtuple("Issues", "flags gaps missing")
+
+
+# =============================
+# COMPROBACIONES
+# =============================
+def _returns(delta, closes, step):
+    # Precios no positivos ya son RANGE: se acotan para que log sea finito
+    returns = np.diff(np.log(np.maximum(closes, 1e-300)))
+    return returns / np.sqrt(np.maximum(delta / step, 1.0))
+
+
+def robust_scale(rates, timeframe):
+    """
+    Desviación típica robusta de los retornos por vela: 1.4826 · mediana
+    de |r| (media cero), sin las velas planas de los minutos sin ticks.
+    """
+    if len(rates) < 3:
+        return None
+    delta = np.diff(rates["time"].astype(np.float64))
+    moves = np.abs(_returns(delta, rates["close"], TIMEFRAME_SECONDS[timeframe]))
+    moves = moves[moves > 0]
+    if not len(moves):
+        return None
+    return 1.4826 * float(np.median(moves))
+
+
+def check(rates, timeframe, calendar=None, scale=None, outlier_sigma=10.0, prev=None):
+    """
+    Marca los problemas de `rates`. `prev`: (time, close) de la vela ya
+    validada anterior a rates[0], para enlazar una actualización
+    incremental; sin calendario los huecos se miden en tiempo corrido.
+    """
+    step = TIMEFRAME_SECONDS[timeframe]
+    n = len(rates)
+    flags = np.zeros(n, dtype=np.uint8)
+    empty = np.empty(0, dtype=np.intp)
+    if not n:
+        return Issues(flags, empty, empty)
+    times = rates["time"].astype(np.float64)
+    closes = rates["close"]
+    if prev is not None:
+        times = np.concatenate(([prev[0]], times))
+        closes = np.concatenate(([prev[1]], closes))
+    offset = 0 if prev is None else 1
+    # Vista alineada con np.diff(times): la vela de llegada de cada salto
+    after = flags[1 - offset :]
+
+    # Orden y duplicados (máscaras por bit: sin indexado booleano)
+    delta = np.diff(times)
+    after |= (delta == 0) * np.uint8(DUPLICATE)
+    after |= (delta < 0) * np.uint8(DISORDER)
+
+    # Rango OHLC
+    low, high = rates["low"], rates["high"]
+    bad = (high < low) | (low <= 0)
+    bad |= (rates["open"] < low) | (rates["open"] > high)
+    bad |= (rates["close"] < low) | (rates["close"] > high)
+    flags |= bad * np.uint8(RANGE)
+
+    # Huecos: sólo se consulta el calendario si hay algún salto
+    gaps, missing = empty, empty
+    jumps = np.flatnonzero(delta > step)
+    if len(jumps):
+        start = times[jumps] + step
+        end = times[jumps + 1]
+        if calendar is None:
+            seconds = end - start
+        else:
+            seconds = calendar.open_seconds(start, end)
+        lost = (seconds // step).astype(np.intp)
+        hit = lost > 0
+        gaps = jumps[hit] + 1 - offset
+        missing = lost[hit]
+        flags[gaps] |= GAP
+
+    # Retornos atípicos
+    if scale:
+        returns = _returns(delta, closes, step)
+        wild = np.abs(returns) > outlier_sigma * scale
+        # Un pico aislado da dos retornos atípicos: sólo cuenta la vela del
+        # pico, no la que vuelve al nivel anterior
+        reverts = wild[1:] & wild[:-1] & (np.sign(returns[1:]) != np.sign(returns[:-1]))
+        wild[1:] &= ~reverts
+        after |= (wild & (delta > 0)) * np.uint8(OUTLIER)
+    return Issues(flags, gaps, missing)
+
+
+def counts(issues):
+    """{problema: velas afectadas} sólo de los que aparecen."""
+    out = {
+        name: int(np.count_nonzero(issues.flags & bit)) for name, bit in ISSUES.items()
+    }
+    out = {name: count for name, count in out.items() if count}
+    if len(issues.missing):
+        out["missing"] = int(issues.missing.sum())
+    return out
+
+
+# =============================
+# CORRECCIÓN
+# =============================
+def forward_fill(rates, issues, timeframe, calendar=None, prev=None):
+    """
+    Sin duplicados ni desorden (gana la última recibida), velas RANGE u
+    OUTLIER planas al cierre anterior y huecos con el mercado abierto
+    rellenos con velas planas (volumen 0) al cierre anterior.
+    """
+    step = TIMEFRAME_SECONDS[timeframe]
+    rates = np.array(rates, dtype=RATES_DTYPE)
+    flags = issues.flags
+    if len(issues.gaps):
+        # Velas ausentes: las del paso que caen con el mercado abierto
+        after = issues.gaps
+        first = np.where(
+            after > 0,
+            rates["time"][np.maximum(after - 1, 0)],
+            prev[0] if prev is not None else 0,
+        )
+        slots = ((rates["time"][after] - first) // step - 1).astype(np.intp)
+        base = np.repeat(first, slots)
+        k = np.arange(slots.sum()) - np.repeat(np.cumsum(slots) - slots, slots) + 1
+        times = base + k * step
+        if calendar is not None:
+            times = times[calendar.open_seconds(times, times + step) > 0]
+        filler = np.zeros(len(times), dtype=RATES_DTYPE)
+        filler["time"] = times
+        rates = np.concatenate([rates, filler])
+        flags = np.r_[flags, np.full(len(filler), RANGE, dtype=np.uint8)]
+
+    # Orden estable por tiempo y, ante el mismo tiempo, la última recibida
+    order = np.lexsort((np.arange(len(rates)), rates["time"]))
+    rates, flags = rates[order], flags[order]
+    keep = np.r_[rates["time"][1:] != rates["time"][:-1], True]
+    rates, flags = rates[keep], flags[keep]
+
+    # Planas al último cierre válido
+    bad = (flags & (RANGE | OUTLIER)) != 0
+    if bad.any():
+        closes = np.where(bad, np.nan, rates["close"])
+        if prev is not None and np.isnan(closes[0]):
+            closes[0] = prev[1]
+        valid = np.where(~np.isnan(closes), np.arange(len(closes)), 0)
+        np.maximum.accumulate(valid, out=valid)
+        filled = closes[valid]
+        for name in ("open", "high", "low", "close"):
+            rates[name][bad] = filled[bad]
+        # Sin cierre anterior válido la vela no se puede reconstruir
+        rates = rates[~np.isnan(rates["close"])]
+    return rates
+
+
+# =============================
+# POLÍTICAS SOBRE UN BarCache
+# =============================
+class BarValidator:
+    """
+    Valida cada actualización de un BarCache (`validate`) con la política
+    del símbolo en config.bar_quality. Mantiene la escala robusta de la
+    serie, recalculada en cada ventana completa.
+    """
+
+    def __init__(self, symbol, timeframe, policy=None, metrics=None):
+        cfg = config.bar_quality
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.policy = policy or cfg["symbols"].get(symbol, cfg["policy"])
+        if self.policy not in POLICIES:
+            raise ValueError(f"Política de velas desconocida: {self.policy}")
+        self.outlier_sigma = cfg["outlier_sigma"]
+        self.scale_bars = cfg["scale_bars"]
+        self.calendar = calendar_for(symbol)
+        self.metrics = metrics
+        self.scale = None
+        self._refetched = False
+
+    def validate(self, rates, prev=None):
+        """Velas a guardar o None si la política pide volver a descargar."""
+        if len(rates) >= self.scale_bars:
+            self.scale = robust_scale(rates, self.timeframe) or self.scale
+        issues = check(
+            rates,
+            self.timeframe,
+            self.calendar,
+            self.scale,
+            self.outlier_sigma,
+            prev,
+        )
+        if not issues.flags.any():
+            self._refetched = False
+            return rates
+        found = counts(issues)
+        if self.metrics is not None:
+            self.metrics.bar_issues(found)
+        if self.policy == "refetch" and not self._refetched:
+            self._refetched = True
+            logger.warning(
+                f"{self.symbol} {self.timeframe}: velas inválidas {found}; "
+                f"se vuelve a pedir la ventana"
+            )
+            return None
+        logger.warning(f"{self.symbol} {self.timeframe}: velas inválidas {found}")
+        self._refetched = False
+        if self.policy == "ffill":
+            return forward_fill(rates, issues, self.timeframe, self.calendar, prev)
+        return rates
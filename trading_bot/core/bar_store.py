@@ -0,0 +1,120 @@
+import os
+import threading
+
+import numpy as np
+
+from core.bar_cache import RATES_DTYPE
+
+TIMEFRAME_SECONDS = {
+    "M1": 60,
+    "M5": 300,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H4": 14400,
+    "D1": 86400,
+}
+
+
+class BarStore:
+    """
+    Histórico de velas en disco: un .npy (RATES_DTYPE) por símbolo y
+    timeframe, ordenado por tiempo y sin duplicados.
+    - `load` devuelve un memmap de sólo lectura: abrir años de M1 no copia nada.
+    - `write` fusiona con lo existente (la vela nueva gana) y reemplaza el
+      fichero de forma atómica (tmp + rename).
+    """
+
+    def __init__(self, directory="trading_bot/data/bars"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.directory, f"{symbol}_{timeframe}.npy")
+
+    def exists(self, symbol, timeframe):
+        return os.path.exists(self.path(symbol, timeframe))
+
+    def series(self):
+        """Pares (símbolo, timeframe) disponibles."""
+        out = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".npy"):
+                symbol, _, timeframe = name[:-4].rpartition("_")
+                out.append((symbol, timeframe))
+        return out
+
+    # =============================
+    # LECTURA
+    # =============================
+    def load(self, symbol, timeframe, start=None, end=None):
+        """Velas con `start <= time <= end` (epoch); array vacío si no hay datos."""
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=RATES_DTYPE)
+        rates = np.load(path, mmap_mode="r")
+        lo = 0 if start is None else np.searchsorted(rates["time"], start, side="left")
+        hi = (
+            len(rates)
+            if end is None
+            else np.searchsorted(rates["time"], end, side="right")
+        )
+        return rates[lo:hi]
+
+    def span(self, symbol, timeframe):
+        """(primera, última) vela guardada o None."""
+        rates = self.load(symbol, timeframe)
+        if not len(rates):
+            return None
+        return int(rates["time"][0]), int(rates["time"][-1])
+
+    # =============================
+    # ESCRITURA
+    # =============================
+    def write(self, symbol, timeframe, rates):
+        """Fusiona `rates` con el histórico; devuelve cuántas velas se añadieron."""
+        if rates is None or len(rates) == 0:
+            return 0
+        rates = np.asarray(rates).astype(RATES_DTYPE, copy=False)
+        with self._lock:
+            current = np.array(self.load(symbol, timeframe))
+            merged = merge_rates(current, rates)
+            path = self.path(symbol, timeframe)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, merged)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        return len(merged) - len(current)
+
+
+def merge_rates(old, new):
+    """Unión ordenada por tiempo; ante el mismo `time` gana la vela de `new`."""
+    if not len(old):
+        combined = new
+    else:
+        combined = np.concatenate([new, old])
+    # np.unique se queda con la primera aparición: `new` va delante
+    _, idx = np.unique(combined["time"], return_index=True)
+    return combined[idx]
+
+
+def resample(rates, seconds):
+    """Agrega velas a un periodo mayor (p. ej. H1 -> H4) alineado a epoch."""
+    if not len(rates):
+        return np.empty(0, dtype=RATES_DTYPE)
+    bucket = rates["time"] // seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(rates)] - 1
+    out = np.empty(len(starts), dtype=RATES_DTYPE)
+    out["time"] = bucket[starts] * seconds
+    out["open"] = rates["open"][starts]
+    out["high"] = np.maximum.reduceat(rates["high"], starts)
+    out["low"] = np.minimum.reduceat(rates["low"], starts)
+    out["close"] = rates["close"][ends]
+    out["tick_volume"] = np.add.reduceat(rates["tick_volume"], starts)
+    out["spread"] = rates["spread"][ends]
+    out["real_volume"] = np.add.reduceat(rates["real_volume"], starts)
+    return out
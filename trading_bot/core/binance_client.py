@@ -0,0 +1,300 @@
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+# Cierre de una conexión keep-alive ociosa por el servidor (RemoteDisconnected
+# es un ConnectionResetError)
+STALE_ERRORS = (ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class BinanceAPIError(RuntimeError):
+    def __init__(self, status, code=None, msg=""):
+        super().__init__(f"HTTP {status} code={code} {msg}")
+        self.status = status
+        self.code = code
+        self.msg = msg
+
+
+def klines_weight(limit):
+    """Peso de /fapi/v1/klines según el número de velas pedidas."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+# =============================
+# RATE LIMIT
+# =============================
+class WeightLimiter:
+    """
+    Token bucket sobre el peso por minuto de Binance.
+    - `acquire` bloquea hasta que haya peso disponible.
+    - `observe` sincroniza con X-MBX-USED-WEIGHT-1M (cuenta de todo el IP,
+      así que varios procesos con la misma clave se respetan entre sí).
+    - `pause` congela las peticiones tras un 429/418 con Retry-After.
+    """
+
+    def __init__(self, weight_per_minute=2400, safety=0.8):
+        self.capacity = weight_per_minute * safety
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= weight:
+                        self.tokens -= weight
+                        return
+                    wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def observe(self, used_weight):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, self.capacity - used_weight)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+# =============================
+# POOL DE CONEXIONES
+# =============================
+class ConnectionPool:
+    """Conexiones HTTP(S) keep-alive reutilizables contra un mismo host."""
+
+    def __init__(self, base_url, size=4, timeout=10):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def new(self):
+        cls = (
+            http.client.HTTPSConnection
+            if self.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def get(self):
+        """(conexión, reutilizada)."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self.new(), False
+
+    def put(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# =============================
+# CLIENTE FUTURES
+# =============================
+class FuturesClient:
+    """
+    Cliente mínimo de Binance USDⓈ-M Futures con los mismos métodos que
+    usa BTCFuturesBot de python-binance, más control de peso y reintentos.
+    Las peticiones no idempotentes (órdenes) sólo se reintentan ante 429,
+    que Binance rechaza sin ejecutar, o si la conexión reutilizada del pool
+    estaba cerrada y falla antes de recibir respuesta (una vez, con una
+    conexión nueva, como urllib3).
+    """
+
+    def __init__(
+        self,
+        api_key,
+        api_secret,
+        base_url="https://fapi.binance.com",
+        limiter=None,
+        pool_size=4,
+        max_retries=5,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        recv_window=5000,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.pool = ConnectionPool(base_url, size=pool_size)
+        self.limiter = limiter or WeightLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recv_window = recv_window
+        self.used_weight = 0
+
+    def _backoff(self, attempt):
+        # Full jitter: evita que varios bots reintenten a la vez
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _sign(self, params):
+        params["timestamp"] = int(time.time() * 1000)
+        params["recvWindow"] = self.recv_window
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret, query.encode(), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    @staticmethod
+    def _exchange(conn, method, url, body, headers):
+        try:
+            conn.request(method, url, body=body, headers=headers)
+            return conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+    def _send(self, method, path, query):
+        conn, reused = self.pool.get()
+        url = f"{self.pool.prefix}{path}"
+        headers = {"X-MBX-APIKEY": self.api_key}
+        body = None
+        if method == "GET" or method == "DELETE":
+            if query:
+                url = f"{url}?{query}"
+        else:
+            body = query
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        try:
+            resp = self._exchange(conn, method, url, body, headers)
+        except STALE_ERRORS as e:
+            if not reused:
+                raise
+            # El servidor cerró la conexión ociosa sin llegar a responder: la
+            # petición no se procesó y se repite una vez por una conexión nueva
+            logger.debug(f"Conexión reutilizada cerrada en {path}: {e!r}")
+            conn = self.pool.new()
+            resp = self._exchange(conn, method, url, body, headers)
+        try:
+            data = resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
+        return resp.status, resp.headers, data
+
+    def request(self, method, path, params=None, signed=False, weight=1):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        idempotent = method == "GET"
+
+        for attempt in range(self.max_retries + 1):
+            # Firmar después de esperar turno para no agotar recvWindow
+            self.limiter.acquire(weight)
+            query = self._sign(dict(params)) if signed else urlencode(params)
+            try:
+                status, headers, data = self._send(method, path, query)
+            except (OSError, http.client.HTTPException) as e:
+                if not idempotent or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Error de red en {path}: {e}. Reintento en {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            used = headers.get("X-MBX-USED-WEIGHT-1M")
+            if used is not None:
+                self.used_weight = int(used)
+                self.limiter.observe(self.used_weight)
+
+            if status < 400:
+                return json.loads(data)
+
+            try:
+                err = json.loads(data)
+            except ValueError:
+                err = {}
+            error = BinanceAPIError(status, err.get("code"), err.get("msg", ""))
+
+            if status in (418, 429):
+                retry_after = float(headers.get("Retry-After") or self._backoff(attempt))
+                self.limiter.pause(retry_after)
+                logger.warning(f"Límite de peso superado ({status}), pausa {retry_after:.1f}s")
+                if status == 418:
+                    # IP baneada: no insistir, avisar al bot
+                    raise error
+            elif status not in TRANSIENT_STATUS or not idempotent:
+                raise error
+
+            if attempt == self.max_retries:
+                raise error
+            delay = self._backoff(attempt)
+            logger.warning(f"Error transitorio {status} en {path}. Reintento en {delay:.2f}s")
+            time.sleep(delay)
+
+    def close(self):
+        self.pool.close()
+
+    # =============================
+    # ENDPOINTS
+    # =============================
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        params = {
+            "symbol": symbol,
+            "interval": interval,
+            "limit": limit,
+            "startTime": startTime,
+            "endTime": endTime,
+        }
+        return self.request("GET", "/fapi/v1/klines", params, weight=klines_weight(limit))
+
+    def futures_symbol_ticker(self, symbol=None):
+        weight = 1 if symbol else 2
+        return self.request("GET", "/fapi/v1/ticker/price", {"symbol": symbol}, weight=weight)
+
+    def futures_create_order(self, **params):
+        return self.request("POST", "/fapi/v1/order", params, signed=True, weight=1)
+
+    def futures_place_batch_orders(self, batchOrders):
+        # Hasta 5 órdenes; la respuesta trae una orden o un error por posición
+        params = {"batchOrders": json.dumps(batchOrders, separators=(",", ":"))}
+        return self.request("POST", "/fapi/v1/batchOrders", params, signed=True, weight=5)
+
+    def futures_get_order(self, symbol, orderId):
+        params = {"symbol": symbol, "orderId": orderId}
+        return self.request("GET", "/fapi/v1/order", params, signed=True, weight=1)
+
+    def futures_cancel_order(self, symbol, orderId):
+        params = {"symbol": symbol, "orderId": orderId}
+        return self.request("DELETE", "/fapi/v1/order", params, signed=True, weight=1)
@@ -0,0 +1,173 @@
+import logging
+
+from core.binance_client import BinanceAPIError
+
+logger = logging.getLogger(__name__)
+
+OPPOSITE = {"BUY": "SELL", "SELL": "BUY"}
+
+
+class BracketManager:
+    """
+    Entrada a mercado + STOP_MARKET + TAKE_PROFIT_MARKET (reduce-only)
+    enviados en una sola llamada a /fapi/v1/batchOrders, de modo que las
+    salidas protectoras viven en el exchange y no dependen del polling.
+    Binance no hace OCO en futuros: `sync` cancela la pata superviviente
+    cuando la otra se ejecuta.
+    """
+
+    def __init__(self, client, symbol, price_precision=1):
+        self.client = client
+        self.symbol = symbol
+        self.price_precision = price_precision
+
+        self.side = None
+        self.quantity = None
+        self.sl_order = None  # {"orderId", "stopPrice"}
+        self.tp_order = None
+
+    @property
+    def active(self):
+        return self.side is not None
+
+    def _price(self, value):
+        return f"{value:.{self.price_precision}f}"
+
+    def _exit_order(self, order_type, stop_price):
+        return {
+            "symbol": self.symbol,
+            "side": OPPOSITE[self.side],
+            "type": order_type,
+            "quantity": str(self.quantity),
+            "stopPrice": self._price(stop_price),
+            "reduceOnly": "true",
+            "workingType": "MARK_PRICE",
+        }
+
+    def _place_single(self, order):
+        """Reintento individual de una pata rechazada dentro del batch."""
+        try:
+            return self.client.futures_create_order(**order)
+        except BinanceAPIError as e:
+            logger.error(f"No se pudo colocar {order['type']} {order['stopPrice']}: {e}")
+            return None
+
+    @staticmethod
+    def _leg(result, stop_price):
+        if result is None or "orderId" not in result:
+            return None
+        return {"orderId": result["orderId"], "stopPrice": stop_price}
+
+    # =============================
+    # APERTURA / MODIFICACIÓN / CIERRE
+    # =============================
+    def open(self, side, quantity, sl, tp):
+        self.side = side
+        self.quantity = quantity
+        entry = {
+            "symbol": self.symbol,
+            "side": side,
+            "type": "MARKET",
+            "quantity": str(quantity),
+        }
+        stop = self._exit_order("STOP_MARKET", sl)
+        take = self._exit_order("TAKE_PROFIT_MARKET", tp)
+        results = self.client.futures_place_batch_orders(batchOrders=[entry, stop, take])
+
+        if "orderId" not in results[0]:
+            self.side = None
+            raise BinanceAPIError(400, results[0].get("code"), results[0].get("msg", ""))
+
+        # Las patas del batch son independientes: reintentar la que falle
+        if "orderId" not in results[1]:
+            logger.warning(f"Stop rechazado en batch: {results[1]}")
+            results[1] = self._place_single(stop)
+        if "orderId" not in results[2]:
+            logger.warning(f"Take profit rechazado en batch: {results[2]}")
+            results[2] = self._place_single(take)
+
+        self.sl_order = self._leg(results[1], sl)
+        self.tp_order = self._leg(results[2], tp)
+        logger.info(
+            f"Bracket {side} {quantity} | SL {self._price(sl)} (id {self.sl_order and self.sl_order['orderId']})"
+            f" | TP {self._price(tp)} (id {self.tp_order and self.tp_order['orderId']})"
+        )
+        return results[0]
+
+    def update(self, sl=None, tp=None):
+        """Cancel/replace: la nueva pata se coloca antes de cancelar la vieja."""
+        if not self.active:
+            return
+        if sl is not None:
+            self.sl_order = self._replace(self.sl_order, "STOP_MARKET", sl)
+        if tp is not None:
+            self.tp_order = self._replace(self.tp_order, "TAKE_PROFIT_MARKET", tp)
+
+    def _replace(self, old, order_type, stop_price):
+        new = self._leg(self._place_single(self._exit_order(order_type, stop_price)), stop_price)
+        if new is None:
+            return old
+        self._cancel(old)
+        logger.info(f"{order_type} movido a {self._price(stop_price)}")
+        return new
+
+    def _cancel(self, leg):
+        if leg is None:
+            return
+        try:
+            self.client.futures_cancel_order(symbol=self.symbol, orderId=leg["orderId"])
+        except BinanceAPIError as e:
+            # -2011: ya ejecutada o cancelada
+            if e.code != -2011:
+                logger.error(f"Error cancelando orden {leg['orderId']}: {e}")
+
+    def cancel(self):
+        """Retira las patas protectoras tras una salida por estrategia."""
+        self._cancel(self.sl_order)
+        self._cancel(self.tp_order)
+        self.reset()
+
+    def reset(self):
+        self.side = None
+        self.quantity = None
+        self.sl_order = None
+        self.tp_order = None
+
+    def sync(self):
+        """
+        Comprueba si el exchange ejecutó alguna pata.
+        Devuelve "sl"/"tp" si la posición se cerró en el exchange, o None.
+        """
+        if not self.active:
+            return None
+        for name, leg, other in (
+            ("sl", self.sl_order, self.tp_order),
+            ("tp", self.tp_order, self.sl_order),
+        ):
+            if leg is None:
+                continue
+            order = self.client.futures_get_order(symbol=self.symbol, orderId=leg["orderId"])
+            if order.get("status") == "FILLED":
+                self._cancel(other)
+                self.reset()
+                logger.info(f"Bracket cerrado en exchange por {name.upper()}")
+                return name
+        return None
+
+    # =============================
+    # PERSISTENCIA
+    # =============================
+    def to_state(self):
+        return {
+            "side": self.side,
+            "quantity": self.quantity,
+            "sl_order": self.sl_order,
+            "tp_order": self.tp_order,
+        }
+
+    def load_state(self, state):
+        if state:
+            self.side = state["side"]
+            self.quantity = state["quantity"]
+            self.sl_order = state["sl_order"]
+            self.tp_order = state["tp_order"]
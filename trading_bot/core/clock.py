@@ -0,0 +1,103 @@
+"""
+Reloj inyectable del proceso.
+
+Los módulos de core/ y los bots piden la hora y duermen a través de este
+módulo en lugar de `time`/`datetime`:
+
+    import core.clock as clock
+    clock.sleep(30)
+    hour = clock.now().hour
+
+Por defecto es el reloj real. El replay (core/replay.py) instala un
+`SimClock` en el que dormir avanza el tiempo simulado al instante, así los
+bucles de los bots, sin cambios, recorren un mes de datos en segundos y
+con resultados reproducibles.
+
+Las medidas de rendimiento (perf_counter en métricas y profiler) y los
+plazos internos de hilos y buses siguen usando el reloj real.
+"""
+
+import time as _time
+from datetime import datetime
+
+
+class ReplayFinished(BaseException):
+    """
+    El tiempo simulado llegó al final de los datos. Hereda de BaseException
+    para atravesar los `except Exception` de los bucles de los bots.
+    """
+
+
+class WallClock:
+    def time(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+
+class SimClock:
+    """
+    - start/end: epoch inicial y final; al llegar a `end`, sleep() lanza
+      ReplayFinished.
+    - on_advance(now): se llama cada vez que avanza el tiempo (p. ej.
+      FakeMT5.advance para mostrar velas nuevas y ejecutar SL/TP).
+    monotonic() es el mismo tiempo simulado.
+    """
+
+    def __init__(self, start, end=None, on_advance=None):
+        self._now = float(start)
+        self.end = end
+        self.on_advance = on_advance
+        self.sleeps = 0
+
+    def time(self):
+        return self._now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        self.advance(max(0.0, seconds))
+
+    def advance(self, seconds):
+        self._now += seconds
+        if self.end is not None and self._now >= self.end:
+            self._now = float(self.end)
+            raise ReplayFinished(self._now)
+        if self.on_advance is not None:
+            self.on_advance(self._now)
+
+
+_current = WallClock()
+
+
+def install(clock):
+    """Sustituye el reloj del proceso; devuelve el anterior."""
+    global _current
+    previous, _current = _current, clock
+    return previous
+
+
+def current():
+    return _current
+
+
+def time():
+    return _current.time()
+
+
+def monotonic():
+    return _current.monotonic()
+
+
+def sleep(seconds):
+    _current.sleep(seconds)
+
+
+def now(tz=None):
+    """datetime local (o en `tz`) del reloj actual, como datetime.now()."""
+    return datetime.fromtimestamp(_current.time(), tz)
@@ -0,0 +1,162 @@
+"""
+Supervisor de la conexión con el terminal de MetaTrader 5.
+
+Sustituye al `mt5.initialize` + `raise`/`quit()` de cada bot:
+- `probe()`: terminal_info() como mucho cada `probe_interval` segundos (o
+  al momento con `force`, p. ej. tras un order_send sin respuesta);
+- `ensure()`: sin conexión reintenta initialize con espera creciente
+  acotada, sin bloquear: el bucle del bot pregunta, duerme `retry_in()`
+  y vuelve, en lugar de esperar 30-60 s a ciegas tras cada error;
+- `defer()`: las intenciones de las estrategias (abrir, cerrar, mover SL)
+  que llegan durante el corte se retienen, la última por clave, y se
+  ejecutan al reconectar salvo que hayan caducado;
+- cada recuperación se registra en el log y en las métricas (segundos sin
+  conexión).
+"""
+
+import logging
+from collections import OrderedDict, deque
+
+import MetaTrader5 as mt5
+
+import cfg.config as config
+import core.clock as clock
+
+logger = logging.getLogger(__name__)
+
+
+class Mt5Supervisor:
+    def __init__(self, broker=None, name="mt5", metrics=None, on_reconnect=None):
+        cfg = config.connection
+        self.broker = broker  # login/password/server; None = sesión del terminal
+        self.name = name
+        self.metrics = metrics
+        self.on_reconnect = on_reconnect
+        self.probe_interval = cfg["probe_interval"]
+        self.backoff_initial = cfg["backoff_initial"]
+        self.backoff_max = cfg["backoff_max"]
+        self.intent_ttl = cfg["intent_ttl"]
+        self.max_intents = cfg["max_intents"]
+
+        self.up = False
+        self.down_since = None  # inicio del corte en curso (reloj monotónico)
+        self.outages = 0
+        self.recoveries = deque(maxlen=100)  # segundos sin conexión por corte
+        self._backoff = self.backoff_initial
+        self._next_probe = 0.0
+        self._next_attempt = 0.0
+        self._intents = OrderedDict()  # clave -> (caducidad, acción)
+
+    # =============================
+    # ESTADO
+    # =============================
+    def probe(self, force=False):
+        """True si el terminal responde; marca el corte si deja de hacerlo."""
+        if not self.up:
+            return False
+        now = clock.monotonic()
+        if not force and now < self._next_probe:
+            return True
+        self._next_probe = now + self.probe_interval
+        info = mt5.terminal_info()
+        if info is None or not getattr(info, "connected", True):
+            self._lost()
+            return False
+        return True
+
+    def ensure(self):
+        """Conectado o, si toca, un intento de reconexión; nunca bloquea."""
+        if self.probe():
+            return True
+        now = clock.monotonic()
+        if now < self._next_attempt:
+            return False
+        if self._initialize():
+            self._recovered()
+            return True
+        self._next_attempt = now + self._backoff
+        logger.warning(
+            f"{self.name}: sin conexión con MT5 {mt5.last_error()}; "
+            f"reintento en {self._backoff:.0f} s"
+        )
+        self._backoff = min(self._backoff * 2, self.backoff_max)
+        return False
+
+    def connect(self, sleep=clock.sleep):
+        """Bloquea hasta conectar (arranque), con la misma espera creciente."""
+        while not self.ensure():
+            sleep(self.retry_in())
+
+    def retry_in(self):
+        """Segundos hasta el próximo intento de reconexión."""
+        return max(0.0, self._next_attempt - clock.monotonic())
+
+    def _initialize(self):
+        if self.broker:
+            ok = mt5.initialize(
+                login=self.broker["login"],
+                password=self.broker["password"],
+                server=self.broker["server"],
+            )
+        else:
+            ok = mt5.initialize()
+        return bool(ok) and mt5.terminal_info() is not None
+
+    def _lost(self):
+        self.up = False
+        self.down_since = clock.monotonic()
+        self.outages += 1
+        self._backoff = self.backoff_initial
+        self._next_attempt = self.down_since  # primer reintento inmediato
+        logger.warning(f"{self.name}: conexión con MT5 perdida {mt5.last_error()}")
+        if self.metrics is not None:
+            self.metrics.connection(False)
+        mt5.shutdown()
+
+    def _recovered(self):
+        self.up = True
+        self._backoff = self.backoff_initial
+        self._next_probe = clock.monotonic() + self.probe_interval
+        if self.down_since is None:
+            logger.info(f"{self.name}: conexión con MT5 establecida")
+        else:
+            seconds = clock.monotonic() - self.down_since
+            self.down_since = None
+            self.recoveries.append(seconds)
+            logger.info(f"{self.name}: conexión con MT5 recuperada en {seconds:.1f} s")
+        if self.metrics is not None:
+            self.metrics.connection(True, self.recoveries[-1] if self.recoveries else 0)
+        if self.on_reconnect is not None:
+            try:
+                self.on_reconnect()
+            except Exception as e:
+                logger.error(f"{self.name}: error al reconectar: {e}", exc_info=True)
+        self._run_intents()
+
+    # =============================
+    # INTENCIONES DURANTE EL CORTE
+    # =============================
+    def defer(self, key, action):
+        """Retiene `action()` hasta reconectar; sustituye a la anterior de `key`."""
+        self._intents.pop(key, None)
+        self._intents[key] = (clock.monotonic() + self.intent_ttl, action)
+        if len(self._intents) > self.max_intents:
+            dropped, _ = self._intents.popitem(last=False)
+            logger.warning(f"{self.name}: intención {dropped} descartada (cola llena)")
+        logger.info(f"{self.name}: sin conexión, intención {key} retenida")
+
+    def pending(self):
+        return list(self._intents)
+
+    def _run_intents(self):
+        intents, self._intents = self._intents, OrderedDict()
+        now = clock.monotonic()
+        for key, (deadline, action) in intents.items():
+            if now > deadline:
+                logger.warning(f"{self.name}: intención {key} caducada")
+                continue
+            logger.info(f"{self.name}: ejecutando intención retenida {key}")
+            try:
+                action()
+            except Exception as e:
+                logger.error(f"{self.name}: intención {key}: {e}", exc_info=True)
@@ -0,0 +1,546 @@
+"""
+Motor de eventos compartido por las estrategias (core/strategy.py).
+
+El motor es el único que habla con MT5: una conexión, una caché de velas
+por símbolo/timeframe (compartida entre estrategias, con la consulta de
+3 velas de BarCache), un snapshot de posiciones y un tick por símbolo e
+iteración, y un único camino de envío de órdenes con métricas y manejo
+uniforme de `result` None. Las estrategias sólo reciben eventos.
+"""
+
+import logging
+from functools import partial
+
+import MetaTrader5 as mt5
+
+import cfg.config as config
+import core.clock as clock
+import core.execution as execution
+from core.bar_cache import BarCache
+from core.bar_quality import BarValidator
+from core.bar_store import TIMEFRAME_SECONDS
+from core.connection import Mt5Supervisor
+from core.indicator_graph import IndicatorGraph
+from core.journal import open_journal
+from core.market_hours import calendar_for
+from core.metrics import BotMetrics, MetricsServer
+from core.position_bus import reader_for
+from core.profiling import LoopProfiler
+from core.shm_bus import MarketDataReader
+from core.state_store import StateStore
+from core.strategy import Fill
+
+logger = logging.getLogger(__name__)
+
+
+class _Feed:
+    """Velas de un símbolo/timeframe y las estrategias que las consumen."""
+
+    def __init__(self, symbol, timeframe, maxlen, metrics=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.mt5_timeframe = getattr(mt5, f"TIMEFRAME_{timeframe}")
+        self.cache = BarCache(
+            maxlen=maxlen, validator=BarValidator(symbol, timeframe, metrics=metrics)
+        )
+        self.closed_time = None  # última vela cerrada ya entregada
+        self.listeners = []  # estrategias con este timeframe como principal
+
+
+class StrategyEngine:
+    """
+    Bucle único para varias estrategias:
+    - cada `bar_poll` segundos refresca las velas y, por cada vela cerrada
+      nueva, actualiza los indicadores y llama a on_bar (los timeframes
+      mayores primero, para que un H4 que cierra a la vez que un H1 ya esté
+      actualizado cuando la estrategia H1 lo consulte);
+    - cada `tick_interval` de cada estrategia, on_tick con el tick actual;
+    - en cada iteración, on_fill para las posiciones cerradas en el broker.
+    """
+
+    def __init__(self, strategies, name="strategy_engine", broker=None):
+        cfg = config.engine
+        self.name = name
+        self.strategies = list(strategies)
+        self.broker = broker or config.broker
+        self.bar_poll = cfg["bar_poll"]
+        self.error_sleep = cfg["error_sleep"]
+
+        names = [s.name for s in self.strategies]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Nombres de estrategia repetidos: {names}")
+
+        self.profiler = LoopProfiler(name, **config.profiling)
+        self.metrics = BotMetrics(name)
+        if config.metrics["enabled"] and name in config.metrics["ports"]:
+            MetricsServer(
+                self.metrics, config.metrics["host"], config.metrics["ports"][name]
+            ).start()
+        self.store = StateStore(
+            name,
+            directory=config.state["dir"],
+            compact_every=config.state["compact_every"],
+        )
+        self.journal = open_journal(name)
+        # Conexión vigilada: reconexión con espera creciente y órdenes retenidas
+        self.link = Mt5Supervisor(
+            self.broker, name, self.metrics, on_reconnect=self._reconnected
+        )
+        self.netting = False  # cuenta netting: reversiones con una sola orden
+
+        # Indicadores deduplicados entre estrategias, una evaluación por vela
+        self.indicators = IndicatorGraph()
+        self.feeds = {}
+        for strategy in self.strategies:
+            strategy.bind(self)
+            maxlen = max(cfg["bars_window"], strategy.warmup + 2)
+            for tf in strategy.timeframes():
+                key = (strategy.symbol, tf)
+                if key not in self.feeds:
+                    self.feeds[key] = _Feed(strategy.symbol, tf, maxlen, self.metrics)
+                feed = self.feeds[key]
+                feed.cache.maxlen = max(feed.cache.maxlen, maxlen)
+                if tf == strategy.timeframe:
+                    feed.listeners.append(strategy)
+        self._feed_order = sorted(
+            self.feeds.values(), key=lambda f: -TIMEFRAME_SECONDS[f.timeframe]
+        )
+
+        # Horario de cada símbolo: con el mercado cerrado no se consulta nada
+        symbols = {s.symbol for s in self.strategies}
+        self.calendars = (
+            {symbol: calendar_for(symbol) for symbol in symbols}
+            if config.market_hours["enabled"]
+            else {}
+        )
+        self.prewarm = config.market_hours["prewarm"]
+
+        # Datos desde market_data_daemon.py si está activo
+        self.buses = {}
+        if config.market_bus["enabled"]:
+            symbol = config.market_bus["symbol"]
+            if any(s.symbol == symbol for s in self.strategies):
+                self.buses[symbol] = MarketDataReader(
+                    symbol,
+                    prefix=config.market_bus["prefix"],
+                    stale_after=config.market_bus["stale_after"],
+                )
+
+        # Posiciones desde el snapshot compartido si está activo
+        self.positions_bus = reader_for(self.broker["login"])
+
+        # Cachés de la iteración en curso
+        self._ticks = {}
+        self._positions = {}
+        # Posiciones vistas por estrategia, para detectar cierres por SL/TP
+        self._known = {s.name: {} for s in self.strategies}
+        self._saved = {}
+        self._due = {"bars": 0.0}
+        self._due.update({s.name: 0.0 for s in self.strategies if s.tick_interval})
+
+    # =============================
+    # CONEXIÓN Y ESTADO
+    # =============================
+    def connect(self):
+        self.link.connect(sleep=self.metrics.sleep)
+        self.netting = execution.netting()
+        for symbol in {s.symbol for s in self.strategies}:
+            if mt5.symbol_info(symbol) is None:
+                logger.warning(f"Símbolo {symbol} no disponible")
+        logger.info(f"Conexión establecida. Cuenta: {self.broker['login']}")
+
+    def _reconnected(self):
+        # Lo leído antes del corte ya no vale
+        self._ticks.clear()
+        self._positions.clear()
+
+    def restore_state(self):
+        for strategy in self.strategies:
+            state = self.store.get(f"strategy.{strategy.name}")
+            if state is not None:
+                strategy.load_state(state)
+                self._saved[strategy.name] = state
+            # Las posiciones abiertas al arrancar no generan on_fill
+            self._known[strategy.name] = {p.ticket: p for p in self.positions(strategy)}
+        logger.info(
+            f"Estrategias: {', '.join(s.name for s in self.strategies)} | "
+            f"{len(self.feeds)} series de velas"
+        )
+
+    def _save(self, strategy):
+        state = strategy.to_state()
+        if state is not None and state != self._saved.get(strategy.name):
+            self.store.put(f"strategy.{strategy.name}", state)
+            self._saved[strategy.name] = state
+
+    def _call(self, strategy, handler, *args):
+        """Un error en una estrategia no detiene al resto."""
+        try:
+            handler(*args)
+        except Exception as e:
+            logger.error(f"{strategy.name}.{handler.__name__}: {e}", exc_info=True)
+        self._save(strategy)
+
+    # =============================
+    # DATOS
+    # =============================
+    def _copy(self, feed, n):
+        bus = self.buses.get(feed.symbol)
+        if bus:
+            rates = bus.rates(feed.mt5_timeframe, n)
+            if rates is not None:
+                return rates
+        return self.metrics.call(
+            mt5.copy_rates_from_pos, feed.symbol, feed.mt5_timeframe, 0, n
+        )
+
+    def _refresh(self, feed):
+        # Con la caché llena basta con las últimas velas
+        if len(feed.cache):
+            rates = self._copy(feed, 3)
+            if rates is not None and feed.cache.covers(rates):
+                return feed.cache.update(rates)
+        rates = self._copy(feed, feed.cache.maxlen)
+        if rates is None:
+            logger.warning(f"Sin velas de {feed.symbol} {feed.timeframe}")
+            return False
+        return feed.cache.update(rates)
+
+    def _dispatch(self, feed):
+        closed = feed.cache.rates[:-1]
+        if not len(closed):
+            return
+        last = int(closed["time"][-1])
+        if feed.closed_time is not None and last <= feed.closed_time:
+            return
+        if feed.closed_time is None or int(closed["time"][0]) > feed.closed_time:
+            # Arranque o hueco: resembrar los indicadores y entregar la última
+            self.indicators.seed(feed.symbol, feed.timeframe, closed[:-1])
+            new = closed[-1:]
+        else:
+            new = closed[closed["time"] > feed.closed_time]
+        feed.closed_time = last
+        self.metrics.bar(last)
+
+        for bar in new:
+            self.indicators.update(feed.symbol, feed.timeframe, bar)
+            for strategy in feed.listeners:
+                self._call(strategy, strategy.on_bar, bar)
+
+    def bars(self, symbol, timeframe, n, forming=False):
+        """Últimas `n` velas cerradas (y la en formación si `forming`)."""
+        rates = self.feeds[(symbol, timeframe)].cache.rates
+        if not forming:
+            rates = rates[:-1]
+        return rates[-n:]
+
+    def tick(self, symbol):
+        if symbol not in self._ticks:
+            tick = None
+            bus = self.buses.get(symbol)
+            if bus:
+                tick = bus.tick()
+            if tick is None:
+                tick = mt5.symbol_info_tick(symbol)
+            execution.router().observe(symbol, tick)
+            self._ticks[symbol] = tick
+        return self._ticks[symbol]
+
+    # =============================
+    # POSICIONES
+    # =============================
+    def _symbol_positions(self, symbol):
+        if symbol not in self._positions:
+            self._positions[symbol] = self.positions_bus.positions_or_live(symbol)
+        return self._positions[symbol]
+
+    def positions(self, strategy):
+        positions = self._symbol_positions(strategy.symbol)
+        if positions is None:
+            return []
+        return [p for p in positions if p.magic == strategy.magic]
+
+    def _sync_fills(self, strategy):
+        """on_fill para las posiciones que desaparecieron sin cerrarlas nosotros."""
+        if self._symbol_positions(strategy.symbol) is None:
+            return 0
+        current = {p.ticket: p for p in self.positions(strategy)}
+        known = self._known[strategy.name]
+        for ticket in [t for t in known if t not in current]:
+            pos = known.pop(ticket)
+            self.journal.position_closed(pos, strategy.name)
+            self._fill(strategy, "close", pos, pos.price_current, "broker")
+        known.update(current)
+        return len(current)
+
+    def _fill(self, strategy, event, pos, price, reason=""):
+        direction = "buy" if pos.type == mt5.POSITION_TYPE_BUY else "sell"
+        fill = Fill(
+            event, pos.ticket, direction, pos.volume, price, pos.sl, pos.tp, reason
+        )
+        self._call(strategy, strategy.on_fill, fill)
+
+    # =============================
+    # EJECUCIÓN
+    # =============================
+    def _send(self, strategy, request, reason=""):
+        result = execution.send(request)
+        self.metrics.order(result)
+        return self._checked(strategy, request, result, reason)
+
+    def _checked(self, strategy, request, result, reason=""):
+        """Diario y comprobación del result de un order_send ya enviado."""
+        self.journal.order(request, result, strategy.name, reason)
+        # Cualquier orden cambia las posiciones: se vuelven a pedir
+        self._positions.pop(request["symbol"], None)
+        if result is None:
+            logger.error(
+                f"{strategy.name}: order_send sin respuesta {mt5.last_error()}"
+            )
+            self.link.probe(force=True)
+            return None
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            logger.error(
+                f"{strategy.name}: orden rechazada retcode={result.retcode} "
+                f"({result.comment})"
+            )
+            return None
+        return result
+
+    def _defer(self, key, action):
+        """Sin conexión la orden se retiene y se envía al reconectar."""
+        if self.link.probe():
+            return False
+        self.link.defer(key, action)
+        return True
+
+    def _tick_for(self, strategy, key, retry):
+        tick = self.tick(strategy.symbol)
+        if tick is None and not self._defer(key, retry):
+            logger.error(f"{strategy.name}: sin tick de {strategy.symbol}")
+        return tick
+
+    def _open_request(self, strategy, direction, volume, sl, tp, tick):
+        buy = direction == "buy"
+        return {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": strategy.symbol,
+            "volume": volume,
+            "type": mt5.ORDER_TYPE_BUY if buy else mt5.ORDER_TYPE_SELL,
+            "price": tick.ask if buy else tick.bid,
+            "sl": sl,
+            "tp": tp,
+            "magic": strategy.magic,
+            "comment": strategy.name,
+        }
+
+    def _close_options(self, strategy, reason):
+        return {
+            "comment": f"Close-{reason}" if reason else strategy.name,
+            "magic": strategy.magic,
+        }
+
+    def _opened(self, strategy, request, result):
+        direction = "buy" if request["type"] == mt5.ORDER_TYPE_BUY else "sell"
+        price = result.price or request["price"]
+        volume, sl, tp = request["volume"], request["sl"], request["tp"]
+        logger.info(
+            f"{strategy.name}: {direction.upper()} {volume} {strategy.symbol} a "
+            f"{price:.5f} SL {sl:.5f} TP {tp:.5f}"
+        )
+        fill = Fill("open", result.order, direction, volume, price, sl, tp, "")
+        self._call(strategy, strategy.on_fill, fill)
+
+    def _closed(self, strategy, position, request, result, reason):
+        logger.info(f"{strategy.name}: cerrada pos {position.ticket} ({reason})")
+        self._known[strategy.name].pop(position.ticket, None)
+        price = result.price or request["price"]
+        self._fill(strategy, "close", position, price, reason)
+
+    def open(self, strategy, direction, volume, sl=0.0, tp=0.0):
+        key = (strategy.name, "open")
+        retry = partial(self.open, strategy, direction, volume, sl, tp)
+        tick = self._tick_for(strategy, key, retry)
+        if tick is None:
+            return None
+        if not self.positions_bus.check_exposure(strategy.symbol, direction, volume):
+            return None
+        request = self._open_request(strategy, direction, volume, sl, tp, tick)
+        result = self._send(strategy, request)
+        if result is None:
+            self._defer(key, retry)
+            return None
+        self._opened(strategy, request, result)
+        return result
+
+    def close(self, strategy, position, reason=""):
+        key = (strategy.name, "close", position.ticket)
+        retry = partial(self.close, strategy, position, reason)
+        tick = self._tick_for(strategy, key, retry)
+        if tick is None:
+            return False
+        options = self._close_options(strategy, reason)
+        request = execution.close_request(position, tick, **options)
+        result = self._send(strategy, request, reason)
+        if result is None:
+            self._defer(key, retry)
+            return False
+        self._closed(strategy, position, request, result, reason)
+        return True
+
+    def flatten(self, strategy, reason=""):
+        """Cierra todas las posiciones de la estrategia con un tick y a la vez."""
+        return self.reverse(strategy, None, 0.0, reason=reason) is not False
+
+    def reverse(self, strategy, direction, volume, sl=0.0, tp=0.0, reason=""):
+        """
+        Cierra las posiciones de la estrategia y abre `direction` (None: sólo
+        cierra) con un único tick y en un solo viaje (core/execution.py).
+        Devuelve el result de la apertura, None si no abrió o False si algún
+        cierre falló.
+        """
+        # Del terminal, no del snapshot: puede ir un ciclo del daemon por detrás
+        live = mt5.positions_get(symbol=strategy.symbol) or ()
+        positions = [p for p in live if p.magic == strategy.magic]
+        if not positions:
+            return self.open(strategy, direction, volume, sl, tp) if direction else None
+        retry = partial(self.reverse, strategy, direction, volume, sl, tp, reason)
+        tick = self._tick_for(strategy, (strategy.name, "reverse"), retry)
+        if tick is None:
+            return False
+        options = self._close_options(strategy, reason)
+        if direction and self.positions_bus.check_exposure(
+            strategy.symbol, direction, volume
+        ):
+            request = self._open_request(strategy, direction, volume, sl, tp, tick)
+            done = execution.reverse(
+                positions, tick, request, netting=self.netting, **options
+            )
+        else:
+            done = execution.flatten(positions, tick, **options)
+        for result in done.results:
+            self.metrics.order(result)
+        self.metrics.flatten(done.seconds)
+
+        closed, opened = 0, None
+        for position, (request, result) in zip(positions, done.legs):
+            if self._checked(strategy, request, result, reason) is None:
+                key = (strategy.name, "close", position.ticket)
+                self._defer(key, partial(self.close, strategy, position, reason))
+                continue
+            self._closed(strategy, position, request, result, reason)
+            closed += 1
+        if len(done.legs) > len(positions):
+            request, result = done.legs[-1]
+            opened = self._checked(strategy, request, result)
+            if opened is None:
+                retry = partial(self.open, strategy, direction, volume, sl, tp)
+                self._defer((strategy.name, "open"), retry)
+            else:
+                self._opened(strategy, request, result)
+        logger.info(
+            f"{strategy.name}: {closed}/{len(positions)} cerradas"
+            f"{f' y {direction.upper()}' if opened else ''} en "
+            f"{done.seconds * 1000:.1f} ms ({len(done.results)} órdenes)"
+        )
+        return False if closed < len(positions) else opened
+
+    def modify(self, strategy, position, sl=None, tp=None, reason=""):
+        request = {
+            "action": mt5.TRADE_ACTION_SLTP,
+            "symbol": strategy.symbol,
+            "position": position.ticket,
+            "sl": position.sl if sl is None else sl,
+            "tp": position.tp if tp is None else tp,
+        }
+        if self._send(strategy, request, reason) is None:
+            retry = partial(self.modify, strategy, position, sl, tp, reason)
+            self._defer((strategy.name, "modify", position.ticket), retry)
+            return False
+        logger.info(
+            f"{strategy.name}: {reason or 'SL/TP'} pos {position.ticket} | "
+            f"SL {request['sl']:.5f} TP {request['tp']:.5f}"
+        )
+        return True
+
+    # =============================
+    # BUCLE
+    # =============================
+    def _sessions(self, wall):
+        """
+        Símbolos abiertos, símbolos a punto de abrir (se refrescan sus velas
+        durante los `prewarm` segundos previos) y segundos hasta el próximo
+        cambio de estado de alguno cerrado.
+        """
+        active, warming, wake = set(), set(), None
+        for symbol in {s.symbol for s in self.strategies}:
+            calendar = self.calendars.get(symbol)
+            if calendar is None or calendar.is_open(wall):
+                active.add(symbol)
+                continue
+            opens = calendar.next_open(wall)
+            if opens is None:
+                continue
+            if opens - wall <= self.prewarm:
+                warming.add(symbol)
+                until = opens - wall
+            else:
+                until = opens - wall - self.prewarm
+            wake = until if wake is None else min(wake, until)
+        return active, warming, wake
+
+    def step(self, now=None):
+        """Una iteración; devuelve los segundos hasta la próxima tarea."""
+        now = clock.monotonic() if now is None else now
+        self._ticks.clear()
+        self._positions.clear()
+        if not self.link.ensure():
+            return self.link.retry_in()
+        active, warming, wake = self._sessions(clock.time())
+        due = [] if wake is None else [now + wake]
+
+        self.metrics.positions(
+            sum(self._sync_fills(s) for s in self.strategies if s.symbol in active)
+        )
+
+        if active or warming:
+            if now >= self._due["bars"]:
+                self._due["bars"] = now + self.bar_poll
+                for feed in self._feed_order:
+                    if feed.symbol in active or feed.symbol in warming:
+                        if self._refresh(feed):
+                            self._dispatch(feed)
+            due.append(self._due["bars"])
+
+        for strategy in self.strategies:
+            if not strategy.tick_interval or strategy.symbol not in active:
+                continue
+            if now >= self._due[strategy.name]:
+                self._due[strategy.name] = now + strategy.tick_interval
+                tick = self.tick(strategy.symbol)
+                if tick is not None:
+                    self._call(strategy, strategy.on_tick, tick)
+            due.append(self._due[strategy.name])
+
+        return max(0.0, min(due) - clock.monotonic()) if due else 0.0
+
+    def run(self):
+        self.connect()
+        self.restore_state()
+        for strategy in self.strategies:
+            self._call(strategy, strategy.on_start)
+        logger.info(f"{self.name} iniciado")
+
+        while True:
+            self.profiler.tick()
+            self.metrics.loop()
+            try:
+                self.metrics.sleep(self.step())
+            except KeyboardInterrupt:
+                logger.info("Motor detenido manualmente por el usuario.")
+                break
+            except Exception as e:
+                logger.error(f"Error inesperado: {e}", exc_info=True)
+                self.metrics.sleep(self.error_sleep)
+
+        logger.info(f"{self.name} finalizado.")
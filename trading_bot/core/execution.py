@@ -0,0 +1,333 @@
+"""
+Cierre y reversión de posiciones en un solo viaje al broker.
+
+Antes cada bot cerraba posición a posición, pidiendo un tick nuevo antes
+de cada order_send bloqueante, y la orden de la reversión salía cuando
+habían terminado todos los cierres: N viajes de ida y vuelta. Aquí:
+- todas las órdenes se construyen con un único tick;
+- los order_send salen a la vez por un pool acotado de hilos
+  (config.execution["workers"]), compartido por el proceso;
+- en cuentas netting una reversión es una sola orden por el volumen
+  abierto más el nuevo, que invierte la posición neta.
+
+Las funciones sólo envían: métricas, diario y estado los actualiza quien
+llama con `Execution.legs` (una pareja request/result por posición
+cerrada y por la apertura) y `Execution.results` (los order_send reales).
+
+Todos los envíos pasan por `send` (OrderRouter del proceso), que elige
+deviation y modo de llenado por símbolo en lugar del 50 fijo y repite al
+momento las recotizaciones con un tick nuevo.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import MetaTrader5 as mt5
+
+import cfg.config as config
+import core.clock as clock
+
+logger = logging.getLogger(__name__)
+
+Execution = namedtuple("Execution", "legs results seconds")
+
+# Recotizaciones: se repiten con el precio del tick actual
+REQUOTES = (10004, 10020, 10021)  # REQUOTE, PRICE_CHANGED, PRICE_OFF
+_RETCODE_DONE = 10009
+_RETCODE_INVALID_FILL = 10030
+# symbol_info().filling_mode es una máscara: 1 = FOK, 2 = IOC
+_SYMBOL_FILLING_FOK, _SYMBOL_FILLING_IOC = 1, 2
+
+
+# =============================
+# ENRUTADO ADAPTATIVO
+# =============================
+class _Rolling:
+    """Medias exponenciales de un símbolo (y hora) con su número de muestras."""
+
+    __slots__ = ("alpha", "spread", "variance", "latency", "slippage", "samples")
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.spread = None  # precio
+        self.variance = None  # varianza del mid por segundo (precio² / s)
+        self.latency = None  # segundos de order_send
+        self.slippage = None  # precio en contra respecto al pedido
+        self.samples = 0
+
+    def _mix(self, name, value):
+        old = getattr(self, name)
+        setattr(self, name, value if old is None else old + self.alpha * (value - old))
+
+
+class OrderRouter:
+    """
+    Estadísticas móviles por símbolo y hora UTC (spread, volatilidad entre
+    ticks, latencia de order_send y deslizamiento) para elegir:
+    - deviation = spread_mult * spread + vol_mult * σ(latencia) en puntos,
+      acotada a [min_deviation, max_deviation]; `deviation` mientras la
+      hora no tenga `min_samples` ticks (se usa la media del símbolo);
+    - type_filling entre los que admite el símbolo (IOC, FOK, RETURN), y
+      el siguiente si el broker responde INVALID_FILL.
+    Las recotizaciones (REQUOTES) se repiten hasta `retries` veces con el
+    precio del tick actual.
+    """
+
+    def __init__(self):
+        cfg = config.execution
+        self.alpha = cfg["alpha"]
+        self.default_deviation = cfg["deviation"]
+        self.min_deviation = cfg["min_deviation"]
+        self.max_deviation = cfg["max_deviation"]
+        self.spread_mult = cfg["spread_mult"]
+        self.vol_mult = cfg["vol_mult"]
+        self.min_samples = cfg["min_samples"]
+        self.retries = cfg["retries"]
+        self.stale = cfg["tick_stale"]
+        self._stats = {}  # (símbolo, hora | None) -> _Rolling
+        # símbolo -> (time_msc, mid, monotonic local) del último tick visto
+        self._ticks = {}
+        # símbolo -> (point, (modos de llenado)); la tupla se sustituye
+        # entera bajo `_lock`, nunca se modifica en sitio
+        self._symbols = {}
+        self._lock = threading.Lock()
+
+    def _rolling(self, symbol, hour):
+        key = (symbol, hour)
+        if key not in self._stats:
+            self._stats[key] = _Rolling(self.alpha)
+        return self._stats[key]
+
+    def _buckets(self, symbol):
+        hour = int(clock.time() // 3600 % 24)
+        return self._rolling(symbol, hour), self._rolling(symbol, None)
+
+    def observe(self, symbol, tick):
+        """Incorpora un tick: spread y varianza del mid desde el anterior."""
+        if tick is None or not tick.ask or not tick.bid:
+            return
+        mid = (tick.bid + tick.ask) / 2
+        with self._lock:
+            previous = self._ticks.get(symbol)
+            if previous is not None and tick.time_msc <= previous[0]:
+                return
+            self._ticks[symbol] = (tick.time_msc, mid, clock.monotonic())
+            for stats in self._buckets(symbol):
+                stats._mix("spread", tick.ask - tick.bid)
+                if previous is not None:
+                    dt = (tick.time_msc - previous[0]) / 1000
+                    stats._mix("variance", (mid - previous[1]) ** 2 / dt)
+                stats.samples += 1
+
+    def _symbol(self, symbol):
+        with self._lock:
+            if symbol in self._symbols:
+                return self._symbols[symbol]
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            return None, (mt5.ORDER_FILLING_IOC,)
+        modes = []
+        if info.filling_mode & _SYMBOL_FILLING_IOC:
+            modes.append(mt5.ORDER_FILLING_IOC)
+        if info.filling_mode & _SYMBOL_FILLING_FOK:
+            modes.append(mt5.ORDER_FILLING_FOK)
+        modes.append(mt5.ORDER_FILLING_RETURN)
+        with self._lock:
+            return self._symbols.setdefault(symbol, (info.point, tuple(modes)))
+
+    def _drop_filling(self, symbol, mode):
+        """El símbolo no admite `mode`: deja de ofrecerse en los próximos envíos."""
+        with self._lock:
+            point, modes = self._symbols.get(symbol, (None, ()))
+            if mode in modes and len(modes) > 1:
+                self._symbols[symbol] = (point, tuple(m for m in modes if m != mode))
+
+    def deviation(self, symbol):
+        """Deviation en puntos para una orden de `symbol` ahora."""
+        point, _ = self._symbol(symbol)
+        hourly, overall = self._buckets(symbol)
+        stats = hourly if hourly.samples >= self.min_samples else overall
+        if not point or stats.samples < self.min_samples or stats.spread is None:
+            return self.default_deviation
+        # Movimiento esperable del precio durante el viaje de la orden
+        latency = stats.latency if stats.latency is not None else 0.1
+        sigma = math.sqrt((stats.variance or 0.0) * latency)
+        price = self.spread_mult * stats.spread + self.vol_mult * sigma
+        points = math.ceil(price / point)
+        return int(min(self.max_deviation, max(self.min_deviation, points)))
+
+    def _fresh_tick(self, symbol):
+        tick = mt5.symbol_info_tick(symbol)
+        self.observe(symbol, tick)
+        return tick
+
+    def send(self, request):
+        """order_send con deviation y llenado adaptativos y reintento de recotizaciones."""
+        if request.get("action") != mt5.TRADE_ACTION_DEAL:
+            return mt5.order_send(request)
+        symbol = request["symbol"]
+        seen = self._ticks.get(symbol)
+        if seen is None or clock.monotonic() - seen[2] > self.stale:
+            self._fresh_tick(symbol)
+        # Copia propia: otros hilos pueden estar descartando modos a la vez
+        modes = list(self._symbol(symbol)[1])
+        request = dict(request, deviation=self.deviation(symbol))
+        request.setdefault("type_filling", modes[0])
+        if request["type_filling"] not in modes:
+            request["type_filling"] = modes[0]
+        requested = request.get("price")
+
+        for attempt in range(self.retries + 1):
+            began = time.perf_counter()
+            result = mt5.order_send(request)
+            elapsed = time.perf_counter() - began
+            with self._lock:
+                for stats in self._buckets(symbol):
+                    stats._mix("latency", elapsed)
+            if result is None or attempt == self.retries:
+                break
+            if result.retcode in REQUOTES:
+                tick = self._fresh_tick(symbol)
+                if tick is None:
+                    break
+                buy = request["type"] == mt5.ORDER_TYPE_BUY
+                request["price"] = tick.ask if buy else tick.bid
+                request["deviation"] = self.deviation(symbol)
+                logger.info(
+                    f"{symbol}: recotización {result.retcode}, reintento a "
+                    f"{request['price']} (deviation {request['deviation']})"
+                )
+                continue
+            if result.retcode == _RETCODE_INVALID_FILL:
+                failed = request["type_filling"]
+                modes = [m for m in modes if m != failed]
+                if not modes:
+                    break
+                # El símbolo no admite este modo: no volver a usarlo
+                self._drop_filling(symbol, failed)
+                request["type_filling"] = modes[0]
+                continue
+            break
+
+        done = result is not None and result.retcode == _RETCODE_DONE
+        if done and requested and getattr(result, "price", 0):
+            sign = 1 if request["type"] == mt5.ORDER_TYPE_BUY else -1
+            with self._lock:
+                for stats in self._buckets(symbol):
+                    stats._mix("slippage", (result.price - requested) * sign)
+        return result
+
+    def summary(self, symbol):
+        """Medias del símbolo (todas las horas) para logs e informes."""
+        stats = self._rolling(symbol, None)
+        return {
+            "spread": stats.spread,
+            "volatility": math.sqrt(stats.variance) if stats.variance else None,
+            "latency": stats.latency,
+            "slippage": stats.slippage,
+            "ticks": stats.samples,
+            "deviation": self.deviation(symbol),
+        }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def router():
+    """OrderRouter compartido por el proceso."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = OrderRouter()
+        return _router
+
+
+def send(request):
+    """mt5.order_send a través del OrderRouter del proceso."""
+    return router().send(request)
+
+
+def tick(symbol):
+    """mt5.symbol_info_tick que además alimenta las estadísticas del router."""
+    return router()._fresh_tick(symbol)
+
+
+# =============================
+# CIERRES Y REVERSIONES
+# =============================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=config.execution["workers"], thread_name_prefix="order"
+            )
+        return _pool
+
+
+def netting(account=None):
+    """True en cuentas netting (una posición neta por símbolo)."""
+    account = mt5.account_info() if account is None else account
+    mode = getattr(account, "margin_mode", None)
+    return mode == mt5.ACCOUNT_MARGIN_MODE_RETAIL_NETTING
+
+
+def close_request(position, tick, comment="", magic=None):
+    """Orden contraria que cierra `position` al precio de `tick`."""
+    buy = position.type == mt5.POSITION_TYPE_BUY
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": position.symbol,
+        "volume": position.volume,
+        "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY,
+        "position": position.ticket,
+        "price": tick.bid if buy else tick.ask,
+        "magic": position.magic if magic is None else magic,
+        "comment": comment,
+    }
+
+
+def send_all(requests, order_send=None):
+    """order_send simultáneos; las respuestas en el orden de `requests`."""
+    order_send = order_send or send
+    if len(requests) <= 1:
+        return [order_send(request) for request in requests]
+    return list(_executor().map(order_send, requests))
+
+
+def flatten(positions, tick, order_send=None, **close):
+    """Cierra `positions` con un único tick y todas las órdenes a la vez."""
+    began = time.perf_counter()
+    requests = [close_request(pos, tick, **close) for pos in positions]
+    results = send_all(requests, order_send)
+    return Execution(list(zip(requests, results)), results, time.perf_counter() - began)
+
+
+def reverse(positions, tick, request, order_send=None, netting=False, **close):
+    """
+    Cierra `positions` y envía la apertura `request`, todo con `tick`:
+    - netting y todas las posiciones en contra: una sola orden por el
+      volumen cerrado más el nuevo;
+    - si no, cierres y apertura a la vez: un viaje en lugar de N.
+    `legs` sigue el orden de `positions` y termina con la apertura.
+    """
+    began = time.perf_counter()
+    closes = [close_request(pos, tick, **close) for pos in positions]
+    if netting and closes and all(c["type"] == request["type"] for c in closes):
+        volume = request["volume"] + sum(c["volume"] for c in closes)
+        result = (order_send or send)(dict(request, volume=round(volume, 8)))
+        legs = [(c, result) for c in closes] + [(request, result)]
+        return Execution(legs, [result], time.perf_counter() - began)
+    requests = closes + [request]
+    results = send_all(requests, order_send)
+    return Execution(list(zip(requests, results)), results, time.perf_counter() - began)
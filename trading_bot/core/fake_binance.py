@@ -0,0 +1,240 @@
+"""
+Sustituto local de Binance Futures para probar clientes y bots sin red.
+Sirve klines sintéticas, precio y órdenes (batch, consulta, cancelación),
+dispara STOP_MARKET/TAKE_PROFIT_MARKET con `set_price`, devuelve
+X-MBX-USED-WEIGHT-1M y permite inyectar respuestas 429/418/5xx y el cierre
+de las conexiones keep-alive ociosas.
+
+Uso:
+    with FakeBinance() as fake:
+        client = FuturesClient("key", "secret", base_url=fake.url)
+        fake.fail_next(429, count=2, retry_after=1)
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        params = parse_qs(urlsplit(self.path).query)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qs(self.rfile.read(length).decode()))
+        return {k: v[-1] for k, v in params.items()}
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-MBX-USED-WEIGHT-1M", str(self.server.fake.used_weight()))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        fake = self.server.fake
+        path = urlsplit(self.path).path
+        params = self._params()
+        fake.requests.append((method, path, params))
+        fake.connections.add(self.client_address)
+        fake.sockets.add(self.connection)
+
+        failure = fake.pop_failure()
+        if failure:
+            status, retry_after = failure
+            headers = {"Retry-After": retry_after} if retry_after is not None else {}
+            self._reply(status, {"code": -1003, "msg": "Fake failure"}, headers)
+            return
+
+        handler = fake.routes.get((method, path))
+        if handler is None:
+            self._reply(404, {"code": -1, "msg": f"No route {method} {path}"})
+            return
+        status, payload = handler(params)
+        self._reply(status, payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Conexiones cortadas por drop_idle o por el cliente: no es un error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeBinance:
+    def __init__(self, price=30000.0, interval_ms=300_000, weight_limit=2400):
+        self.price = price
+        self.interval_ms = interval_ms
+        self.weight_limit = weight_limit
+        self.requests = []
+        self.connections = set()
+        self.sockets = set()
+        self.orders = {}
+        self._failures = []
+        self._weight_log = []
+        self._lock = threading.Lock()
+        self._next_order_id = 1
+
+        self.routes = {
+            ("GET", "/fapi/v1/klines"): self._klines,
+            ("GET", "/fapi/v1/ticker/price"): self._ticker,
+            ("POST", "/fapi/v1/order"): self._create_order,
+            ("POST", "/fapi/v1/batchOrders"): self._batch_orders,
+            ("GET", "/fapi/v1/order"): self._get_order,
+            ("DELETE", "/fapi/v1/order"): self._cancel_order,
+        }
+
+        self.server = _Server(("127.0.0.1", 0), _Handler)
+        self.server.fake = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = None
+
+    # =============================
+    # CICLO DE VIDA
+    # =============================
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # =============================
+    # INYECCIÓN DE FALLOS Y PESO
+    # =============================
+    def fail_next(self, status, count=1, retry_after=None):
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def drop_idle(self):
+        """Cierra las conexiones abiertas, como el timeout de inactividad del servidor."""
+        for sock in list(self.sockets):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.sockets.clear()
+
+    def pop_failure(self):
+        with self._lock:
+            self._add_weight(1)
+            return self._failures.pop(0) if self._failures else None
+
+    def _add_weight(self, weight):
+        now = time.monotonic()
+        self._weight_log = [(t, w) for t, w in self._weight_log if now - t < 60]
+        self._weight_log.append((now, weight))
+
+    def used_weight(self):
+        with self._lock:
+            return sum(w for _, w in self._weight_log)
+
+    # =============================
+    # ENDPOINTS
+    # =============================
+    def _klines(self, params):
+        limit = int(params.get("limit", 500))
+        end = int(params.get("endTime", time.time() * 1000))
+        start = params.get("startTime")
+        first = (
+            int(start) // self.interval_ms * self.interval_ms
+            if start is not None
+            else (end // self.interval_ms - limit + 1) * self.interval_ms
+        )
+        klines = []
+        for i in range(limit):
+            t = first + i * self.interval_ms
+            if t > end:
+                break
+            p = self.price + (t // self.interval_ms % 50) - 25
+            klines.append(
+                [t, f"{p:.2f}", f"{p + 5:.2f}", f"{p - 5:.2f}", f"{p + 1:.2f}",
+                 "10.000", t + self.interval_ms - 1, f"{p * 10:.5f}", 100,
+                 "5.000", f"{p * 5:.5f}", "0"]
+            )
+        return 200, klines
+
+    def _ticker(self, params):
+        return 200, {"symbol": params.get("symbol", "BTCUSDT"), "price": f"{self.price:.2f}"}
+
+    def _new_order(self, params):
+        if params.get("type") in ("STOP_MARKET", "TAKE_PROFIT_MARKET") and "stopPrice" not in params:
+            return {"code": -1102, "msg": "Mandatory parameter 'stopPrice' was not sent."}
+        with self._lock:
+            order = dict(params, orderId=self._next_order_id, status="NEW")
+            self._next_order_id += 1
+            if order.get("type") == "MARKET":
+                order.update(status="FILLED", avgPrice=f"{self.price:.2f}")
+            self.orders[order["orderId"]] = order
+        return order
+
+    def _create_order(self, params):
+        order = self._new_order(params)
+        return (200 if "orderId" in order else 400), order
+
+    def _batch_orders(self, params):
+        batch = json.loads(params["batchOrders"])
+        if len(batch) > 5:
+            return 400, {"code": -1130, "msg": "Batch size too large"}
+        return 200, [self._new_order(o) for o in batch]
+
+    def _get_order(self, params):
+        order = self.orders.get(int(params["orderId"]))
+        if order is None:
+            return 400, {"code": -2013, "msg": "Order does not exist."}
+        return 200, order
+
+    def _cancel_order(self, params):
+        with self._lock:
+            order = self.orders.get(int(params["orderId"]))
+            if order is None or order["status"] != "NEW":
+                return 400, {"code": -2011, "msg": "Unknown order sent."}
+            order["status"] = "CANCELED"
+        return 200, order
+
+    # =============================
+    # MERCADO
+    # =============================
+    def set_price(self, price):
+        """Mueve el precio y dispara las órdenes stop/take profit alcanzadas."""
+        with self._lock:
+            self.price = price
+            for order in self.orders.values():
+                if order["status"] != "NEW":
+                    continue
+                stop = float(order["stopPrice"])
+                rising = (order["type"] == "TAKE_PROFIT_MARKET") == (order["side"] == "SELL")
+                if (rising and price >= stop) or (not rising and price <= stop):
+                    order.update(status="FILLED", avgPrice=f"{price:.2f}")
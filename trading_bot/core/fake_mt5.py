@@ -0,0 +1,387 @@
+"""
+Sustituto en memoria del paquete MetaTrader5 para benchmarks, replay y
+pruebas sin terminal. Expone las constantes y funciones que usan los bots
+y se instala en sys.modules antes de importarlos:
+
+    fake = FakeMT5()
+    fake.set_rates("XAUUSD", fake.TIMEFRAME_H1, rates)
+    fake.install()
+    import gold_cross_bot
+"""
+
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from core.bar_cache import RATES_DTYPE
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple(
+    "TradePosition",
+    "ticket time type magic volume price_open sl tp price_current swap profit symbol comment",
+)
+OrderSendResult = namedtuple(
+    "OrderSendResult", "retcode deal order volume price bid ask comment request_id"
+)
+SymbolInfo = namedtuple(
+    "SymbolInfo", "name spread point digits trade_mode filling_mode volume_min volume_step"
+)
+AccountInfo = namedtuple(
+    "AccountInfo", "login balance equity margin_free currency margin_mode"
+)
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed ping_last")
+
+
+class FakeMT5:
+    # Timeframes
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+
+    # Órdenes y posiciones
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    POSITION_TYPE_BUY = 0
+    POSITION_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_SLTP = 6
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+    SYMBOL_FILLING_FOK = 1
+    SYMBOL_FILLING_IOC = 2
+    SYMBOL_TRADE_MODE_FULL = 4
+    ACCOUNT_MARGIN_MODE_RETAIL_NETTING = 0
+    ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+
+    # Retcodes
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID_FILL = 10030
+    TRADE_RETCODE_PRICE_CHANGED = 10020
+    TRADE_RETCODE_PRICE_OFF = 10021
+    TRADE_RETCODE_CONNECTION = 10031
+
+    TIMEFRAME_SECONDS = {1: 60, 5: 300, 15: 900, 30: 1800, 16385: 3600, 16388: 14400, 16408: 86400}
+
+    def __init__(
+        self, spread=0.2, point=0.01, login=1, balance=10000.0, netting=False, latency=0.0
+    ):
+        """
+        - netting: una posición neta por símbolo (las órdenes sin `position`
+          suman, reducen o invierten la existente); si no, hedging.
+        - latency: segundos reales de ida y vuelta de cada order_send.
+        """
+        self.spread = spread
+        self.netting = netting
+        self.latency = latency
+        self._lock = threading.RLock()  # order_send desde varios hilos
+        self.point = point
+        self.login = login
+        self.balance = balance
+        self.rates = {}  # (symbol, timeframe) -> array RATES_DTYPE
+        self._times = {}  # (symbol, timeframe) -> columna time contigua
+        self._finest_tf = {}  # symbol -> timeframe más fino
+        self.now = None  # epoch simulado; None = último dato disponible
+        self.positions = {}
+        self.requests = []
+        self.connected = False
+        self._next_ticket = 1
+        # Fallos inyectados: cortes [(inicio, fin)] en tiempo simulado e
+        # initialize que fallan tras drop()
+        self.outages = []
+        self.init_failures = 0
+        self.recoveries = []  # segundos simulados desde cada corte hasta reconectar
+        self._dropped_at = None
+
+    # =============================
+    # INSTALACIÓN Y DATOS
+    # =============================
+    def install(self):
+        sys.modules["MetaTrader5"] = self
+        return self
+
+    def set_rates(self, symbol, timeframe, rates):
+        rates = np.asarray(rates).astype(RATES_DTYPE, copy=False)
+        self.rates[(symbol, timeframe)] = rates
+        # searchsorted sobre rates["time"] (vista con saltos) copiaría la columna
+        self._times[(symbol, timeframe)] = np.ascontiguousarray(rates["time"])
+        frames = [tf for sym, tf in self.rates if sym == symbol]
+        self._finest_tf[symbol] = min(frames, key=lambda tf: self.TIMEFRAME_SECONDS.get(tf, tf))
+
+    def _visible(self, symbol, timeframe):
+        rates = self.rates.get((symbol, timeframe))
+        if rates is None:
+            return None
+        if self.now is None:
+            return rates
+        times = self._times[(symbol, timeframe)]
+        # Clave entera: con float searchsorted convertiría toda la columna
+        return rates[: np.searchsorted(times, int(self.now), side="right")]
+
+    def _last_close(self, symbol):
+        if symbol not in self._finest_tf:
+            return None, None
+        rates = self._visible(symbol, self._finest_tf[symbol])
+        if not len(rates):
+            return None, None
+        return float(rates["close"][-1]), int(rates["time"][-1])
+
+    # =============================
+    # CONEXIÓN
+    # =============================
+    def initialize(self, *args, **kwargs):
+        if self.init_failures > 0:
+            self.init_failures -= 1
+            return False
+        if self._in_outage():
+            return False
+        if self._dropped_at is not None and self.now is not None:
+            self.recoveries.append(self.now - self._dropped_at)
+        self._dropped_at = None
+        self.connected = True
+        return True
+
+    def shutdown(self):
+        self.connected = False
+
+    def last_error(self):
+        return (1, "Success") if self.connected else (-10004, "No IPC connection")
+
+    def terminal_info(self):
+        if not self.connected:
+            return None
+        return TerminalInfo(True, True, 1000)
+
+    def account_info(self):
+        if not self.connected:
+            return None
+        equity = self.balance + sum(p.profit for p in self.positions_get() or ())
+        mode = (
+            self.ACCOUNT_MARGIN_MODE_RETAIL_NETTING
+            if self.netting
+            else self.ACCOUNT_MARGIN_MODE_RETAIL_HEDGING
+        )
+        return AccountInfo(self.login, self.balance, equity, equity, "USD", mode)
+
+    def symbol_info(self, symbol):
+        if not self.connected:
+            return None
+        return SymbolInfo(symbol, int(self.spread / self.point), self.point, 2, 4, 3, 0.01, 0.01)
+
+    # =============================
+    # FALLOS
+    # =============================
+    def drop(self, failures=0):
+        """Corta el terminal; los próximos `failures` initialize fallan."""
+        self.connected = False
+        self.init_failures = failures
+        self._dropped_at = self.now
+
+    def add_outage(self, start, end):
+        """Corte entre los epoch simulados `start` y `end` (lo aplica advance)."""
+        self.outages.append((start, end))
+
+    def _in_outage(self):
+        now = self.now
+        return now is not None and any(start <= now < end for start, end in self.outages)
+
+    # =============================
+    # MERCADO
+    # =============================
+    def symbol_info_tick(self, symbol):
+        if not self.connected:
+            return None
+        price, t = self._last_close(symbol)
+        if price is None:
+            return None
+        t = self.now if self.now is not None else t
+        bid = price
+        ask = price + self.spread
+        return Tick(int(t), bid, ask, bid, 1, int(t) * 1000, 6, 1.0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if not self.connected:
+            return None
+        rates = self._visible(symbol, timeframe)
+        if rates is None:
+            return None
+        end = len(rates) - start_pos
+        return rates[max(0, end - count) : end].copy()
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        if not self.connected:
+            return None
+        rates = self._visible(symbol, timeframe)
+        if rates is None:
+            return None
+        times = self._times[(symbol, timeframe)][: len(rates)]
+        lo = np.searchsorted(times, _epoch(date_from), side="left")
+        hi = np.searchsorted(times, _epoch(date_to), side="right")
+        return rates[lo:hi].copy()
+
+    # =============================
+    # TRADING
+    # =============================
+    def positions_get(self, symbol=None, ticket=None):
+        if not self.connected:
+            return None
+        out = []
+        for pos in self.positions.values():
+            if symbol is not None and pos.symbol != symbol:
+                continue
+            if ticket is not None and pos.ticket != ticket:
+                continue
+            tick = self.symbol_info_tick(pos.symbol)
+            current = tick.bid if pos.type == 0 else tick.ask
+            sign = 1 if pos.type == 0 else -1
+            profit = (current - pos.price_open) * sign * pos.volume * 100
+            out.append(pos._replace(price_current=current, profit=profit))
+        return tuple(out)
+
+    def _result(self, retcode, request, order=0, price=0.0, comment=""):
+        return OrderSendResult(retcode, order, order, request.get("volume", 0.0), price, 0.0, 0.0, comment, 0)
+
+    def order_send(self, request):
+        if not self.connected:
+            return None
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return self._execute(request)
+
+    def _execute(self, request):
+        self.requests.append(dict(request))
+        action = request["action"]
+        symbol = request["symbol"]
+
+        if action == self.TRADE_ACTION_SLTP:
+            pos = self.positions.get(request["position"])
+            if pos is None:
+                return self._result(10013, request, comment="Invalid request")
+            self.positions[pos.ticket] = pos._replace(sl=request.get("sl", pos.sl), tp=request.get("tp", pos.tp))
+            return self._result(self.TRADE_RETCODE_DONE, request, pos.ticket)
+
+        tick = self.symbol_info_tick(symbol)
+        price = tick.ask if request["type"] == self.ORDER_TYPE_BUY else tick.bid
+        # El precio se movió más que la deviation pedida desde el de la orden
+        requested = request.get("price")
+        if requested and abs(price - requested) > request.get("deviation", 0) * self.point + 1e-9:
+            return OrderSendResult(self.TRADE_RETCODE_REQUOTE, 0, 0, 0.0, 0.0, tick.bid, tick.ask, "Requote", 0)
+
+        # Cierre de una posición existente
+        if request.get("position"):
+            pos = self.positions.get(request["position"])
+            if pos is None:
+                return self._result(10013, request, comment="Position not found")
+            self._settle(pos, price)
+            return self._result(self.TRADE_RETCODE_DONE, request, pos.ticket, price)
+
+        # Netting: la orden se compensa con la posición neta del símbolo
+        if self.netting:
+            net = next((p for p in self.positions.values() if p.symbol == symbol), None)
+            if net is not None and net.type == request["type"]:
+                volume = net.volume + request["volume"]
+                price_open = (net.price_open * net.volume + price * request["volume"]) / volume
+                self.positions[net.ticket] = net._replace(volume=round(volume, 8), price_open=price_open)
+                return self._result(self.TRADE_RETCODE_DONE, request, net.ticket, price)
+            if net is not None:
+                closed = min(net.volume, request["volume"])
+                self._settle(net, price, closed)
+                remaining = round(request["volume"] - closed, 8)
+                if remaining <= 0:
+                    return self._result(self.TRADE_RETCODE_DONE, request, net.ticket, price)
+                request = dict(request, volume=remaining)
+
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self.positions[ticket] = TradePosition(
+            ticket,
+            int(tick.time),
+            request["type"],
+            request.get("magic", 0),
+            request["volume"],
+            price,
+            request.get("sl", 0.0),
+            request.get("tp", 0.0),
+            price,
+            0.0,
+            0.0,
+            symbol,
+            request.get("comment", ""),
+        )
+        return self._result(self.TRADE_RETCODE_DONE, request, ticket, price)
+
+    def _settle(self, pos, price, volume=None):
+        volume = pos.volume if volume is None else volume
+        if volume < pos.volume:
+            self.positions[pos.ticket] = pos._replace(volume=round(pos.volume - volume, 8))
+        else:
+            del self.positions[pos.ticket]
+        sign = 1 if pos.type == 0 else -1
+        self.balance += (price - pos.price_open) * sign * volume * 100
+
+    # =============================
+    # TIEMPO SIMULADO
+    # =============================
+    def advance(self, now):
+        """
+        Mueve el instante simulado a `now` y, como haría el broker, cierra
+        las posiciones cuyo SL o TP tocaron las velas del timeframe más
+        fino desde el instante anterior (SL primero si ambos en la misma).
+        Dentro de un corte programado (add_outage) desconecta el terminal;
+        el broker sigue ejecutando SL/TP.
+        """
+        previous, self.now = self.now, now
+        if self.connected and self._in_outage():
+            self.drop()
+        if previous is None:
+            return
+        for pos in list(self.positions.values()):
+            key = (pos.symbol, self._finest_tf.get(pos.symbol))
+            if key not in self.rates:
+                continue
+            rates, times = self.rates[key], self._times[key]
+            lo = np.searchsorted(times, int(previous), side="right")
+            hi = np.searchsorted(times, int(now), side="right")
+            if lo >= hi:
+                continue
+            high, low = rates["high"][lo:hi], rates["low"][lo:hi]
+            buy = pos.type == self.POSITION_TYPE_BUY
+            no_hit = np.zeros(hi - lo, dtype=bool)
+            sl_hit = ((low <= pos.sl) if buy else (high >= pos.sl)) if pos.sl else no_hit
+            tp_hit = ((high >= pos.tp) if buy else (low <= pos.tp)) if pos.tp else no_hit
+            hits = np.flatnonzero(sl_hit | tp_hit)
+            if len(hits):
+                first = hits[0]
+                self._settle(pos, pos.sl if sl_hit[first] else pos.tp)
+
+
+def _epoch(value):
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp())
+    return int(value)
+
+
+def synthetic_rates(n, start=1_700_000_000, step=3600, price=2000.0, vol=0.002, seed=7):
+    """Paseo aleatorio geométrico con velas OHLC coherentes."""
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    opens = np.concatenate([[price], closes[:-1]])
+    wick = np.abs(rng.normal(0, vol / 2, (2, n))) * closes
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates["time"] = start + np.arange(n) * step
+    rates["open"] = opens
+    rates["close"] = closes
+    rates["high"] = np.maximum(opens, closes) + wick[0]
+    rates["low"] = np.minimum(opens, closes) - wick[1]
+    rates["tick_volume"] = rng.integers(100, 5000, n)
+    rates["spread"] = 20
+    return rates
@@ -0,0 +1,260 @@
+"""
+Descarga masiva de histórico al BarStore.
+
+Los bots piden unos cientos de velas con copy_rates_from_pos; para llenar
+el histórico de replay, backtest y walk-forward hacen falta años. Aquí:
+- cada serie (fuente, símbolo, timeframe) se parte en tramos de fechas
+  (`copy_rates_range` en MT5, `futures_klines` con startTime en Binance);
+- los tramos de todas las series se piden a la vez por un pool acotado,
+  intercalando series para que avancen juntas; el ritmo lo marcan el
+  WeightLimiter de Binance y el lock de la API de MT5;
+- se retoma desde la última vela guardada (y se completa hacia atrás si
+  `since` es anterior a la primera); los solapes se deduplican al fusionar;
+- sólo se escribe el prefijo contiguo de tramos descargados: si se corta a
+  mitad, la siguiente ejecución retoma sin dejar huecos;
+- al terminar se valida lo descargado (core/bar_quality.py): huecos con
+  el mercado abierto, duplicados, rangos inválidos y retornos atípicos.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+
+import cfg.config as config
+import core.bar_quality as bar_quality
+import core.clock as clock
+from core.bar_cache import RATES_DTYPE
+from core.bar_store import TIMEFRAME_SECONDS
+from core.kline_decoder import KlineDecoder
+from core.market_hours import calendar_for
+
+logger = logging.getLogger(__name__)
+
+Report = namedtuple(
+    "Report", "source symbol timeframe added first last chunks failed issues seconds"
+)
+
+BINANCE_INTERVALS = {
+    "M1": "1m",
+    "M5": "5m",
+    "M15": "15m",
+    "M30": "30m",
+    "H1": "1h",
+    "H4": "4h",
+    "D1": "1d",
+}
+
+
+# =============================
+# FUENTES
+# =============================
+class Mt5Source:
+    """copy_rates_range del terminal; la API de MT5 no admite llamadas simultáneas."""
+
+    name = "mt5"
+
+    def __init__(self, chunk_bars=None):
+        # Import diferido: descargar de Binance no necesita el terminal
+        import MetaTrader5 as mt5
+
+        self.mt5 = mt5
+        self.chunk_bars = chunk_bars or config.history["mt5_chunk_bars"]
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, timeframe, start, end):
+        """Velas con `start <= time < end` o None si el terminal falla."""
+        timeframe = getattr(self.mt5, f"TIMEFRAME_{timeframe}")
+        date_from = datetime.fromtimestamp(start, tz=timezone.utc)
+        date_to = datetime.fromtimestamp(end - 1, tz=timezone.utc)
+        with self._lock:
+            rates = self.mt5.copy_rates_range(symbol, timeframe, date_from, date_to)
+        if rates is None:
+            logger.warning(f"mt5 {symbol}: copy_rates_range {self.mt5.last_error()}")
+            return None
+        return np.asarray(rates).astype(RATES_DTYPE, copy=False)
+
+
+class BinanceSource:
+    """
+    futures_klines paginado por startTime. tick_volume es el número de
+    operaciones y real_volume el volumen en la divisa de cotización.
+    """
+
+    name = "binance"
+
+    def __init__(self, client, chunk_bars=None):
+        self.client = client
+        self.chunk_bars = chunk_bars or config.history["binance_chunk_bars"]
+
+    def fetch(self, symbol, timeframe, start, end):
+        klines = self.client.futures_klines(
+            symbol=symbol,
+            interval=BINANCE_INTERVALS[timeframe],
+            limit=self.chunk_bars,
+            startTime=int(start) * 1000,
+            endTime=int(end) * 1000 - 1,
+        )
+        # Un decodificador por llamada: sus buffers no se comparten entre hilos
+        columns = KlineDecoder(max(1, len(klines))).decode(klines)
+        rates = np.zeros(len(klines), dtype=RATES_DTYPE)
+        rates["time"] = columns["time"] // 1000
+        for name in ("open", "high", "low", "close"):
+            rates[name] = columns[name]
+        rates["tick_volume"] = columns["num_trades"]
+        rates["real_volume"] = np.rint(columns["qav"])
+        return rates
+
+
+# =============================
+# DESCARGA
+# =============================
+class _Series:
+    def __init__(self, source, symbol, timeframe, chunks):
+        self.source = source
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.chunks = chunks  # [(inicio, fin)] en el orden de escritura
+        self.done = {}  # índice de tramo -> velas (None si falló)
+        self.next = 0  # primer tramo aún no escrito
+        self.pending = []
+        self.pending_bars = 0
+        self.added = 0
+        self.failed = False
+        self.began = time.perf_counter()
+
+
+class HistoryDownloader:
+    def __init__(self, store, workers=None, flush_bars=None, retries=None):
+        cfg = config.history
+        self.store = store
+        self.workers = workers or cfg["workers"]
+        self.flush_bars = flush_bars or cfg["flush_bars"]
+        self.retries = cfg["retries"] if retries is None else retries
+        self.retry_sleep = cfg["retry_sleep"]
+
+    def plan(self, source, symbol, timeframe, since, until):
+        """Tramos [inicio, fin) que faltan en el BarStore entre `since` y `until`."""
+        step = TIMEFRAME_SECONDS[timeframe]
+        width = source.chunk_bars * step
+        span = self.store.span(symbol, timeframe)
+        if span is None:
+            return self._chunks(since, until, step, width)
+        # Hacia atrás de más reciente a más antiguo: lo escrito sigue pegado
+        # a lo guardado aunque la descarga se corte
+        backfill = self._chunks(since, span[0] - step, step, width)[::-1]
+        # La última vela guardada pudo quedar a medio formar: se repite
+        return backfill + self._chunks(max(since, span[1]), until, step, width)
+
+    @staticmethod
+    def _chunks(start, end, step, width):
+        return [
+            (lo, min(lo + width, int(end) + 1))
+            for lo in range(int(start) // step * step, int(end) + 1, width)
+        ]
+
+    def _fetch(self, series, lo, hi):
+        for attempt in range(self.retries + 1):
+            if series.failed:
+                return None
+            try:
+                rates = series.source.fetch(series.symbol, series.timeframe, lo, hi)
+            except Exception as e:
+                logger.warning(f"{series.source.name} {series.symbol}: {e}")
+                rates = None
+            if rates is not None:
+                return rates[(rates["time"] >= lo) & (rates["time"] < hi)]
+            if attempt < self.retries:
+                time.sleep(self.retry_sleep * 2**attempt)
+        return None
+
+    def _flush(self, series):
+        """Escribe el prefijo contiguo de tramos descargados."""
+        while series.next in series.done and not series.failed:
+            rates = series.done.pop(series.next)
+            if rates is None:
+                series.failed = True
+                lo, _ = series.chunks[series.next]
+                logger.error(
+                    f"{series.source.name} {series.symbol} {series.timeframe}: "
+                    f"tramo desde {_date(lo)} sin datos tras {self.retries} "
+                    f"reintentos; se retomará desde ahí"
+                )
+                break
+            series.next += 1
+            series.pending.append(rates)
+            series.pending_bars += len(rates)
+        finished = series.next == len(series.chunks) or series.failed
+        if series.pending and (series.pending_bars >= self.flush_bars or finished):
+            series.added += self.store.write(
+                series.symbol, series.timeframe, np.concatenate(series.pending)
+            )
+            series.pending, series.pending_bars = [], 0
+
+    def download(self, jobs, since, until=None):
+        """
+        `jobs`: [(fuente, símbolo, timeframe)]. Descarga lo que falta entre
+        `since` y `until` (epoch; ahora por defecto) y devuelve un Report
+        por serie.
+        """
+        until = clock.time() if until is None else until
+        series = [
+            _Series(source, symbol, tf, self.plan(source, symbol, tf, since, until))
+            for source, symbol, tf in jobs
+        ]
+        # Intercalar: el tramo i de cada serie antes que el i+1 de ninguna
+        order = sorted(
+            ((i, s) for s in series for i in range(len(s.chunks))),
+            key=lambda item: item[0],
+        )
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="history") as pool:
+            futures = {
+                pool.submit(self._fetch, s, *s.chunks[i]): (s, i) for i, s in order
+            }
+            for future in as_completed(futures):
+                s, i = futures[future]
+                s.done[i] = future.result()
+                self._flush(s)
+        for s in series:
+            self._flush(s)
+        return [self._report(s) for s in series]
+
+    def _report(self, series):
+        span = self.store.span(series.symbol, series.timeframe)
+        issues = {}
+        if series.chunks and span is not None:
+            lo = min(start for start, _ in series.chunks)
+            rates = self.store.load(series.symbol, series.timeframe, start=lo)
+            found = bar_quality.check(
+                rates,
+                series.timeframe,
+                calendar_for(series.symbol),
+                bar_quality.robust_scale(rates, series.timeframe),
+                config.bar_quality["outlier_sigma"],
+            )
+            issues = bar_quality.counts(found)
+            for i, lost in zip(found.gaps[:5], found.missing[:5]):
+                logger.warning(
+                    f"{series.symbol} {series.timeframe}: {lost} velas ausentes "
+                    f"antes de {_date(rates['time'][i])} con el mercado abierto"
+                )
+        return Report(
+            series.source.name,
+            series.symbol,
+            series.timeframe,
+            series.added,
+            span[0] if span else None,
+            span[1] if span else None,
+            len(series.chunks),
+            series.failed,
+            issues,
+            time.perf_counter() - series.began,
+        )
+
+
+def _date(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
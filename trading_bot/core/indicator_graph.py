@@ -0,0 +1,73 @@
+"""
+Registro de indicadores compartido entre estrategias.
+
+Cada indicador se identifica por (símbolo, timeframe, tipo, parámetros):
+si diez estrategias piden EMA(9) de XAUUSD H1 existe un solo nodo, que se
+actualiza una vez por vela. Los tipos derivados declaran sus dependencias
+(p. ej. "cross" depende de dos EMAs), que se crean antes que el nodo, así
+que el orden de inserción de cada serie ya es un orden topológico.
+"""
+
+from core.indicators import ATR, EMA, RSI, Cross
+
+# tipo -> (constructor, dependencias(*params) -> [(tipo, params)])
+KINDS = {}
+
+
+def register_kind(kind, factory, deps=None):
+    """
+    Añade un tipo de indicador. `factory(*dep_nodes, *params)` debe devolver
+    un objeto con `update_bar(bar)` y `reset()`.
+    """
+    KINDS[kind] = (factory, deps)
+
+
+register_kind("ema", EMA)
+register_kind("atr", ATR)
+register_kind("rsi", RSI)
+register_kind(
+    "cross",
+    lambda fast, slow, _fast_span, _slow_span: Cross(fast, slow),
+    deps=lambda fast_span, slow_span: [("ema", (fast_span,)), ("ema", (slow_span,))],
+)
+
+
+class IndicatorGraph:
+    def __init__(self):
+        self.nodes = {}  # (symbol, timeframe, kind, params) -> indicador
+        self.series = {}  # (symbol, timeframe) -> nodos en orden topológico
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add(self, symbol, timeframe, kind, *params):
+        """Devuelve el nodo (compartido) del indicador; lo crea si no existe."""
+        key = (symbol, timeframe, kind, params)
+        node = self.nodes.get(key)
+        if node is not None:
+            return node
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de indicador desconocido: {kind}")
+        factory, deps = KINDS[kind]
+        inputs = [
+            self.add(symbol, timeframe, dep_kind, *dep_params)
+            for dep_kind, dep_params in (deps(*params) if deps else ())
+        ]
+        node = factory(*inputs, *params)
+        self.nodes[key] = node
+        self.series.setdefault((symbol, timeframe), []).append(node)
+        return node
+
+    def update(self, symbol, timeframe, bar):
+        """Evalúa cada nodo de la serie una vez, dependencias primero."""
+        for node in self.series.get((symbol, timeframe), ()):
+            node.update_bar(bar)
+
+    def seed(self, symbol, timeframe, rates):
+        """Reinicia los nodos de la serie y procesa un histórico de velas cerradas."""
+        nodes = self.series.get((symbol, timeframe), ())
+        for node in nodes:
+            node.reset()
+        for bar in rates:
+            for node in nodes:
+                node.update_bar(bar)
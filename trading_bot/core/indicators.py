@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+RSI_METHODS = ("wilder", "sma")
+
+
+def _rsi_value(avg_gain, avg_loss):
+    # Sin pérdidas: 100; sin movimiento en absoluto: 50. El umbral absorbe
+    # el residuo de coma flotante de las sumas móviles
+    if avg_loss < 1e-12:
+        return 50.0 if avg_gain < 1e-12 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class RSI:
+    """
+    RSI incremental con actualización O(1) por vela cerrada.
+    - "wilder": medias de Wilder (RMA, alpha = 1/period) sembradas con la
+      media simple de los primeros `period` cambios, como MT5/TradingView.
+    - "sma": medias simples de los últimos `period` cambios.
+    `value` es None hasta tener `period` cambios.
+    """
+
+    def __init__(self, period=14, method="wilder"):
+        if method not in RSI_METHODS:
+            raise ValueError(f"Método de RSI desconocido: {method}")
+        self.period = period
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.samples = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        # Anillo de cambios para la variante SMA (y para sembrar Wilder)
+        self._gains = np.zeros(self.period)
+        self._losses = np.zeros(self.period)
+        self._pos = 0
+        self._sum_gain = 0.0
+        self._sum_loss = 0.0
+        self.value = None
+
+    def _averages(self, change):
+        """Medias tras añadir `change`, sin modificar el estado."""
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        n = self.samples + 1
+        if self.method == "wilder" and n > self.period:
+            k = self.period
+            return (self.avg_gain * (k - 1) + gain) / k, (
+                self.avg_loss * (k - 1) + loss
+            ) / k
+        # SMA (o siembra de Wilder): suma móvil sobre el anillo
+        sum_gain = (
+            self._sum_gain + gain - (self._gains[self._pos] if n > self.period else 0.0)
+        )
+        sum_loss = (
+            self._sum_loss
+            + loss
+            - (self._losses[self._pos] if n > self.period else 0.0)
+        )
+        count = min(n, self.period)
+        return sum_gain / count, sum_loss / count
+
+    def update(self, close):
+        """Añade el cierre de una vela cerrada y devuelve el RSI (o None)."""
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+        change = close - self.prev_close
+        self.avg_gain, self.avg_loss = self._averages(change)
+
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self._sum_gain += gain - self._gains[self._pos]
+        self._sum_loss += loss - self._losses[self._pos]
+        self._gains[self._pos] = gain
+        self._losses[self._pos] = loss
+        self._pos = (self._pos + 1) % self.period
+
+        self.samples += 1
+        self.prev_close = close
+        if self.samples >= self.period:
+            self.value = _rsi_value(self.avg_gain, self.avg_loss)
+        return self.value
+
+    def peek(self, close):
+        """RSI si la vela en formación cerrase a `close` (no modifica el estado)."""
+        if self.prev_close is None or self.samples + 1 < self.period:
+            return None
+        return _rsi_value(*self._averages(close - self.prev_close))
+
+    def seed(self, closes):
+        """Reinicia y procesa un histórico de cierres."""
+        self.reset()
+        for close in np.asarray(closes, dtype=np.float64).tolist():
+            self.update(close)
+        return self.value
+
+    def update_bar(self, bar):
+        return self.update(float(bar["close"]))
+
+
+class EMA:
+    """
+    EMA incremental equivalente a `Series.ewm(span=span).mean()` (adjust=True,
+    como en los bots): numerador y denominador ponderados, O(1) por vela.
+    """
+
+    def __init__(self, span):
+        self.span = span
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.reset()
+
+    def reset(self):
+        self._num = 0.0
+        self._den = 0.0
+        self.prev = None
+        self.value = None
+
+    def update(self, close):
+        self._num = close + self.decay * self._num
+        self._den = 1.0 + self.decay * self._den
+        self.prev = self.value
+        self.value = self._num / self._den
+        return self.value
+
+    def update_bar(self, bar):
+        return self.update(float(bar["close"]))
+
+    def peek(self, close):
+        """EMA si la vela en formación cerrase a `close`."""
+        return (close + self.decay * self._num) / (1.0 + self.decay * self._den)
+
+
+class ATR:
+    """ATR incremental como `calc_atr` de los bots: media simple del true range."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self._ranges = [0.0] * self.period
+        self._pos = 0
+        self._sum = 0.0
+        self.samples = 0
+        self.prev_close = None
+        self.value = None
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self._sum += tr - self._ranges[self._pos]
+        self._ranges[self._pos] = tr
+        self._pos = (self._pos + 1) % self.period
+        self.samples += 1
+        if self.samples >= self.period:
+            # Recalcular la suma de vez en cuando evita que derive el residuo
+            if self._pos == 0:
+                self._sum = sum(self._ranges)
+            self.value = self._sum / self.period
+        return self.value
+
+    def update_bar(self, bar):
+        return self.update(float(bar["high"]), float(bar["low"]), float(bar["close"]))
+
+
+class Cross:
+    """
+    Último cruce entre dos EMAs (ya actualizadas con la vela) y velas
+    transcurridas: 1 si el cruce se produjo en la última vela.
+    """
+
+    def __init__(self, fast, slow):
+        self.fast = fast
+        self.slow = slow
+        self.reset()
+
+    def reset(self):
+        self.direction = None  # "buy" (rápida cruza hacia arriba) o "sell"
+        self.bars_since = None
+
+    def update_bar(self, bar):
+        if self.bars_since is not None:
+            self.bars_since += 1
+        fast, slow = self.fast, self.slow
+        if fast.prev is None:
+            return
+        if fast.prev <= slow.prev and fast.value > slow.value:
+            self.direction, self.bars_since = "buy", 1
+        elif fast.prev >= slow.prev and fast.value < slow.value:
+            self.direction, self.bars_since = "sell", 1
+
+
+def rsi(close, period=14, method="wilder"):
+    """RSI vectorizado para backtests; mismo resultado que `RSI.update` vela a vela."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+
+    if method == "sma":
+        avg_gain = pd.Series(gains).rolling(period).mean().to_numpy()[period - 1 :]
+        avg_loss = pd.Series(losses).rolling(period).mean().to_numpy()[period - 1 :]
+    elif method == "wilder":
+        # Primer valor = media simple; después RMA (ewm con alpha = 1/period)
+        def rma(values):
+            seeded = np.r_[values[:period].mean(), values[period:]]
+            return (
+                pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+            )
+
+        avg_gain = rma(gains)
+        avg_loss = rma(losses)
+    else:
+        raise ValueError(f"Método de RSI desconocido: {method}")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where(avg_loss < 1e-12, np.where(avg_gain < 1e-12, 50.0, 100.0), values)
+    out[period:] = values
+    return out
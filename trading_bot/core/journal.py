@@ -0,0 +1,421 @@
+"""
+Diario de operaciones: aperturas, cierres, cambios de SL/TP y rechazos.
+
+El bucle de trading sólo añade un dict a una lista en memoria; un hilo en
+segundo plano escribe los registros por tandas en un JSONL append-only
+(`<dir>/<nombre>.jsonl`) y decide cuándo hacer fsync, así que ni la
+escritura ni el fsync bloquean el envío de órdenes. Cuando el JSONL supera
+`compact_bytes` se compacta en un fichero columnar (Parquet si está
+pyarrow, si no .npz) y se vacía.
+
+    journal = TradeJournal("gold_fibonacci_bot")
+    result = mt5.order_send(request)
+    journal.order(request, result, "FibonacciBot")
+
+`load_journal` + `trades` devuelven las operaciones cerradas como
+backtest.TRADE_DTYPE, de modo que `backtest.summary`, `monte_carlo` y
+`optimize.py --live` comparan lo real con lo simulado.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import cfg.config as config
+import core.clock as clock
+from core.backtest import EXIT_CLOSE, EXIT_SL, EXIT_TP, TRADE_DTYPE
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "time",  # epoch del registro
+    "source",  # bot o estrategia
+    "symbol",
+    "event",  # open, close, modify, reject
+    "ticket",
+    "direction",  # de la posición: buy / sell
+    "volume",
+    "price",  # ejecutado (o último conocido en cierres del broker)
+    "requested",  # precio pedido: price - requested = deslizamiento
+    "sl",
+    "tp",
+    "profit",  # beneficio en divisa de la cuenta si se conoce
+    "reason",
+    "retcode",
+    "deal",
+    "magic",
+)
+
+# Constantes fijas del API de MT5; el diario no importa MetaTrader5 para
+# poder cargarse desde el backtest en cualquier sistema.
+_ORDER_TYPE_BUY = 0
+_ACTION_SLTP = 6
+_RETCODE_DONE = 10009
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_journals = []  # abiertos en el proceso, para close_all()
+
+
+class TradeJournal:
+    """
+    - flush_interval: segundos máximos que un registro espera en memoria.
+    - batch_size: registros pendientes que adelantan la escritura.
+    - fsync: "always" (tras cada tanda), "interval" (como mucho cada
+      `fsync_interval` segundos) o "never" (lo decide el sistema).
+    - compact_bytes: tamaño del JSONL que dispara la compactación.
+    """
+
+    def __init__(
+        self,
+        name,
+        directory="trading_bot/data/journal",
+        flush_interval=1.0,
+        batch_size=256,
+        fsync="interval",
+        fsync_interval=5.0,
+        compact_bytes=8 * 2**20,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync desconocida: {fsync}")
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+
+        self._pending = []
+        self._lock = threading.Lock()  # tanda en memoria
+        self._io = threading.Lock()  # fichero: hilo, close() y compact()
+        self._wake = threading.Event()
+        self._closed = False
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._file = open(self.path, "ab")
+        self._seen = {}  # source -> {ticket: posición} para sync()
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"journal-{name}", daemon=True
+        )
+        self._thread.start()
+        _journals.append(self)
+        atexit.register(self.close)
+
+    # =============================
+    # REGISTRO (bucle de trading)
+    # =============================
+    def record(self, event, source, symbol, **fields):
+        """Añade un registro a la tanda en memoria; no hace E/S."""
+        row = {"time": clock.time(), "source": source, "symbol": symbol}
+        row["event"] = event
+        row.update(fields)
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def order(self, request, result, source, reason=""):
+        """Registra un order_send de MT5 (apertura, cierre o SL/TP)."""
+        ticket = request.get("position") or 0
+        if request["action"] == _ACTION_SLTP:
+            event, direction = "modify", None
+        else:
+            buy = request["type"] == _ORDER_TYPE_BUY
+            event = "close" if ticket else "open"
+            # Un cierre es una orden contraria a la posición
+            direction = "buy" if buy != bool(ticket) else "sell"
+
+        fields = {
+            "ticket": ticket,
+            "direction": direction,
+            "volume": request.get("volume"),
+            "requested": request.get("price"),
+            "sl": request.get("sl"),
+            "tp": request.get("tp"),
+            "reason": reason or request.get("comment", ""),
+            "magic": request.get("magic"),
+        }
+        if result is None or result.retcode != _RETCODE_DONE:
+            fields["retcode"] = None if result is None else result.retcode
+            self.record("reject", source, request["symbol"], **fields)
+            return
+        fields["ticket"] = ticket or result.order
+        if ticket:
+            self._seen.get(source, {}).pop(ticket, None)
+        fields["price"] = result.price or request.get("price")
+        fields["retcode"] = result.retcode
+        fields["deal"] = result.deal
+        self.record(event, source, request["symbol"], **fields)
+
+    def position_closed(self, position, source, reason="broker"):
+        """Cierre detectado sin orden propia (SL/TP en el broker)."""
+        self.record(
+            "close",
+            source,
+            position.symbol,
+            ticket=position.ticket,
+            direction="buy" if position.type == _ORDER_TYPE_BUY else "sell",
+            volume=position.volume,
+            price=position.price_current,
+            sl=position.sl,
+            tp=position.tp,
+            profit=position.profit,
+            reason=reason,
+            magic=position.magic,
+        )
+
+    def sync(self, positions, source, magic=None):
+        """
+        Para bots sin motor: con cada lectura de posiciones registra como
+        cierre del broker las de `magic` que desaparecieron desde la
+        anterior. Devuelve `positions` sin tocar.
+        """
+        if positions is None:
+            return positions
+        current = {p.ticket: p for p in positions if magic is None or p.magic == magic}
+        seen = self._seen.get(source)
+        if seen is not None:
+            for ticket in seen.keys() - current.keys():
+                self.position_closed(seen[ticket], source)
+        self._seen[source] = current
+        return positions
+
+    # =============================
+    # ESCRITURA (hilo del diario)
+    # =============================
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error al escribir el diario {self.path}: {e}")
+
+    def flush(self, fsync=False):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        with self._io:
+            if rows:
+                self._file.write(
+                    b"".join(
+                        json.dumps(row, separators=(",", ":"), default=_plain).encode()
+                        + b"\n"
+                        for row in rows
+                    )
+                )
+                self._file.flush()
+                self._dirty = True
+            now = time.monotonic()
+            due = self.fsync == "always" or (
+                self.fsync == "interval"
+                and now - self._last_fsync >= self.fsync_interval
+            )
+            if self._dirty and (fsync or due):
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self._last_fsync = now
+            if rows and self._file.tell() >= self.compact_bytes:
+                self._compact()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush(fsync=self.fsync != "never")
+        self._file.close()
+
+    # =============================
+    # COMPACTACIÓN
+    # =============================
+    def compact(self):
+        self.flush()
+        with self._io:
+            self._compact()
+
+    def _compact(self):
+        frame = _read_jsonl(self.path)
+        if frame.empty:
+            return
+        stem = os.path.join(self.directory, f"{self.name}.{time.time_ns()}")
+        path = _write_columnar(frame, stem)
+        # Si caemos antes de vaciar el JSONL, load_journal descarta duplicados
+        self._file.close()
+        self._file = open(self.path, "wb")
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        logger.info(f"Diario compactado: {len(frame)} registros en {path}")
+
+
+def close_all():
+    """Vacía y cierra todos los diarios del proceso (fin de un replay)."""
+    for journal in _journals:
+        journal.close()
+
+
+def open_journal(name):
+    """Diario `name` con la configuración de config.journal."""
+    cfg = config.journal
+    return TradeJournal(
+        name,
+        directory=cfg["dir"],
+        flush_interval=cfg["flush_interval"],
+        batch_size=cfg["batch_size"],
+        fsync=cfg["fsync"],
+        fsync_interval=cfg["fsync_interval"],
+        compact_bytes=cfg["compact_mb"] * 2**20,
+    )
+
+
+def _plain(value):
+    # Escalares de NumPy (precios de rates, tickets) a tipos de JSON
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+# =============================
+# FORMATO COLUMNAR
+# =============================
+def _write_columnar(frame, stem):
+    frame = frame.reindex(columns=COLUMNS)
+    try:
+        import pyarrow  # noqa: F401
+
+        path, tmp = stem + ".parquet", stem + ".parquet.tmp"
+        frame.to_parquet(tmp, index=False)
+    except ImportError:
+        # Sin pyarrow: una columna por array en un .npz
+        path, tmp = stem + ".npz", stem + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            **{
+                col: frame[col].to_numpy(
+                    dtype=object if frame[col].dtype == object else None
+                )
+                for col in COLUMNS
+            },
+        )
+    with open(tmp, "r+b") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def _read_columnar(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=True) as data:
+        return pd.DataFrame({col: data[col] for col in data.files})
+
+
+def _read_jsonl(path):
+    rows = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # línea cortada por un crash
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                break
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# =============================
+# LECTURA (análisis y backtest)
+# =============================
+def load_journal(path="trading_bot/data/journal", name=None):
+    """
+    Registros de un diario (o de todos los del directorio si `name` es
+    None) ordenados por tiempo. `path` puede ser el directorio o un
+    fichero .jsonl/.parquet/.npz concreto.
+    """
+    if os.path.isdir(path):
+        pattern = os.path.join(path, f"{name or '*'}")
+        files = sorted(
+            glob.glob(pattern + ".*.parquet")
+            + glob.glob(pattern + ".*.npz")
+            + glob.glob(pattern + ".jsonl")
+        )
+    else:
+        files = [path]
+    frames = [
+        _read_jsonl(f) if f.endswith(".jsonl") else _read_columnar(f) for f in files
+    ]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    frame = pd.concat(frames, ignore_index=True).reindex(columns=COLUMNS)
+    frame = frame.drop_duplicates(subset=["time", "source", "event", "ticket"])
+    return frame.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def trades(frame, source=None, symbol=None):
+    """
+    Empareja aperturas y cierres por ticket y devuelve las operaciones
+    cerradas como backtest.TRADE_DTYPE (pnl en precio por unidad de
+    volumen, sin costes: el deslizamiento real ya está en los precios).
+    """
+    if source is not None:
+        frame = frame[frame["source"] == source]
+    if symbol is not None:
+        frame = frame[frame["symbol"] == symbol]
+    keys = ["source", "ticket"]
+    opens = frame[frame["event"] == "open"].drop_duplicates(keys)
+    closes = frame[frame["event"] == "close"].drop_duplicates(keys)
+    paired = opens.merge(closes, on=keys, suffixes=("_in", "_out"))
+    paired = paired.sort_values("time_in", kind="stable")
+
+    out = np.zeros(len(paired), dtype=TRADE_DTYPE)
+    if not len(paired):
+        return out
+    direction = np.where(paired["direction_in"].to_numpy() == "buy", 1, -1)
+    entry = paired["price_in"].to_numpy(dtype=np.float64)
+    exit_ = paired["price_out"].to_numpy(dtype=np.float64)
+    sl = paired["sl_in"].fillna(0.0).to_numpy(dtype=np.float64)
+    tp = paired["tp_in"].fillna(0.0).to_numpy(dtype=np.float64)
+    risk = np.abs(entry - sl)
+
+    # Los cierres del broker son SL o TP: el nivel más cercano al último
+    # precio visto (con el último SL/TP conocido, que incluye trailing)
+    last_sl = paired["sl_out"].fillna(0.0).to_numpy(dtype=np.float64)
+    last_tp = paired["tp_out"].fillna(0.0).to_numpy(dtype=np.float64)
+    broker = paired["reason_out"].to_numpy() == "broker"
+    to_tp = np.where(last_tp > 0, np.abs(exit_ - last_tp), np.inf)
+    to_sl = np.where(last_sl > 0, np.abs(exit_ - last_sl), np.inf)
+    reason = np.where(
+        broker & (to_tp < to_sl),
+        EXIT_TP,
+        np.where(broker & np.isfinite(to_sl), EXIT_SL, EXIT_CLOSE),
+    )
+    exit_ = np.where(
+        reason == EXIT_TP, last_tp, np.where(reason == EXIT_SL, last_sl, exit_)
+    )
+    pnl = direction * (exit_ - entry)
+
+    out["entry_time"] = paired["time_in"].to_numpy(dtype=np.float64)
+    out["exit_time"] = paired["time_out"].to_numpy(dtype=np.float64)
+    out["direction"] = direction
+    out["entry"] = entry
+    out["exit"] = exit_
+    out["sl"] = sl
+    out["tp"] = tp
+    out["pnl"] = pnl
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["r"] = np.where(risk > 0, pnl / risk, 0.0)
+    out["reason"] = reason
+    return out
@@ -0,0 +1,101 @@
+from operator import itemgetter
+
+import numpy as np
+
+# Columnas de futures_klines (la 11, "ignore", se descarta)
+KLINE_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+        ("close_time", "<i8"),
+        ("qav", "<f8"),
+        ("num_trades", "<i8"),
+        ("taker_base_vol", "<f8"),
+        ("taker_quote_vol", "<f8"),
+    ]
+)
+
+INT_COLUMNS = {"time": 0, "close_time": 6, "num_trades": 8}
+FLOAT_COLUMNS = {
+    "open": 1,
+    "high": 2,
+    "low": 3,
+    "close": 4,
+    "volume": 5,
+    "qav": 7,
+    "taker_base_vol": 9,
+    "taker_quote_vol": 10,
+}
+
+
+class KlineDecoder:
+    """
+    Decodifica klines de Binance (REST o WebSocket) a columnas float64/int64.
+    Los buffers se reservan una vez y se reutilizan entre llamadas: las
+    columnas devueltas por `decode` son vistas válidas hasta la siguiente.
+    """
+
+    def __init__(self, capacity=1500):
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self._ints = np.empty((len(INT_COLUMNS), capacity), dtype=np.int64)
+        self._floats = np.empty((len(FLOAT_COLUMNS), capacity), dtype=np.float64)
+        self._int_rows = {name: i for i, name in enumerate(INT_COLUMNS)}
+        self._float_rows = {name: i for i, name in enumerate(FLOAT_COLUMNS)}
+
+    def decode(self, klines):
+        """Lista de klines REST -> dict de columnas (orden de KLINE_DTYPE)."""
+        n = len(klines)
+        if n > self.capacity:
+            self._alloc(n)
+
+        for row, idx in enumerate(INT_COLUMNS.values()):
+            self._ints[row, :n] = np.fromiter(map(itemgetter(idx), klines), np.int64, n)
+        for row, idx in enumerate(FLOAT_COLUMNS.values()):
+            self._floats[row, :n] = np.fromiter(
+                map(float, map(itemgetter(idx), klines)), np.float64, n
+            )
+
+        columns = {}
+        for name in KLINE_DTYPE.names:
+            if name in self._int_rows:
+                columns[name] = self._ints[self._int_rows[name], :n]
+            else:
+                columns[name] = self._floats[self._float_rows[name], :n]
+        return columns
+
+    def records(self, klines):
+        """Como `decode`, pero devuelve un array estructurado propio (copia)."""
+        columns = self.decode(klines)
+        out = np.empty(len(klines), dtype=KLINE_DTYPE)
+        for name, values in columns.items():
+            out[name] = values
+        return out
+
+    @staticmethod
+    def decode_ws(msg):
+        """
+        Evento kline del WebSocket (directo o combinado con "data").
+        Devuelve (fila, cerrada) con la fila en el orden de KLINE_DTYPE.
+        """
+        k = msg.get("data", msg)["k"]
+        row = (
+            k["t"],
+            float(k["o"]),
+            float(k["h"]),
+            float(k["l"]),
+            float(k["c"]),
+            float(k["v"]),
+            k["T"],
+            float(k["q"]),
+            k["n"],
+            float(k["V"]),
+            float(k["Q"]),
+        )
+        return row, k["x"]
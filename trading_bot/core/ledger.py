@@ -0,0 +1,188 @@
+"""
+Registro de las posiciones gestionadas por un bot o estrategia.
+
+Struct-of-arrays de NumPy (LEDGER_DTYPE) con un índice ticket -> fila:
+- alta, baja y consulta por ticket en O(1); la baja mueve la última fila
+  al hueco, así las filas vivas siempre son `rows[:len]`;
+- `sync` con las posiciones del broker da de baja las cerradas y la
+  capacidad se reduce al vaciarse: la memoria no crece con los días;
+- progreso hacia el TP, breakeven y trailing se calculan de una vez para
+  todas las posiciones abiertas.
+"""
+
+import numpy as np
+
+LEDGER_DTYPE = np.dtype(
+    [
+        ("ticket", "<i8"),
+        ("direction", "i1"),  # 1 compra, -1 venta, 0 desconocida hasta sync
+        ("volume", "<f8"),
+        ("entry", "<f8"),
+        ("sl", "<f8"),  # SL inicial
+        ("tp", "<f8"),  # TP inicial
+        ("stop", "<f8"),  # SL actual en el broker
+    ]
+)
+
+BREAKEVEN, TRAILING = "SL -> BREAKEVEN", "TRAILING"
+
+
+class PositionLedger:
+    def __init__(self, capacity=8):
+        self._min_capacity = capacity
+        self._rows = np.zeros(capacity, dtype=LEDGER_DTYPE)
+        self._size = 0
+        self._index = {}  # ticket -> fila
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, ticket):
+        return ticket in self._index
+
+    @property
+    def rows(self):
+        """Vista de las filas vivas (no guardar: cambia con altas y bajas)."""
+        return self._rows[: self._size]
+
+    def get(self, ticket):
+        row = self._index.get(ticket)
+        return None if row is None else self._rows[row]
+
+    def tickets(self):
+        return list(self._index)
+
+    # =============================
+    # ALTAS Y BAJAS
+    # =============================
+    def add(self, ticket, direction, entry, sl, tp, volume=0.0):
+        """`direction`: "buy"/"sell" o 1/-1. Un ticket repetido se sobrescribe."""
+        if isinstance(direction, str):
+            direction = 1 if direction == "buy" else -1
+        row = self._index.get(ticket)
+        if row is None:
+            if self._size == len(self._rows):
+                self._resize(2 * len(self._rows))
+            row = self._size
+            self._size += 1
+            self._index[ticket] = row
+        self._rows[row] = (ticket, direction, volume, entry, sl, tp, sl)
+
+    def remove(self, ticket):
+        row = self._index.pop(ticket, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            self._rows[row] = self._rows[last]
+            self._index[int(self._rows[row]["ticket"])] = row
+        self._size = last
+        if len(self._rows) > self._min_capacity and self._size <= len(self._rows) // 4:
+            self._resize(max(self._min_capacity, len(self._rows) // 2))
+        return True
+
+    def set_stop(self, ticket, sl):
+        row = self._index.get(ticket)
+        if row is not None:
+            self._rows["stop"][row] = sl
+
+    def _resize(self, capacity):
+        rows = np.zeros(capacity, dtype=LEDGER_DTYPE)
+        rows[: self._size] = self._rows[: self._size]
+        self._rows = rows
+
+    def sync(self, positions, evict=True):
+        """
+        Actualiza dirección, volumen y SL actual desde las posiciones del
+        broker (las que no están en el registro se ignoran) y, con `evict`,
+        da de baja los tickets que ya no aparecen. Devuelve los eliminados.
+        """
+        if positions is None:
+            return []
+        current = {p.ticket: p for p in positions}
+        evicted = [t for t in self._index if t not in current] if evict else []
+        for ticket in evicted:
+            self.remove(ticket)
+        live = [(row, current[t]) for t, row in self._index.items() if t in current]
+        if live:
+            rows = np.fromiter((row for row, _ in live), dtype=np.intp, count=len(live))
+            self._rows["direction"][rows] = [1 - 2 * p.type for _, p in live]
+            self._rows["volume"][rows] = [p.volume for _, p in live]
+            self._rows["stop"][rows] = [p.sl for _, p in live]
+        return evicted
+
+    # =============================
+    # GESTIÓN VECTORIZADA
+    # =============================
+    def progress(self, bid, ask):
+        """
+        (precio de cierre, ganancia, fracción del recorrido al TP) de cada
+        fila viva; `bid`/`ask` escalares o arrays alineados con `rows`.
+        """
+        rows = self.rows
+        direction = rows["direction"]
+        price = np.where(direction > 0, bid, ask)
+        gain = (price - rows["entry"]) * direction
+        with np.errstate(divide="ignore", invalid="ignore"):
+            progress = gain / np.abs(rows["tp"] - rows["entry"])
+        return price, gain, progress
+
+    def stops(self, bid, ask, breakeven_at=0.5, trail_offset=None):
+        """
+        SL nuevo de las posiciones en beneficio:
+        - breakeven: a la entrada al recorrer `breakeven_at` del camino al TP;
+        - trailing: a `trail_offset` del precio pasado ese punto, si mejora.
+        Devuelve [(ticket, sl, motivo)] sólo de las que mejoran su SL actual.
+        """
+        if not self._size:
+            return []
+        rows = self.rows
+        direction = rows["direction"]
+        price, gain, progress = self.progress(bid, ask)
+        with np.errstate(invalid="ignore"):
+            ahead = gain > 0
+            be = (
+                ahead
+                & (progress >= breakeven_at)
+                & ((rows["entry"] - rows["stop"]) * direction > 0)
+            )
+            target = np.where(be, rows["entry"], rows["stop"])
+            reason = np.where(be, 1, 0)
+            if trail_offset is not None:
+                trail = price - direction * trail_offset
+                better = (
+                    ahead
+                    & (progress > breakeven_at)
+                    & ((trail - target) * direction > 0)
+                )
+                target = np.where(better, trail, target)
+                reason = np.where(better, 2, reason)
+        names = (None, BREAKEVEN, TRAILING)
+        return [
+            (int(rows["ticket"][i]), float(target[i]), names[reason[i]])
+            for i in np.flatnonzero(reason)
+        ]
+
+    # =============================
+    # PERSISTENCIA
+    # =============================
+    def to_state(self):
+        return self.rows.tolist()
+
+    def load_state(self, state):
+        """
+        Filas de `to_state` o el formato antiguo de los bots
+        {ticket: {"entry", "sl", "tp"}} (dirección y volumen llegan con sync).
+        """
+        self._rows = np.zeros(self._min_capacity, dtype=LEDGER_DTYPE)
+        self._size = 0
+        self._index = {}
+        if not state:
+            return
+        if isinstance(state, dict):
+            for ticket, info in state.items():
+                self.add(int(ticket), 0, info["entry"], info["sl"], info["tp"])
+            return
+        for ticket, direction, volume, entry, sl, tp, stop in state:
+            self.add(int(ticket), direction, entry, sl, tp, volume)
+            self.set_stop(int(ticket), stop)
@@ -0,0 +1,42 @@
+import pandas as pd
+from core.kline_decoder import KlineDecoder
+
+# =============================
+# MT5: array estructurado de copy_rates_*
+# =============================
+
+
+def last_bar_time(rates, closed=False):
+    """Epoch (segundos) de la última vela, o de la última cerrada si `closed`."""
+    return int(rates["time"][-2 if closed else -1])
+
+
+def rates_to_frame(rates):
+    """Envuelve el array de MT5 en un DataFrame sólo cuando se necesita."""
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df
+
+
+# =============================
+# BINANCE: klines [open_time, open, high, low, close, volume, close_time, ...]
+# =============================
+_decoder = KlineDecoder()
+
+
+def last_kline_time(klines, closed=False):
+    """Open time (ms) de la última kline directamente sobre la lista cruda."""
+    return int(klines[-2 if closed else -1][0])
+
+
+def parse_klines(klines):
+    """Convierte la respuesta de futures_klines en un array tipado."""
+    return _decoder.records(klines)
+
+
+def klines_to_frame(data):
+    # copy=True: las columnas de KlineDecoder.decode son buffers reutilizados
+    df = pd.DataFrame(data, copy=True)
+    df["time"] = pd.to_datetime(df["time"], unit="ms")
+    return df
+
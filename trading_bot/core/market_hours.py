@@ -0,0 +1,246 @@
+"""
+Calendario de sesiones por símbolo: fin de semana, pausa diaria y festivos.
+
+Los horarios se definen en la hora local del mercado (por defecto Nueva
+York, donde cierran metales y FX a las 17:00) para que los cambios de
+horario de verano se apliquen solos. Todas las funciones trabajan con
+epoch UTC, como time.time(), y por defecto con la hora de core/clock.py.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from datetime import timezone as dt_timezone
+
+import numpy as np
+
+import cfg.config as config
+import core.clock as clock
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _zone(name):
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(name)
+    except Exception:
+        # En Windows zoneinfo necesita el paquete tzdata
+        logger.warning(f"Zona horaria {name} no disponible (pip install tzdata); UTC-5")
+        return dt_timezone(timedelta(hours=-5))
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _week_minute(day, hhmm):
+    return WEEKDAYS.index(day) * MINUTES_PER_DAY + _minutes(hhmm)
+
+
+class MarketCalendar:
+    """
+    - open/close: ("sun", "17:00") / ("fri", "17:00"), apertura y cierre
+      semanales en la hora local de `timezone`.
+    - daily_break: ("17:00", "18:00"), pausa diaria (p. ej. metales).
+    - holidays: "MM-DD" (todos los años) o "YYYY-MM-DD", días cerrados.
+    - always_open: 24/7 (cripto).
+    """
+
+    def __init__(
+        self,
+        open=None,
+        close=None,
+        daily_break=None,
+        holidays=(),
+        timezone="UTC",
+        always_open=False,
+    ):
+        self.always_open = always_open
+        self.tz = _zone(timezone) if timezone != "UTC" else dt_timezone.utc
+        self.holidays = set(holidays)
+        self._span = (0.0, 0.0)  # último tramo abierto encontrado por is_open
+
+        # Máscara de minutos abiertos de la semana (lunes 00:00 = 0)
+        mask = np.zeros(MINUTES_PER_WEEK, dtype=bool)
+        if not always_open:
+            start, end = _week_minute(*open), _week_minute(*close)
+            if start < end:
+                mask[start:end] = True
+            else:
+                mask[start:] = True
+                mask[:end] = True
+            if daily_break:
+                b_start, b_end = (_minutes(t) for t in daily_break)
+                for day in range(7):
+                    base = day * MINUTES_PER_DAY
+                    mask[base + b_start : base + b_end] = False
+
+        # Tramos abiertos de cada día de la semana en minutos locales
+        self.segments = []
+        for day in range(7):
+            day_mask = mask[day * MINUTES_PER_DAY : (day + 1) * MINUTES_PER_DAY]
+            edges = np.flatnonzero(np.diff(np.r_[False, day_mask, False]))
+            self.segments.append([(int(s), int(e)) for s, e in edges.reshape(-1, 2)])
+
+    def is_holiday(self, day):
+        return (
+            day.isoformat() in self.holidays or day.strftime("%m-%d") in self.holidays
+        )
+
+    def _local(self, day, minute):
+        if minute >= MINUTES_PER_DAY:
+            day, minute = day + timedelta(days=1), minute - MINUTES_PER_DAY
+        wall = datetime.combine(day, dtime(minute // 60, minute % 60), self.tz)
+        return wall.timestamp()
+
+    def _intervals(self, now, days=16):
+        """Tramos abiertos (inicio, fin) en epoch desde el día local de `now`."""
+        day = datetime.fromtimestamp(now, self.tz).date() - timedelta(days=1)
+        for _ in range(days):
+            if not self.is_holiday(day):
+                for start, end in self.segments[day.weekday()]:
+                    yield self._local(day, start), self._local(day, end)
+            day += timedelta(days=1)
+
+    # =============================
+    # CONSULTAS
+    # =============================
+    def is_open(self, now=None):
+        if self.always_open:
+            return True
+        now = clock.time() if now is None else now
+        if self._span[0] <= now < self._span[1]:
+            return True
+        for start, end in self._intervals(now, days=3):
+            if start <= now < end:
+                self._span = (start, end)
+                return True
+            if start > now:
+                break
+        return False
+
+    def next_open(self, now=None):
+        """Epoch de la próxima apertura (o `now` si ya está abierto)."""
+        now = clock.time() if now is None else now
+        if self.always_open or self.is_open(now):
+            return now
+        for start, _end in self._intervals(now):
+            if start > now:
+                return start
+        return None  # sin sesiones en las próximas semanas
+
+    def next_close(self, now=None):
+        """Epoch del próximo cierre (fin de la sesión continua), None si 24/7."""
+        if self.always_open:
+            return None
+        now = clock.time() if now is None else now
+        close = None
+        for start, end in self._intervals(now):
+            if close is None:
+                if start <= now < end or start > now:
+                    close = end
+            elif start == close:
+                close = end  # el tramo sigue al otro lado de la medianoche
+            else:
+                break
+        return close
+
+    def seconds_until_open(self, now=None):
+        now = clock.time() if now is None else now
+        opens = self.next_open(now)
+        return None if opens is None else max(0.0, opens - now)
+
+    def open_seconds(self, starts, ends):
+        """
+        Segundos de mercado abierto en cada [starts[i], ends[i]) (arrays de
+        epoch): acumulado de los tramos abiertos del periodo y searchsorted,
+        sin bucle por elemento.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if self.always_open or not starts.size:
+            return np.maximum(ends - starts, 0.0)
+        first, last = starts.min(), ends.max()
+        days = int((last - first) // 86400) + 3
+        spans = np.array(list(self._intervals(first, days)), dtype=np.float64)
+        if not len(spans):
+            return np.zeros(starts.shape)
+        lengths = spans[:, 1] - spans[:, 0]
+        cumulative = np.r_[0.0, np.cumsum(lengths)]
+
+        def before(x):
+            # Segundos abiertos desde el primer tramo hasta x
+            i = np.searchsorted(spans[:, 0], x, side="right") - 1
+            row = np.maximum(i, 0)
+            partial = np.clip(x - spans[row, 0], 0.0, lengths[row])
+            return np.where(i >= 0, cumulative[row] + partial, 0.0)
+
+        return np.maximum(before(ends) - before(starts), 0.0)
+
+
+# =============================
+# CALENDARIOS DE LA CONFIGURACIÓN
+# =============================
+_calendars = {}
+
+
+def calendar_for(symbol):
+    """Calendario del símbolo según config.market_hours (cacheado por clase)."""
+    cfg = config.market_hours
+    name = cfg["symbols"].get(symbol, cfg["default"])
+    if name not in _calendars:
+        session = dict(cfg["sessions"][name])
+        _calendars[name] = MarketCalendar(
+            holidays=cfg["holidays"].get(name, ()), **session
+        )
+    return _calendars[name]
+
+
+def wait_for_open(calendar, prewarm=0.0, warm=None, sleep=clock.sleep):
+    """
+    Si el mercado está cerrado duerme hasta `prewarm` segundos antes de la
+    apertura, llama a `warm()` (reconectar, rellenar cachés) y duerme el
+    resto. Devuelve los segundos esperados (0 si estaba abierto).
+    """
+    now = clock.time()
+    opens = calendar.next_open(now)
+    if opens is None or opens <= now:
+        return 0.0
+    logger.info(
+        f"Mercado cerrado; apertura {datetime.fromtimestamp(opens):%Y-%m-%d %H:%M} "
+        f"(en {(opens - now) / 3600:.1f} h)"
+    )
+    if opens - now > prewarm:
+        sleep(opens - now - prewarm)
+    if warm is not None:
+        try:
+            warm()
+        except Exception as e:
+            logger.warning(f"Error al precalentar antes de la apertura: {e}")
+    remaining = opens - clock.time()
+    if remaining > 0:
+        sleep(remaining)
+    return opens - now
+
+
+def seconds_until_hours(session_hours, now=None):
+    """
+    Segundos hasta la próxima hora local dentro de `session_hours`
+    [(inicio, fin), ...] (horas del reloj de la máquina); 0 si ya dentro.
+    """
+    now = clock.now() if now is None else now
+    for step in range(24 * 8):
+        candidate = now + timedelta(hours=step)
+        if any(start <= candidate.hour < end for start, end in session_hours):
+            if step == 0:
+                return 0.0
+            top = candidate.replace(minute=0, second=0, microsecond=0)
+            return (top - now).total_seconds()
+    return None
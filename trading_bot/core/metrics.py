@@ -0,0 +1,216 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import core.clock as clock
+
+FETCH_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Retcodes habituales de MT5 precreados; los demás se añaden al aparecer
+KNOWN_RETCODES = (
+    "10004", "10006", "10009", "10013", "10014", "10016",
+    "10019", "10020", "10021", "10030", "10031", "none",
+)  # fmt: skip
+
+
+class BotMetrics:
+    """
+    Contadores de salud del bucle de un bot. Todo se reserva en __init__
+    y el bucle sólo suma sobre atributos; el hilo del servidor lee los
+    valores sin bloquear (cada lectura de float es atómica bajo el GIL).
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.started = clock.time()
+        self.iterations = 0
+        self.last_iteration = 0.0
+        self.last_bar_seen = 0.0  # instante (reloj local) en que llegó la última vela
+        self.last_bar_time = 0  # epoch de la última vela según el broker
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.fetch_seconds = 0.0
+        self.fetch_buckets = [0] * (len(FETCH_BUCKETS) + 1)
+        self.orders = {code: 0 for code in KNOWN_RETCODES}
+        self.open_positions = 0
+        self.sleep_seconds = 0.0
+        self.connected = 1
+        self.disconnects = 0
+        self.recovery_seconds = 0.0  # duración del último corte
+        self.flatten_seconds = 0.0  # último cierre/reversión de varias órdenes
+        self.bar_problems = {}  # problema -> velas afectadas (core/bar_quality.py)
+
+    # =============================
+    # REGISTRO DESDE EL BUCLE
+    # =============================
+    def loop(self):
+        self.iterations += 1
+        self.last_iteration = clock.time()
+
+    def bar(self, bar_time):
+        self.last_bar_time = bar_time
+        self.last_bar_seen = clock.time()
+
+    def fetch(self, seconds, ok=True):
+        self.fetches += 1
+        if not ok:
+            self.fetch_errors += 1
+        self.fetch_seconds += seconds
+        i = 0
+        while i < len(FETCH_BUCKETS) and seconds > FETCH_BUCKETS[i]:
+            i += 1
+        self.fetch_buckets[i] += 1
+
+    def call(self, fetch_fn, *args, **kwargs):
+        """Ejecuta una petición de datos midiendo su latencia."""
+        start = time.perf_counter()
+        try:
+            result = fetch_fn(*args, **kwargs)
+        except Exception:
+            self.fetch(time.perf_counter() - start, ok=False)
+            raise
+        self.fetch(time.perf_counter() - start, result is not None)
+        return result
+
+    def order(self, result):
+        """Resultado de order_send (retcode) o respuesta de Binance (status)."""
+        if result is None:
+            code = "none"
+        elif isinstance(result, dict):
+            code = result.get("status", "unknown")
+        else:
+            code = str(result.retcode)
+        self.orders[code] = self.orders.get(code, 0) + 1
+
+    def positions(self, count):
+        self.open_positions = count
+
+    def flatten(self, seconds):
+        """Duración total de un cierre o reversión (core/execution.py)."""
+        self.flatten_seconds = seconds
+
+    def connection(self, up, recovery_seconds=0.0):
+        """Cambio de estado de la conexión con el broker (core/connection.py)."""
+        if not up:
+            self.disconnects += 1
+        elif recovery_seconds:
+            self.recovery_seconds = recovery_seconds
+        self.connected = int(up)
+
+    def bar_issues(self, found):
+        """Velas inválidas detectadas por BarValidator ({problema: velas})."""
+        for kind, count in found.items():
+            self.bar_problems[kind] = self.bar_problems.get(kind, 0) + count
+
+    def sleep(self, seconds):
+        """Sustituto de time.sleep que contabiliza el tiempo dormido."""
+        start = clock.monotonic()
+        clock.sleep(seconds)
+        self.sleep_seconds += clock.monotonic() - start
+
+    # =============================
+    # EXPOSICIÓN
+    # =============================
+    def render(self):
+        now = clock.time()
+        label = f'bot="{self.bot}"'
+        rate = self.iterations / max(now - self.started, 1e-9)
+        since_iteration = now - self.last_iteration if self.last_iteration else -1
+        since_bar = now - self.last_bar_seen if self.last_bar_seen else -1
+        lines = [
+            "# HELP bot_loop_iterations_total Iteraciones del bucle principal.",
+            "# TYPE bot_loop_iterations_total counter",
+            f"bot_loop_iterations_total{{{label}}} {self.iterations}",
+            "# HELP bot_loop_iterations_per_second Iteraciones/s desde el arranque.",
+            "# TYPE bot_loop_iterations_per_second gauge",
+            f"bot_loop_iterations_per_second{{{label}}} {rate:.6f}",
+            "# HELP bot_seconds_since_last_iteration Segundos desde la última iteración.",
+            "# TYPE bot_seconds_since_last_iteration gauge",
+            f"bot_seconds_since_last_iteration{{{label}}} {since_iteration:.3f}",
+            "# HELP bot_seconds_since_last_bar Segundos desde la última vela detectada.",
+            "# TYPE bot_seconds_since_last_bar gauge",
+            f"bot_seconds_since_last_bar{{{label}}} {since_bar:.3f}",
+            "# HELP bot_last_bar_timestamp_seconds Epoch de la última vela (hora del broker).",
+            "# TYPE bot_last_bar_timestamp_seconds gauge",
+            f"bot_last_bar_timestamp_seconds{{{label}}} {self.last_bar_time}",
+            "# HELP bot_fetch_errors_total Peticiones de datos sin respuesta.",
+            "# TYPE bot_fetch_errors_total counter",
+            f"bot_fetch_errors_total{{{label}}} {self.fetch_errors}",
+            "# HELP bot_fetch_seconds Latencia de las peticiones de datos al broker.",
+            "# TYPE bot_fetch_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(FETCH_BUCKETS, self.fetch_buckets):
+            cumulative += count
+            lines.append(
+                f'bot_fetch_seconds_bucket{{{label},le="{bound}"}} {cumulative}'
+            )
+        lines += [
+            f'bot_fetch_seconds_bucket{{{label},le="+Inf"}} {self.fetches}',
+            f"bot_fetch_seconds_sum{{{label}}} {self.fetch_seconds:.6f}",
+            f"bot_fetch_seconds_count{{{label}}} {self.fetches}",
+            "# HELP bot_orders_total Órdenes por retcode (estado en Binance).",
+            "# TYPE bot_orders_total counter",
+        ]
+        for code, count in list(self.orders.items()):
+            if count:
+                lines.append(f'bot_orders_total{{{label},retcode="{code}"}} {count}')
+        lines += [
+            "# HELP bot_open_positions Posiciones abiertas (última comprobación).",
+            "# TYPE bot_open_positions gauge",
+            f"bot_open_positions{{{label}}} {self.open_positions}",
+            "# HELP bot_sleep_seconds_total Tiempo dormido en el bucle.",
+            "# TYPE bot_sleep_seconds_total counter",
+            f"bot_sleep_seconds_total{{{label}}} {self.sleep_seconds:.3f}",
+            "# HELP bot_broker_connected Conexión con el broker (1 = conectado).",
+            "# TYPE bot_broker_connected gauge",
+            f"bot_broker_connected{{{label}}} {self.connected}",
+            "# HELP bot_broker_disconnects_total Cortes de conexión detectados.",
+            "# TYPE bot_broker_disconnects_total counter",
+            f"bot_broker_disconnects_total{{{label}}} {self.disconnects}",
+            "# HELP bot_broker_recovery_seconds Duración del último corte hasta reconectar.",
+            "# TYPE bot_broker_recovery_seconds gauge",
+            f"bot_broker_recovery_seconds{{{label}}} {self.recovery_seconds:.3f}",
+            "# HELP bot_flatten_seconds Duración del último cierre o reversión.",
+            "# TYPE bot_flatten_seconds gauge",
+            f"bot_flatten_seconds{{{label}}} {self.flatten_seconds:.6f}",
+            "# HELP bot_bar_issues_total Velas inválidas detectadas por tipo.",
+            "# TYPE bot_bar_issues_total counter",
+        ]
+        for kind, count in sorted(self.bar_problems.items()):
+            lines.append(f'bot_bar_issues_total{{{label},kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Endpoint /metrics en formato Prometheus en un hilo de fondo."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9100):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.metrics = metrics
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,113 @@
+"""
+Análisis Monte Carlo de robustez de una secuencia de operaciones.
+
+Cada tanda de caminos es una matriz (caminos x operaciones) generada de
+una vez con NumPy; el número de caminos por tanda se calcula para que la
+memoria no supere `max_bytes`, así 100k caminos de miles de operaciones
+caben en un portátil.
+"""
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("bootstrap", "shuffle")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def load_trades(path):
+    """
+    pnl por operación: columna `pnl` de un CSV (optimize.py --trades) o
+    las operaciones cerradas de un diario (directorio o fichero de
+    core/journal.py).
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path)["pnl"].to_numpy(dtype=np.float64)
+    from core.journal import load_journal, trades
+
+    return trades(load_journal(path))["pnl"]
+
+
+def _chunk_size(n_trades, paths, max_bytes):
+    # ~4 matrices float64 vivas a la vez (muestras, ruido, equity, máximo)
+    per_path = max(n_trades, 1) * 8 * 4
+    return int(max(1, min(paths, max_bytes // per_path)))
+
+
+def _sample(rng, pnl, rows, method):
+    n = len(pnl)
+    if method == "bootstrap":
+        return pnl[rng.integers(0, n, size=(rows, n))]
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(pnl, (rows, n)), axis=1)
+    raise ValueError(f"Método desconocido: {method}")
+
+
+def simulate(
+    pnl,
+    paths=100_000,
+    method="bootstrap",
+    slippage=0.0,
+    capital=10_000.0,
+    scale=1.0,
+    ruin=0.5,
+    max_bytes=256 * 2**20,
+    seed=None,
+):
+    """
+    Genera `paths` curvas de equity a partir de `pnl` (por operación).
+    - method: "bootstrap" (con reemplazo) o "shuffle" (permutaciones).
+    - slippage: desviación típica del deslizamiento por operación, siempre
+      en contra (|N(0, slippage)|), en las mismas unidades que `pnl`.
+    - scale: factor de `pnl` a dinero (p. ej. lote x tamaño de contrato).
+    - ruin: fracción del capital inicial cuya pérdida cuenta como ruina.
+    Devuelve arrays por camino: final, max_drawdown, max_drawdown_pct, ruined.
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if not len(pnl):
+        raise ValueError("No hay operaciones que simular")
+    rng = np.random.default_rng(seed)
+
+    final = np.empty(paths)
+    max_dd = np.empty(paths)
+    max_dd_pct = np.empty(paths)
+    ruined = np.empty(paths, dtype=bool)
+    floor = capital * (1 - ruin)
+
+    chunk = _chunk_size(len(pnl), paths, max_bytes)
+    for lo in range(0, paths, chunk):
+        rows = min(chunk, paths - lo)
+        sample = _sample(rng, pnl, rows, method)
+        if slippage:
+            sample = sample - np.abs(rng.normal(0.0, slippage, sample.shape))
+        equity = np.cumsum(sample, axis=1)
+        equity *= scale
+        equity += capital
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, capital, out=peak)
+        drawdown = peak - equity
+
+        hi = lo + rows
+        final[lo:hi] = equity[:, -1]
+        max_dd[lo:hi] = drawdown.max(axis=1)
+        drawdown /= peak
+        max_dd_pct[lo:hi] = drawdown.max(axis=1)
+        ruined[lo:hi] = equity.min(axis=1) <= floor
+
+    return {
+        "final": final,
+        "max_drawdown": max_dd,
+        "max_drawdown_pct": max_dd_pct,
+        "ruined": ruined,
+    }
+
+
+def report(result, percentiles=PERCENTILES):
+    """Percentiles de cada distribución y probabilidad de ruina."""
+    out = {
+        "paths": len(result["final"]),
+        "ruin_probability": float(result["ruined"].mean()),
+    }
+    for key in ("final", "max_drawdown", "max_drawdown_pct"):
+        values = np.percentile(result[key], percentiles)
+        out[key] = {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+    return out
@@ -0,0 +1,264 @@
+import logging
+import time
+from collections import namedtuple
+
+import MetaTrader5 as mt5
+import numpy as np
+
+import cfg.config as config
+from core.shm_bus import SeqlockTable
+
+logger = logging.getLogger(__name__)
+
+POSITION_DTYPE = np.dtype(
+    [
+        ("ticket", "<i8"),
+        ("time", "<i8"),
+        ("type", "<i4"),
+        ("magic", "<i8"),
+        ("volume", "<f8"),
+        ("price_open", "<f8"),
+        ("sl", "<f8"),
+        ("tp", "<f8"),
+        ("price_current", "<f8"),
+        ("profit", "<f8"),
+        ("symbol", "S16"),
+        ("comment", "S32"),
+    ]
+)
+
+EXPOSURE_DTYPE = np.dtype(
+    [
+        ("symbol", "S16"),
+        ("magic", "<i8"),
+        ("positions", "<i4"),
+        ("buy_volume", "<f8"),
+        ("sell_volume", "<f8"),
+        ("net_volume", "<f8"),
+        ("profit", "<f8"),
+    ]
+)
+
+# Mismos nombres de campo que mt5.TradePosition para usarlo como sustituto
+Position = namedtuple("Position", POSITION_DTYPE.names)
+
+
+def positions_to_array(positions):
+    out = np.empty(len(positions), dtype=POSITION_DTYPE)
+    for i, p in enumerate(positions):
+        out[i] = (
+            p.ticket,
+            p.time,
+            p.type,
+            p.magic,
+            p.volume,
+            p.price_open,
+            p.sl,
+            p.tp,
+            p.price_current,
+            p.profit,
+            p.symbol.encode()[:16],
+            p.comment.encode()[:32],
+        )
+    return out
+
+
+def aggregate_exposure(arr):
+    """Agregados por (símbolo, magic) sobre el array de posiciones."""
+    if len(arr) == 0:
+        return np.empty(0, dtype=EXPOSURE_DTYPE)
+    keys, inverse = np.unique(arr[["symbol", "magic"]], return_inverse=True)
+    inverse = inverse.reshape(-1)
+    buy = np.where(arr["type"] == 0, arr["volume"], 0.0)
+    sell = np.where(arr["type"] == 1, arr["volume"], 0.0)
+
+    out = np.empty(len(keys), dtype=EXPOSURE_DTYPE)
+    out["symbol"] = keys["symbol"]
+    out["magic"] = keys["magic"]
+    out["positions"] = np.bincount(inverse, minlength=len(keys))
+    out["buy_volume"] = np.bincount(inverse, buy, minlength=len(keys))
+    out["sell_volume"] = np.bincount(inverse, sell, minlength=len(keys))
+    out["net_volume"] = out["buy_volume"] - out["sell_volume"]
+    out["profit"] = np.bincount(inverse, arr["profit"], minlength=len(keys))
+    return out
+
+
+def diff_positions(prev, curr):
+    """Tickets abiertos, cerrados y con SL/TP/volumen modificado."""
+    prev_idx = {int(t): i for i, t in enumerate(prev["ticket"])}
+    curr_idx = {int(t): i for i, t in enumerate(curr["ticket"])}
+    opened = [t for t in curr_idx if t not in prev_idx]
+    closed = [t for t in prev_idx if t not in curr_idx]
+    modified = [
+        t
+        for t, i in curr_idx.items()
+        if t in prev_idx
+        and (
+            prev["sl"][prev_idx[t]] != curr["sl"][i]
+            or prev["tp"][prev_idx[t]] != curr["tp"][i]
+            or prev["volume"][prev_idx[t]] != curr["volume"][i]
+        )
+    ]
+    return opened, closed, modified
+
+
+def table_names(prefix, login):
+    return f"{prefix}_{login}_positions", f"{prefix}_{login}_exposure"
+
+
+class PositionBus:
+    """Lado publicador: snapshot de posiciones de la cuenta + agregados."""
+
+    def __init__(self, login, capacity=256, prefix="posbus"):
+        pos_name, exp_name = table_names(prefix, login)
+        self.positions = SeqlockTable(pos_name, POSITION_DTYPE, capacity, create=True)
+        self.exposure = SeqlockTable(exp_name, EXPOSURE_DTYPE, capacity, create=True)
+        self.last = np.empty(0, dtype=POSITION_DTYPE)
+
+    def publish(self, positions):
+        arr = positions_to_array(positions or ())
+        opened, closed, modified = diff_positions(self.last, arr)
+        self.positions.publish(arr)
+        self.exposure.publish(aggregate_exposure(arr))
+        self.positions.touch()
+        self.last = arr
+        if opened or closed or modified:
+            logger.info(
+                f"Posiciones: abiertas {opened} | cerradas {closed} | modificadas {modified}"
+            )
+        return opened, closed, modified
+
+    def heartbeat(self):
+        self.positions.touch()
+
+    def close(self):
+        self.positions.close()
+        self.exposure.close()
+
+
+class PositionReader:
+    """
+    Lado de los bots: sustituto de mt5.positions_get que lee el snapshot.
+    Devuelve None si el servicio no corre, el snapshot está viejo o el
+    lector está desactivado (`enabled=False`). Con el heartbeat viejo
+    suelta las tablas y vuelve a conectarse pasados `retry_every` segundos:
+    un daemon reiniciado publica en segmentos nuevos.
+    """
+
+    def __init__(
+        self,
+        login,
+        prefix="posbus",
+        stale_after=5.0,
+        retry_every=10.0,
+        enabled=True,
+        max_symbol_lots=None,
+    ):
+        self.names = table_names(prefix, login)
+        self.stale_after = stale_after
+        self.retry_every = retry_every
+        self.enabled = enabled
+        self.max_symbol_lots = max_symbol_lots or {}
+        self._tables = None
+        self._next_try = 0.0
+
+    def _attach(self):
+        if not self.enabled:
+            return None
+        if self._tables is not None:
+            return self._tables
+        now = time.monotonic()
+        if now < self._next_try:
+            return None
+        tables = []
+        try:
+            for name, dtype in zip(self.names, (POSITION_DTYPE, EXPOSURE_DTYPE)):
+                tables.append(SeqlockTable(name, dtype))
+        except FileNotFoundError:
+            for table in tables:
+                table.close()
+            self._next_try = now + self.retry_every
+            return None
+        self._tables = tuple(tables)
+        logger.info(f"Conectado al snapshot de posiciones {self.names[0]}")
+        return self._tables
+
+    def _detach(self):
+        for table in self._tables:
+            table.close()
+        self._tables = None
+        self._next_try = time.monotonic() + self.retry_every
+        logger.info(f"Snapshot de posiciones {self.names[0]} sin heartbeat; desconectado")
+
+    def _fresh(self):
+        tables = self._attach()
+        if tables is None:
+            return None
+        if tables[0].heartbeat_age() > self.stale_after:
+            # Daemon caído o reiniciado sobre segmentos nuevos: soltar los viejos
+            self._detach()
+            return None
+        return tables
+
+    def positions(self, symbol=None, magic=None):
+        tables = self._fresh()
+        if tables is None:
+            return None
+        arr = tables[0].read()
+        if symbol is not None:
+            arr = arr[arr["symbol"] == symbol.encode()]
+        if magic is not None:
+            arr = arr[arr["magic"] == magic]
+        return tuple(
+            Position(*row[:-2], row[-2].decode(), row[-1].decode()) for row in arr.tolist()
+        )
+
+    def exposure(self, symbol=None):
+        tables = self._fresh()
+        if tables is None:
+            return None
+        arr = tables[1].read()
+        if symbol is not None:
+            arr = arr[arr["symbol"] == symbol.encode()]
+        return arr
+
+    def exposure_ok(self, symbol, volume, direction, max_lots):
+        """
+        True si abrir `volume` lotes en `direction` deja la exposición neta
+        de la cuenta en `symbol` dentro de `max_lots`. Sin snapshot, True.
+        """
+        arr = self.exposure(symbol)
+        if arr is None:
+            return True
+        net = float(arr["net_volume"].sum())
+        net += volume if direction == "buy" else -volume
+        return abs(net) <= max_lots + 1e-9
+
+    def positions_or_live(self, symbol):
+        """Posiciones de `symbol` del snapshot o, sin él, del terminal."""
+        positions = self.positions(symbol=symbol)
+        if positions is None:
+            positions = mt5.positions_get(symbol=symbol)
+        return positions
+
+    def check_exposure(self, symbol, direction, volume):
+        """exposure_ok con el límite de `symbol` en max_symbol_lots; avisa si lo supera."""
+        max_lots = self.max_symbol_lots.get(symbol)
+        if max_lots is None or self.exposure_ok(symbol, volume, direction, max_lots):
+            return True
+        logger.warning(
+            f"Exposición máxima de la cuenta en {symbol} alcanzada ({max_lots} lotes)"
+        )
+        return False
+
+
+def reader_for(login):
+    """PositionReader según config.position_bus; desactivado lee del terminal."""
+    cfg = config.position_bus
+    return PositionReader(
+        login,
+        prefix=cfg["prefix"],
+        stale_after=cfg["stale_after"],
+        enabled=cfg["enabled"],
+        max_symbol_lots=cfg["max_symbol_lots"],
+    )
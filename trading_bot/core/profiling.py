@@ -0,0 +1,205 @@
+import cProfile
+import collections
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Profiler por muestreo: pila del hilo principal cada `interval` s."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        # Formato "folded" compatible con flamegraph.pl / speedscope
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class LoopProfiler:
+    """
+    Perfilado bajo demanda del bucle principal de un bot.
+    - Se arma con SIGUSR1 (donde exista) o creando `logs/<name>.profile`;
+      el fichero puede contener p. ej. "iterations=20 mode=sampling tracemalloc=1".
+    - Captura las siguientes N iteraciones con cProfile o por muestreo y
+      opcionalmente un snapshot de tracemalloc por iteración.
+    - Desarmado, `tick()` sólo compara un reloj monotónico cada iteración.
+    """
+
+    def __init__(
+        self,
+        name,
+        log_dir="trading_bot/logs",
+        iterations=50,
+        mode="cprofile",
+        trace_malloc=False,
+        check_every=5.0,
+        sample_interval=0.005,
+    ):
+        self.name = name.replace(" ", "_")
+        self.log_dir = log_dir
+        self.control_file = os.path.join(log_dir, f"{self.name}.profile")
+        self.defaults = {"iterations": iterations, "mode": mode, "tracemalloc": trace_malloc}
+        self.check_every = check_every
+        self.sample_interval = sample_interval
+
+        self.armed = False
+        self._requested = None
+        self._next_check = 0.0
+        self._remaining = 0
+        self._profiler = None
+        self._sampler = None
+        self._malloc = None
+        self._iter_start = 0.0
+        self._iter_times = []
+        self._captures = 0
+
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        self._requested = dict(self.defaults)
+
+    # =============================
+    # BUCLE
+    # =============================
+    def tick(self):
+        """Llamar al inicio de cada iteración del bucle."""
+        if self.armed:
+            self._step()
+            return
+        if self._requested is None:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_every
+            self._requested = self._read_control_file()
+            if self._requested is None:
+                return
+        self._arm(self._requested)
+        self._requested = None
+
+    def _read_control_file(self):
+        try:
+            with open(self.control_file) as f:
+                content = f.read()
+            os.remove(self.control_file)
+        except OSError:
+            return None
+        options = dict(self.defaults)
+        for token in content.split():
+            key, _, value = token.partition("=")
+            if key == "iterations":
+                options["iterations"] = int(value)
+            elif key == "mode":
+                options["mode"] = value
+            elif key == "tracemalloc":
+                options["tracemalloc"] = value not in ("0", "false", "")
+        return options
+
+    def _arm(self, options):
+        self.armed = True
+        self._remaining = options["iterations"]
+        self._mode = options["mode"]
+        self._iter_times = []
+        self._malloc = [] if options["tracemalloc"] else None
+        if self._malloc is not None:
+            tracemalloc.start(10)
+            self._last_snapshot = tracemalloc.take_snapshot()
+
+        if self._mode == "sampling":
+            self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._iter_start = time.perf_counter()
+        logger.info(f"Profiling armado: {self._remaining} iteraciones ({self._mode})")
+
+    def _step(self):
+        now = time.perf_counter()
+        self._iter_times.append(now - self._iter_start)
+        self._iter_start = now
+
+        if self._malloc is not None:
+            snapshot = tracemalloc.take_snapshot()
+            top = snapshot.compare_to(self._last_snapshot, "lineno")[:5]
+            self._malloc.append([str(stat) for stat in top])
+            self._last_snapshot = snapshot
+
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._finish()
+
+    def _finish(self):
+        self._captures += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.log_dir, f"{self.name}_profile_{stamp}_{self._captures}")
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        summary = io.StringIO()
+        times = sorted(self._iter_times)
+        if times:
+            summary.write(
+                f"Iteraciones: {len(times)} | media {sum(times) / len(times):.4f}s | "
+                f"p50 {times[len(times) // 2]:.4f}s | máx {times[-1]:.4f}s\n\n"
+            )
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(base + ".prof")
+            stats = pstats.Stats(self._profiler, stream=summary)
+            stats.sort_stats("cumulative").print_stats(40)
+            self._profiler = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.dump(base + ".folded")
+            self._sampler = None
+
+        if self._malloc is not None:
+            tracemalloc.stop()
+            summary.write("\nAsignaciones por iteración (top 5 por línea):\n")
+            for i, top in enumerate(self._malloc, 1):
+                summary.write(f"-- iteración {i}\n")
+                for line in top:
+                    summary.write(f"   {line}\n")
+            self._malloc = None
+
+        with open(base + ".txt", "w") as f:
+            f.write(summary.getvalue())
+        self.armed = False
+        logger.info(f"Profiling terminado: {base}.*")
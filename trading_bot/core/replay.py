@@ -0,0 +1,157 @@
+"""
+Replay acelerado: ejecuta un bot sin modificar sobre velas grabadas.
+
+Instala FakeMT5 con el histórico del BarStore (o un paseo aleatorio
+sintético) y un SimClock: cada `sleep` del bucle avanza el tiempo simulado
+al instante, FakeMT5 muestra las velas hasta ese momento y ejecuta los
+SL/TP tocados. El script del bot se ejecuta tal cual (runpy, como
+`__main__`) hasta que el tiempo simulado llega al final, así un mes de
+datos se recorre en segundos y dos ejecuciones con los mismos datos dan
+las mismas órdenes.
+"""
+
+import os
+import runpy
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import cfg.config as config
+import core.clock as clock
+from core.bar_store import TIMEFRAME_SECONDS, BarStore, resample
+from core.fake_mt5 import FakeMT5, synthetic_rates
+from core.journal import close_all, load_journal, trades
+
+ReplayResult = namedtuple(
+    "ReplayResult",
+    "start end wall_seconds sleeps requests balance trades out_dir recoveries",
+)
+
+
+# =============================
+# DATOS
+# =============================
+def stored_rates(symbols, directory=None):
+    """{(símbolo, timeframe): rates} del BarStore para `symbols`."""
+    store = BarStore(directory or config.bar_store["dir"])
+    return {
+        (symbol, tf): store.load(symbol, tf)
+        for symbol, tf in store.series()
+        if symbol in symbols and tf in TIMEFRAME_SECONDS
+    }
+
+
+def synthetic_series(symbols, start, end, seed=7):
+    """Paseo aleatorio M1 por símbolo desde `start` hasta `end`."""
+    out = {}
+    n = int(end - start) // 60 + 1
+    for i, symbol in enumerate(symbols):
+        # Volatilidad por vela M1 equivalente al 0.2% por hora
+        out[(symbol, "M1")] = synthetic_rates(
+            n, start=int(start) // 60 * 60, step=60, vol=0.002 / 60**0.5, seed=seed + i
+        )
+    return out
+
+
+def complete_timeframes(series):
+    """Añade los timeframes que falten agregando el más fino de cada símbolo."""
+    series = dict(series)
+    for symbol in {symbol for symbol, _ in series}:
+        frames = [tf for sym, tf in series if sym == symbol and len(series[sym, tf])]
+        if not frames:
+            continue
+        finest = min(frames, key=TIMEFRAME_SECONDS.get)
+        for tf, seconds in TIMEFRAME_SECONDS.items():
+            if seconds > TIMEFRAME_SECONDS[finest] and (symbol, tf) not in series:
+                series[symbol, tf] = resample(series[symbol, finest], seconds)
+    return series
+
+
+# =============================
+# EJECUCIÓN
+# =============================
+def _isolate(out_dir):
+    """Sin servidores, buses ni ficheros compartidos con los bots reales."""
+    config.metrics["enabled"] = False
+    config.market_bus["enabled"] = False
+    config.position_bus["enabled"] = False
+    config.state["dir"] = os.path.join(out_dir, "state")
+    config.journal["dir"] = os.path.join(out_dir, "journal")
+    # Los bots abren sus logs con rutas relativas a la raíz del repo
+    os.makedirs(os.path.join(out_dir, "trading_bot", "logs"), exist_ok=True)
+
+
+def replay(script, series, start, end, argv=(), out_dir=None, spread=0.2, outages=()):
+    """
+    Ejecuta `script` con FakeMT5 sobre `series` ({(símbolo, tf): rates})
+    desde el epoch `start` hasta `end` y devuelve un ReplayResult con las
+    operaciones cerradas del diario (backtest.TRADE_DTYPE) y los segundos
+    hasta reconectar tras cada corte de `outages` [(inicio, fin)]. El bot
+    corre con `out_dir` como directorio de trabajo.
+    """
+    out_dir = os.path.abspath(out_dir or tempfile.mkdtemp(prefix="replay_"))
+    _isolate(out_dir)
+    script = os.path.abspath(script)
+
+    fake = FakeMT5(spread=spread)
+    for (symbol, tf), rates in complete_timeframes(series).items():
+        fake.set_rates(symbol, getattr(fake, f"TIMEFRAME_{tf}"), rates)
+    for outage in outages:
+        fake.add_outage(*outage)
+    fake.now = start
+    fake.install()
+    sim = clock.SimClock(start, end, on_advance=fake.advance)
+    previous = clock.install(sim)
+
+    saved = sys.argv, list(sys.path), os.getcwd()
+    sys.argv = [script, *argv]
+    sys.path[:] = [os.path.abspath(p) for p in sys.path]
+    os.chdir(out_dir)
+    began = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except clock.ReplayFinished:
+        pass
+    finally:
+        sys.argv, sys.path[:], cwd = saved
+        os.chdir(cwd)
+        clock.install(previous)
+        close_all()
+    wall = time.perf_counter() - began
+
+    journal = load_journal(config.journal["dir"])
+    return ReplayResult(
+        start,
+        sim.time(),
+        wall,
+        sim.sleeps,
+        len(fake.requests),
+        fake.balance,
+        trades(journal),
+        out_dir,
+        fake.recoveries,
+    )
+
+
+def span(series, days=None, start=None, end=None):
+    """(start, end) del replay: por defecto los últimos `days` días de datos."""
+    last = max(int(rates["time"][-1]) for rates in series.values() if len(rates))
+    end = end if end is not None else last
+    if start is None:
+        start = end - (days or 30) * 86400
+    if start >= end:
+        raise ValueError("El replay necesita start < end")
+    return float(start), float(end)
+
+
+def trade_table(result):
+    """Operaciones del replay como texto, una por línea (para comparar ejecuciones)."""
+    rows = result.trades
+    return "\n".join(
+        f"{int(t['entry_time'])} {int(t['exit_time'])} {int(t['direction']):+d} "
+        f"{t['entry']:.5f} {t['exit']:.5f} {t['pnl']:.5f}"
+        for t in np.sort(rows, order="entry_time")
+    )
@@ -0,0 +1,335 @@
+import logging
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.bar_cache import RATES_DTYPE
+
+logger = logging.getLogger(__name__)
+
+TICK_DTYPE = np.dtype(
+    [
+        ("time_msc", "<i8"),
+        ("bid", "<f8"),
+        ("ask", "<f8"),
+        ("last", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+Tick = namedtuple("Tick", TICK_DTYPE.names)
+
+# Cabecera int64: secuencia (seqlock), registros escritos, capacidad, heartbeat
+SEQ, COUNT, CAPACITY, HEARTBEAT = range(4)
+HEADER_SIZE = 4 * 8
+
+
+def _untrack(shm):
+    # En POSIX (Python < 3.13) el resource_tracker del lector borraría el
+    # segmento al salir; sólo el daemon que lo crea debe liberarlo
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class SeqlockRing:
+    """
+    Ring buffer de registros de tamaño fijo en memoria compartida.
+    Un único escritor; lectores en otros procesos sin bloqueos: el contador
+    de secuencia es impar mientras se escribe y el lector reintenta si cambia
+    durante la lectura.
+    """
+
+    def __init__(self, name, dtype, capacity=None, create=False):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.owner = create
+        if create:
+            try:
+                # Segmento huérfano de una ejecución anterior
+                old = shared_memory.SharedMemory(name=name)
+                old.close()
+                old.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(
+                name=name, create=True, size=HEADER_SIZE + self.dtype.itemsize * capacity
+            )
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _untrack(self.shm)
+
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.header[:] = (0, 0, capacity, 0)
+        self.capacity = int(self.header[CAPACITY])
+        self.slots = np.ndarray(
+            (self.capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_SIZE
+        )
+
+    # =============================
+    # ESCRITURA (sólo el daemon)
+    # =============================
+    def _write(self, rows, start):
+        idx = np.arange(start, start + len(rows)) % self.capacity
+        self.slots[idx] = rows
+
+    def append(self, rows):
+        self.header[SEQ] += 1
+        try:
+            count = int(self.header[COUNT])
+            rows = rows[-self.capacity :]
+            self._write(rows, count)
+            self.header[COUNT] = count + len(rows)
+        finally:
+            self.header[SEQ] += 1
+
+    def upsert(self, rows, key="time"):
+        """
+        Añade registros ordenados por `key`; el que coincide con el último
+        publicado (la vela en formación) se sobrescribe en su sitio.
+        """
+        self.header[SEQ] += 1
+        try:
+            count = int(self.header[COUNT])
+            if count:
+                last = self.slots[(count - 1) % self.capacity][key]
+                rows = rows[rows[key] >= last]
+                if len(rows) and rows[key][0] == last:
+                    self.slots[(count - 1) % self.capacity] = rows[0]
+                    rows = rows[1:]
+            rows = rows[-self.capacity :]
+            self._write(rows, count)
+            self.header[COUNT] = count + len(rows)
+        finally:
+            self.header[SEQ] += 1
+
+    def touch(self):
+        self.header[HEARTBEAT] = time.time_ns()
+
+    def close(self):
+        # Soltar las vistas antes de cerrar el mmap
+        self.header = self.slots = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # =============================
+    # LECTURA
+    # =============================
+    @property
+    def seq(self):
+        return int(self.header[SEQ])
+
+    @property
+    def count(self):
+        return int(self.header[COUNT])
+
+    def last_key(self, key="time"):
+        """Último valor de `key` leído directamente del segmento, sin copia."""
+        while True:
+            s1 = self.seq
+            count = int(self.header[COUNT])
+            value = self.slots[(count - 1) % self.capacity][key] if count else None
+            if not s1 & 1 and self.seq == s1:
+                return value
+
+    def read(self, n):
+        """Últimos `n` registros (copia consistente, validada por seqlock)."""
+        while True:
+            s1 = self.seq
+            if s1 & 1:
+                continue
+            count = int(self.header[COUNT])
+            n = min(n, count, self.capacity)
+            start = (count - n) % self.capacity
+            if start + n <= self.capacity:
+                out = self.slots[start : start + n].copy()
+            else:
+                out = np.concatenate([self.slots[start:], self.slots[: start + n - self.capacity]])
+            if self.seq == s1:
+                return out
+
+    def heartbeat_age(self):
+        return (time.time_ns() - int(self.header[HEARTBEAT])) / 1e9
+
+    def wait(self, last_seq, timeout=1.0, max_delay=0.0002):
+        """
+        Espera a que el escritor publique algo después de `last_seq`.
+        Sondeo con espera corta: no hay primitiva de notificación entre
+        procesos portable a Windows, y `max_delay` acota la latencia.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.00002
+        while time.monotonic() < deadline:
+            seq = self.seq
+            if seq != last_seq and not seq & 1:
+                return seq
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+        return None
+
+
+class SeqlockTable:
+    """
+    Tabla de tamaño fijo en memoria compartida que se reemplaza entera en
+    cada publicación (snapshots). Mismo protocolo seqlock que SeqlockRing;
+    COUNT guarda las filas válidas de la última publicación.
+    """
+
+    def __init__(self, name, dtype, capacity=None, create=False):
+        self.ring = SeqlockRing(name, dtype, capacity, create)
+        self.name = name
+        self.capacity = self.ring.capacity
+
+    @property
+    def seq(self):
+        return self.ring.seq
+
+    def publish(self, rows):
+        ring = self.ring
+        ring.header[SEQ] += 1
+        try:
+            rows = rows[: self.capacity]
+            ring.slots[: len(rows)] = rows
+            ring.header[COUNT] = len(rows)
+        finally:
+            ring.header[SEQ] += 1
+
+    def read(self):
+        ring = self.ring
+        while True:
+            s1 = ring.seq
+            if s1 & 1:
+                continue
+            out = ring.slots[: int(ring.header[COUNT])].copy()
+            if ring.seq == s1:
+                return out
+
+    def touch(self):
+        self.ring.touch()
+
+    def heartbeat_age(self):
+        return self.ring.heartbeat_age()
+
+    def close(self):
+        self.ring.close()
+
+
+def ring_name(prefix, symbol, key):
+    return f"{prefix}_{symbol}_{key}"
+
+
+class MarketDataBus:
+    """Lado publicador: un ring de velas por timeframe y otro de ticks."""
+
+    def __init__(self, symbol, timeframes, bars=500, ticks=4096, prefix="mdbus"):
+        self.symbol = symbol
+        self.bars = {
+            tf: SeqlockRing(ring_name(prefix, symbol, tf), RATES_DTYPE, bars, create=True)
+            for tf in timeframes
+        }
+        self.ticks = SeqlockRing(ring_name(prefix, symbol, "ticks"), TICK_DTYPE, ticks, create=True)
+
+    def last_bar_time(self, timeframe):
+        ring = self.bars[timeframe]
+        return int(ring.last_key()) if ring.count else None
+
+    def publish_rates(self, timeframe, rates):
+        self.bars[timeframe].upsert(np.asarray(rates).astype(RATES_DTYPE, copy=False))
+
+    def publish_tick(self, tick):
+        row = np.array(
+            [(tick.time_msc, tick.bid, tick.ask, tick.last, tick.volume)], dtype=TICK_DTYPE
+        )
+        self.ticks.upsert(row, key="time_msc")
+
+    def heartbeat(self):
+        self.ticks.touch()
+
+    def close(self):
+        for ring in self.bars.values():
+            ring.close()
+        self.ticks.close()
+
+
+class MarketDataReader:
+    """
+    Lado de los bots. Se conecta perezosamente a los rings del daemon y
+    devuelve None si no está corriendo o sus datos están viejos, para que
+    el bot recurra al broker. Con el heartbeat viejo suelta los rings: si
+    el daemon se reinicia crea segmentos nuevos y el lector se vuelve a
+    conectar a ellos pasados `retry_every` segundos.
+    """
+
+    def __init__(self, symbol, prefix="mdbus", stale_after=5.0, retry_every=10.0):
+        self.symbol = symbol
+        self.prefix = prefix
+        self.stale_after = stale_after
+        self.retry_every = retry_every
+        self._rings = {}
+        self._next_try = {}
+
+    def _ring(self, key, dtype):
+        ring = self._rings.get(key)
+        if ring is not None:
+            return ring
+        now = time.monotonic()
+        if now < self._next_try.get(key, 0):
+            return None
+        try:
+            ring = SeqlockRing(ring_name(self.prefix, self.symbol, key), dtype)
+        except FileNotFoundError:
+            self._next_try[key] = now + self.retry_every
+            return None
+        logger.info(f"Conectado al bus de datos {ring.name}")
+        self._rings[key] = ring
+        return ring
+
+    def _detach(self):
+        retry = time.monotonic() + self.retry_every
+        for key, ring in self._rings.items():
+            ring.close()
+            self._next_try[key] = retry
+        if self._rings:
+            logger.info(f"Bus de datos {self.prefix}_{self.symbol} sin heartbeat; desconectado")
+        self._rings = {}
+
+    def alive(self):
+        ticks = self._ring("ticks", TICK_DTYPE)
+        if ticks is None:
+            return False
+        if ticks.heartbeat_age() < self.stale_after:
+            return True
+        # Daemon caído o reiniciado sobre segmentos nuevos: soltar los viejos
+        self._detach()
+        return False
+
+    def rates(self, timeframe, n):
+        if not self.alive():
+            return None
+        ring = self._ring(timeframe, RATES_DTYPE)
+        if ring is None or ring.count < n:
+            return None
+        return ring.read(n)
+
+    def tick(self):
+        if not self.alive():
+            return None
+        ticks = self._rings["ticks"]
+        if not ticks.count:
+            return None
+        return Tick(*ticks.read(1)[0].tolist())
+
+    def wait(self, last_seq=None, timeout=1.0):
+        """Bloquea hasta el siguiente tick publicado; devuelve la nueva secuencia."""
+        if not self.alive():
+            time.sleep(timeout)
+            return None
+        ticks = self._rings["ticks"]
+        return ticks.wait(ticks.seq if last_seq is None else last_seq, timeout)
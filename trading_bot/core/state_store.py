@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """
+    Almacén clave/valor persistente para el estado de los bots.
+    - Cada cambio se añade a un WAL (append-only) con CRC por línea.
+    - Al arrancar se carga el snapshot y se reaplica el WAL; una línea
+      cortada por un crash se descarta y el WAL se trunca en ese punto.
+    - Cada `compact_every` escrituras el estado se vuelca a un snapshot
+      atómico (tmp + fsync + rename) y el WAL se vacía.
+    """
+
+    def __init__(self, name, directory="trading_bot/data/state", compact_every=500, fsync=True):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snap_path = os.path.join(directory, f"{name}.snap")
+        self.wal_path = os.path.join(directory, f"{name}.wal")
+        self.compact_every = compact_every
+        self.fsync = fsync
+
+        self.state = {}
+        self._wal_records = 0
+        self._lock = threading.Lock()
+
+        self._load()
+        self._wal = open(self.wal_path, "ab")
+
+    # =============================
+    # LECTURA / ESCRITURA
+    # =============================
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def put(self, key, value):
+        with self._lock:
+            self.state[key] = value
+            self._append({"k": key, "v": value})
+
+    def delete(self, key):
+        with self._lock:
+            # Un valor None también se borra del WAL
+            if key in self.state:
+                del self.state[key]
+                self._append({"k": key, "d": 1})
+
+    def close(self):
+        with self._lock:
+            self._wal.close()
+
+    # =============================
+    # WAL
+    # =============================
+    @staticmethod
+    def _encode(record):
+        payload = json.dumps(record, separators=(",", ":")).encode()
+        return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+    def _append(self, record):
+        self._wal.write(self._encode(record))
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_records += 1
+        if self._wal_records >= self.compact_every:
+            self._compact()
+
+    def _apply(self, record):
+        if record.get("d"):
+            self.state.pop(record["k"], None)
+        else:
+            self.state[record["k"]] = record["v"]
+
+    def _load(self):
+        if os.path.exists(self.snap_path):
+            with open(self.snap_path, "rb") as f:
+                self.state = json.loads(f.read() or b"{}")
+
+        if not os.path.exists(self.wal_path):
+            return
+
+        good_offset = 0
+        with open(self.wal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                crc, _, payload = line.rstrip(b"\n").partition(b" ")
+                try:
+                    if int(crc, 16) != zlib.crc32(payload):
+                        break
+                    self._apply(json.loads(payload))
+                except ValueError:
+                    break
+                good_offset += len(line)
+                self._wal_records += 1
+
+        if good_offset < os.path.getsize(self.wal_path):
+            logger.warning(
+                f"WAL {self.wal_path} con registro incompleto, truncando en {good_offset} bytes"
+            )
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(good_offset)
+
+    # =============================
+    # COMPACTACIÓN
+    # =============================
+    def _compact(self):
+        tmp_path = self.snap_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(self.state, separators=(",", ":")).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snap_path)
+        self._fsync_dir()
+
+        # Si caemos aquí antes de truncar, reaplicar el WAL es idempotente
+        self._wal.close()
+        self._wal = open(self.wal_path, "wb")
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_records = 0
+        logger.debug(f"Estado compactado en {self.snap_path}")
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _fsync_dir(self):
+        # No disponible en Windows: el rename ya es atómico allí
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
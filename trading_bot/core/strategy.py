@@ -0,0 +1,140 @@
+"""
+Base de las estrategias del motor de eventos (core/engine.py).
+
+Una estrategia sólo decide: declara sus indicadores incrementales en
+`setup` y reacciona a eventos. Conexión, datos, programación del bucle,
+envío de órdenes, métricas y persistencia son cosa del motor, así que
+cualquier mejora ahí la reciben todas las estrategias.
+
+    class MiEstrategia(Strategy):
+        magic = 999100
+
+        def setup(self):
+            self.fast = self.indicator("ema", 9)
+
+        def on_bar(self, bar):
+            if self.fast.value > bar["close"] and not self.positions():
+                self.buy(sl=..., tp=...)
+"""
+
+import logging
+from collections import namedtuple
+
+# event: "open" (orden propia ejecutada) o "close" (cerrada por nosotros o
+# por SL/TP en el broker). price es el de ejecución o el último conocido.
+Fill = namedtuple("Fill", "event ticket direction volume price sl tp reason")
+
+
+class Strategy:
+    """
+    - on_bar(bar): una vez por vela cerrada del timeframe principal, con
+      los indicadores ya actualizados con esa vela.
+    - on_tick(tick): cada `tick_interval` segundos si está definido.
+    - on_fill(fill): al abrirse o cerrarse una posición de la estrategia.
+    Las posiciones propias se reconocen por `magic`.
+    """
+
+    magic = 0
+    timeframe = "H1"
+    tick_interval = None  # segundos entre on_tick; None = sin ticks
+    warmup = 100  # velas cerradas para sembrar los indicadores
+
+    def __init__(
+        self, symbol, timeframe=None, lot=0.01, max_positions=1, magic=None, **params
+    ):
+        self.symbol = symbol
+        self.timeframe = timeframe or self.timeframe
+        self.lot = lot
+        self.max_positions = max_positions
+        self.magic = magic if magic is not None else self.magic
+        self.name = params.pop("name", type(self).__name__)
+        self.params = params
+        self.engine = None
+        self.log = logging.getLogger(f"strategy.{self.name}")
+        self._timeframes = {self.timeframe}
+
+    # =============================
+    # DECLARACIÓN
+    # =============================
+    def bind(self, engine):
+        """Lo llama el motor al registrar la estrategia; después, setup()."""
+        self.engine = engine
+        self.setup()
+
+    def setup(self):
+        """Parámetros e indicadores (`self.indicator`) de la estrategia."""
+
+    def indicator(self, kind, *params, timeframe=None):
+        """
+        Nodo del grafo de indicadores del motor (core/indicator_graph.py):
+        si otra estrategia ya pidió el mismo (símbolo, timeframe, tipo,
+        parámetros) se comparte. El motor lo actualiza con cada vela cerrada
+        de `timeframe` (por defecto el principal) antes de llamar a on_bar.
+        Es de sólo lectura para la estrategia.
+        """
+        timeframe = timeframe or self.timeframe
+        self._timeframes.add(timeframe)
+        return self.engine.indicators.add(self.symbol, timeframe, kind, *params)
+
+    def timeframes(self):
+        return set(self._timeframes)
+
+    # =============================
+    # EVENTOS
+    # =============================
+    def on_start(self):
+        pass
+
+    def on_bar(self, bar):
+        pass
+
+    def on_tick(self, tick):
+        pass
+
+    def on_fill(self, fill):
+        pass
+
+    # =============================
+    # ESTADO PERSISTENTE
+    # =============================
+    def to_state(self):
+        """Estado serializable a JSON que el motor guarda tras cada evento."""
+        return None
+
+    def load_state(self, state):
+        pass
+
+    # =============================
+    # ACCESO AL MOTOR
+    # =============================
+    def bars(self, n, timeframe=None, forming=False):
+        return self.engine.bars(self.symbol, timeframe or self.timeframe, n, forming)
+
+    def tick(self):
+        return self.engine.tick(self.symbol)
+
+    def positions(self):
+        return self.engine.positions(self)
+
+    def can_open(self):
+        return len(self.positions()) < self.max_positions
+
+    def buy(self, sl=0.0, tp=0.0, lot=None):
+        return self.engine.open(self, "buy", lot or self.lot, sl, tp)
+
+    def sell(self, sl=0.0, tp=0.0, lot=None):
+        return self.engine.open(self, "sell", lot or self.lot, sl, tp)
+
+    def close(self, position, reason=""):
+        return self.engine.close(self, position, reason)
+
+    def flatten(self, reason=""):
+        """Cierra todas las posiciones de la estrategia a la vez."""
+        return self.engine.flatten(self, reason)
+
+    def reverse(self, direction, sl=0.0, tp=0.0, lot=None, reason=""):
+        """Cierra las posiciones y abre `direction` en un solo viaje."""
+        return self.engine.reverse(self, direction, lot or self.lot, sl, tp, reason)
+
+    def modify(self, position, sl=None, tp=None, reason=""):
+        return self.engine.modify(self, position, sl, tp, reason)
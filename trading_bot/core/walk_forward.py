@@ -0,0 +1,173 @@
+"""
+Optimización walk-forward: ventanas in-sample/out-of-sample deslizantes
+sobre el histórico del BarStore. Cada ventana in-sample se optimiza en un
+proceso distinto y los tramos out-of-sample se encadenan en una única
+curva de equity.
+
+Los indicadores se calculan una vez sobre todo el histórico y cada worker
+guarda en caché las señales por combinación de parámetros de señal, de modo
+que las ventanas solapadas sólo recortan arrays ya calculados.
+"""
+
+import itertools
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.backtest import TRADE_DTYPE, score, simulate, summary
+
+WalkForwardResult = namedtuple("WalkForwardResult", "windows trades equity")
+
+# Estado por proceso (se rellena en el initializer del pool)
+_worker = {}
+
+
+def windows(n, train, test, step=None, warmup=0, anchored=False):
+    """Lista de ((ini, fin) in-sample, (ini, fin) out-of-sample) en índices de vela."""
+    step = step or test
+    out = []
+    start = warmup
+    while start + train + test <= n:
+        is_start = warmup if anchored else start
+        out.append(((is_start, start + train), (start + train, start + train + test)))
+        start += step
+    return out
+
+
+def expand_grid(grid):
+    keys = sorted(grid)
+    return [
+        dict(zip(keys, values))
+        for values in itertools.product(*(grid[k] for k in keys))
+    ]
+
+
+# =============================
+# WORKER
+# =============================
+def _init_worker(strategy, rates, indicators, grid, cost, metric, min_trades):
+    _worker.update(
+        strategy=strategy,
+        rates=rates,
+        indicators=indicators,
+        grid=grid,
+        cost=cost,
+        metric=metric,
+        min_trades=min_trades,
+        signals={},
+    )
+
+
+def _signals(params):
+    strategy = _worker["strategy"]
+    key = tuple(params[name] for name in strategy.signal_params)
+    cache = _worker["signals"]
+    if key not in cache:
+        cache[key] = strategy.signals(_worker["rates"], _worker["indicators"], params)
+    return cache[key]
+
+
+def _run(params, start, end):
+    return simulate(
+        _worker["rates"],
+        _signals(params),
+        _worker["indicators"]["atr"],
+        params["sl_atr_mult"],
+        params["tp_atr_mult"],
+        start,
+        end,
+        _worker["cost"],
+    )
+
+
+def _optimize(window):
+    start, end = window
+    best_score, best_params = -np.inf, None
+    for params in _worker["grid"]:
+        value = score(
+            _run(params, start, end), _worker["metric"], _worker["min_trades"]
+        )
+        if best_params is None or value > best_score:
+            best_score, best_params = value, params
+    return best_score, best_params
+
+
+# =============================
+# MOTOR
+# =============================
+def walk_forward(
+    rates,
+    strategy,
+    grid,
+    train=2000,
+    test=500,
+    step=None,
+    warmup=200,
+    anchored=False,
+    metric="profit_factor",
+    min_trades=10,
+    cost=0.0,
+    workers=None,
+):
+    """
+    Optimiza `grid` (dict parámetro -> valores) en cada ventana in-sample y
+    evalúa la mejor combinación en la out-of-sample siguiente.
+    `workers=1` ejecuta todo en el proceso actual.
+    """
+    rates = np.asarray(rates)
+    splits = windows(len(rates), train, test, step, warmup, anchored)
+    if not splits:
+        raise ValueError(
+            f"Histórico insuficiente: {len(rates)} velas para train={train} test={test}"
+        )
+
+    combos = [{**strategy.defaults, **params} for params in expand_grid(grid)]
+    # Agrupar por parámetros de señal: cada señal se calcula una vez por worker
+    combos.sort(key=lambda p: tuple(p[k] for k in strategy.signal_params))
+    indicators = strategy.prepare(rates)
+    setup = (strategy, rates, indicators, combos, cost, metric, min_trades)
+
+    in_sample = [is_window for is_window, _ in splits]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(*setup)
+        best = [_optimize(w) for w in in_sample]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(splits)),
+            initializer=_init_worker,
+            initargs=setup,
+        ) as pool:
+            best = list(pool.map(_optimize, in_sample))
+        _init_worker(*setup)
+
+    results = []
+    all_trades = []
+    for ((is_start, is_end), (oos_start, oos_end)), (is_score, params) in zip(
+        splits, best
+    ):
+        trades = _run(params, oos_start, oos_end)
+        all_trades.append(trades)
+        results.append(
+            {
+                "in_sample": (
+                    int(rates["time"][is_start]),
+                    int(rates["time"][is_end - 1]),
+                ),
+                "out_of_sample": (
+                    int(rates["time"][oos_start]),
+                    int(rates["time"][oos_end - 1]),
+                ),
+                "params": params,
+                "in_sample_score": is_score,
+                **summary(trades),
+            }
+        )
+
+    trades = (
+        np.concatenate(all_trades) if all_trades else np.empty(0, dtype=TRADE_DTYPE)
+    )
+    _worker.clear()
+    return WalkForwardResult(results, trades, np.cumsum(trades["pnl"]))
@@ -0,0 +1,90 @@
+"""
+Descarga de histórico al BarStore (core/history.py).
+
+Uso (desde la raíz del repo):
+    python trading_bot/download_history.py --symbols XAUUSD EURUSD --timeframes M1 H1
+    python trading_bot/download_history.py --since 2018-01-01 --until 2024-01-01
+    python trading_bot/download_history.py --source binance --symbols BTCUSDT --timeframes M1 M5
+
+Vuelve a ejecutarse sin cambios para ponerse al día: retoma desde la última
+vela guardada de cada serie.
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timezone
+
+import cfg.config as config
+from core.bar_store import TIMEFRAME_SECONDS, BarStore
+from core.history import BinanceSource, HistoryDownloader, Mt5Source
+
+
+def _epoch(text):
+    return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _date(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def _source(name):
+    if name == "mt5":
+        from core.connection import Mt5Supervisor
+
+        Mt5Supervisor(config.broker, "download_history").connect()
+        return Mt5Source()
+    from core.binance_client import FuturesClient, WeightLimiter
+
+    limits = config.binance_limits
+    client = FuturesClient(
+        config.binance_api["api_key"],
+        config.binance_api["api_secret"],
+        # Sólo lectura de velas públicas: siempre el histórico real
+        base_url="https://fapi.binance.com",
+        limiter=WeightLimiter(limits["weight_per_minute"], limits["safety"]),
+        pool_size=limits["pool_size"],
+        max_retries=limits["max_retries"],
+    )
+    return BinanceSource(client)
+
+
+def main():
+    cfg = config.history
+    parser = argparse.ArgumentParser(description="Descarga de histórico")
+    parser.add_argument("--source", choices=("mt5", "binance"), default="mt5")
+    parser.add_argument("--symbols", nargs="+", default=["XAUUSD", "EURUSD"])
+    parser.add_argument(
+        "--timeframes", nargs="+", default=["M1"], choices=list(TIMEFRAME_SECONDS)
+    )
+    parser.add_argument("--since", type=_epoch, default=_epoch(cfg["since"]))
+    parser.add_argument("--until", type=_epoch, help="YYYY-MM-DD (UTC); ahora si no")
+    parser.add_argument("--workers", type=int, default=cfg["workers"])
+    parser.add_argument("--dir", default=config.bar_store["dir"])
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+
+    source = _source(args.source)
+    downloader = HistoryDownloader(BarStore(args.dir), workers=args.workers)
+    jobs = [(source, s, tf) for s in args.symbols for tf in args.timeframes]
+    reports = downloader.download(jobs, args.since, args.until)
+
+    for r in reports:
+        span = "sin datos" if r.first is None else f"{_date(r.first)} → {_date(r.last)}"
+        print(
+            f"{r.source} {r.symbol} {r.timeframe}: +{r.added} velas en "
+            f"{r.chunks} tramos ({r.seconds:.1f}s) | {span} | "
+            f"{r.issues or 'sin problemas'}" + (" | INCOMPLETA" if r.failed else "")
+        )
+    if any(r.failed for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
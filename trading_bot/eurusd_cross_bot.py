@@ -1,10 +1,22 @@
 import MetaTrader5 as mt5
 import pandas as pd
-import time
 import logging
 import numpy as np
 import os
 import cfg.config as config
+import core.execution as execution
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.state_store import StateStore
+from core.bar_cache import BarCache
+from core.bar_quality import BarValidator
+from core.market_data import last_bar_time, rates_to_frame
+from core.shm_bus import MarketDataReader
+from core.position_bus import reader_for
+from core.journal import open_journal
+from core.ledger import PositionLedger
+from core.market_hours import calendar_for, wait_for_open
 
 filename = os.path.basename(__file__).replace(".py", "")
 logging.basicConfig(
@@ -20,6 +32,13 @@ logger = logging.getLogger(__name__)
 
 class GoldTrendBot:
     def __init__(self):
+        self.profiler = LoopProfiler(filename, **config.profiling)
+        self.metrics = BotMetrics(filename)
+        self.journal = open_journal(filename)
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics, config.metrics["host"], config.metrics["ports"][filename]
+            ).start()
         self.symbol = config.bot_eurusd["symbol"]  # "EURUSD"
         self.timeframe = mt5.TIMEFRAME_H1
         self.max_open_positions = config.bot_eurusd["max_positions"]
@@ -28,25 +47,108 @@ class GoldTrendBot:
         self.login = config.broker["login"]
         self.password = config.broker["password"]
         self.server = config.broker["server"]
+        # Reconexión con espera creciente en lugar de caer o dormir a ciegas
+        self.link = Mt5Supervisor(
+            {"login": self.login, "password": self.password, "server": self.server},
+            filename,
+            self.metrics,
+        )
+
+        self.ledger = PositionLedger()
+
+        # Dormir con el mercado cerrado (fin de semana, pausa diaria, festivos)
+        self.market = (
+            calendar_for(self.symbol) if config.market_hours["enabled"] else None
+        )
+
+        # Estado persistente (sobrevive a reinicios del proceso)
+        self.store = StateStore(
+            filename,
+            directory=config.state["dir"],
+            compact_every=config.state["compact_every"],
+        )
+        # Velas validadas (huecos, duplicados, rangos, atípicos) al llegar
+        self.bars = BarCache(
+            maxlen=config.state["bars_window"],
+            validator=BarValidator(self.symbol, "H1", metrics=self.metrics),
+        )
+
+        # Datos desde market_data_daemon.py si está activo
+        self.bus = (
+            MarketDataReader(
+                self.symbol,
+                prefix=config.market_bus["prefix"],
+                stale_after=config.market_bus["stale_after"],
+            )
+            if config.market_bus["enabled"]
+            else None
+        )
+
+        # Posiciones desde el snapshot compartido si está activo
+        self.positions_bus = reader_for(self.login)
 
-        self.initial_targets = {}
+    def prewarm(self):
+        """Antes de la apertura: reconectar si hace falta y cargar velas."""
+        if not self.link.ensure():
+            return
+        self.get_rates(n=100)
 
     def connect(self):
-        if not mt5.initialize(
-            login=self.login, password=self.password, server=self.server
-        ):
-            logger.error("Error al inicializar MetaTrader 5")
-            raise RuntimeError("MT5 no se pudo inicializar")
-        logger.info("Conexión establecida correctamente")
+        self.link.connect(sleep=self.metrics.sleep)
 
-    def get_data(self, n=100):
-        rates = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, n)
+    def restore_state(self):
+        # "initial_targets": formato anterior {ticket: {entry, sl, tp}}
+        self.ledger.load_state(
+            self.store.get("ledger", self.store.get("initial_targets"))
+        )
+        self.bars.load_rows(self.store.get("bars"))
+
+        # Descartar tickets que ya no están abiertos
+        if self.ledger.sync(self.get_positions()) or self.store.get("initial_targets"):
+            self.save_state()
+
+        logger.info(
+            f"Estado restaurado: {len(self.ledger)} posiciones gestionadas, "
+            f"{len(self.bars)} velas en caché"
+        )
+
+    def save_state(self):
+        self.store.put("ledger", self.ledger.to_state())
+        self.store.delete("initial_targets")
+
+    def get_rates(self, n=100):
+        if self.bus:
+            rates = self.bus.rates(self.timeframe, n)
+            if rates is not None and self.bars.update(rates):
+                return self.bars.tail(n)
+
+        # Si la caché tiene suficientes velas, basta con pedir las últimas
+        if len(self.bars) >= n:
+            rates = self.metrics.call(
+                mt5.copy_rates_from_pos, self.symbol, self.timeframe, 0, 3
+            )
+            if (
+                rates is not None
+                and self.bars.covers(rates)
+                and self.bars.update(rates)
+            ):
+                return self.bars.tail(n)
+
+        rates = self.metrics.call(
+            mt5.copy_rates_from_pos, self.symbol, self.timeframe, 0, n
+        )
         if rates is None:
             logger.warning("No se pudieron obtener datos del símbolo.")
             return None
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s")
-        return df
+        if not self.bars.update(rates):
+            return None
+        return self.bars.tail(n)
+
+    def get_data(self, n=100):
+        rates = self.get_rates(n)
+        if rates is None:
+            return None
+        return rates_to_frame(rates)
 
     def calc_atr(self, df, period=14):
         high_low = df["high"] - df["low"]
@@ -142,7 +244,7 @@ class GoldTrendBot:
             return False
 
         atr = self.calc_atr(df, 14)
-        tick = mt5.symbol_info_tick(self.symbol)
+        tick = execution.tick(self.symbol)
         if tick is None:
             logger.error("No se pudo obtener información de tick.")
             return False
@@ -161,6 +263,9 @@ class GoldTrendBot:
             tp = price - atr * atr_tp_mult
             order_type = mt5.ORDER_TYPE_SELL
 
+        if not self.positions_bus.check_exposure(self.symbol, direction, self.lot):
+            return False
+
         request = {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": self.symbol,
@@ -169,18 +274,19 @@ class GoldTrendBot:
             "price": price,
             "sl": sl,
             "tp": tp,
-            "deviation": 50,
             "magic": 999001,
             "comment": "GoldTrendBot",
-            "type_filling": mt5.ORDER_FILLING_IOC,
         }
 
         logger.info(f"Petición de orden: {request}")
-        result = mt5.order_send(request)
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "EurusdTrendBot")
 
         if result and result.retcode == mt5.TRADE_RETCODE_DONE:
             ticket = result.order
-            self.initial_targets[ticket] = {"entry": price, "sl": sl, "tp": tp}
+            self.ledger.add(ticket, direction, price, sl, tp, self.lot)
+            self.save_state()
             logger.info(
                 f"Orden {direction.upper()} abierta correctamente. Precio {price:.2f} | SL {sl:.2f} | TP {tp:.2f}"
             )
@@ -189,12 +295,17 @@ class GoldTrendBot:
             logger.error(f"Error al abrir orden ({direction}): {result}")
             return False
 
+    def get_positions(self):
+        positions = self.positions_bus.positions_or_live(self.symbol)
+        return self.journal.sync(positions, "EurusdTrendBot", magic=999001)
+
     def count_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = self.get_positions()
         if positions is None:
             logger.warning("No se pudieron obtener posiciones abiertas.")
             return 0
         count = len(positions)
+        self.metrics.positions(count)
         logger.info(f"Posiciones abiertas en {self.symbol}: {count}")
         return count
 
@@ -206,74 +317,76 @@ class GoldTrendBot:
             "sl": new_sl,
             "tp": position.tp,
         }
-        result = mt5.order_send(request)
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "EurusdTrendBot", reason)
         if result and result.retcode == mt5.TRADE_RETCODE_DONE:
             logger.info(f"{reason}: Pos {position.ticket} | SL {new_sl:.2f}")
-        else:
-            logger.error(f"Error al actualizar SL ({reason}): {result}")
+            return True
+        logger.error(f"Error al actualizar SL ({reason}): {result}")
+        return False
 
     def manage_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
-        if not positions:
+        positions = self.get_positions()
+        if positions is None:
+            return
+        # Las posiciones cerradas salen del registro (las de otros bots no están)
+        if self.ledger.sync(positions):
+            self.save_state()
+        if not len(self.ledger):
+            return
+        tick = execution.tick(self.symbol)
+        if tick is None:
             return
 
-        for pos in positions:
-            if pos.comment != "GoldTrendBot":
-                continue
-
-            info = self.initial_targets.get(pos.ticket)
-            if not info:
-                continue
-
-            entry_price, tp = info["entry"], info["tp"]
-            current_price = pos.price_current
-            total_target = abs(tp - entry_price)
-            current_gain = (
-                (current_price - entry_price)
-                if pos.type == 0
-                else (entry_price - current_price)
-            )
-            if current_gain <= 0:
-                continue
-
-            progress = current_gain / total_target
-
-            if progress >= 0.5 and (
-                (pos.type == 0 and pos.sl < entry_price)
-                or (pos.type == 1 and pos.sl > entry_price)
-            ):
-                self.update_sl(pos, entry_price, "SL -> BREAKEVEN")
-
-            if progress > 0.5:
-                atr = self.calc_atr(self.get_data(20), 14)
-                if pos.type == 0:
-                    new_sl = current_price - atr * 0.5
-                    if new_sl > pos.sl:
-                        self.update_sl(pos, new_sl, "TRAILING")
-                else:
-                    new_sl = current_price + atr * 0.5
-                    if new_sl < pos.sl:
-                        self.update_sl(pos, new_sl, "TRAILING")
+        # Breakeven al 50% del recorrido al TP y trailing a 0.5 ATR después
+        _, gain, progress = self.ledger.progress(tick.bid, tick.ask)
+        offset = None
+        if np.any((gain > 0) & (progress > 0.5)):
+            offset = self.calc_atr(self.get_data(20), 14) * 0.5
+        by_ticket = {pos.ticket: pos for pos in positions}
+        for ticket, sl, reason in self.ledger.stops(tick.bid, tick.ask, 0.5, offset):
+            if self.update_sl(by_ticket[ticket], sl, reason):
+                self.ledger.set_stop(ticket, sl)
 
     def run(self):
         self.connect()
+        self.restore_state()
         logger.info("GoldTrendBot iniciado")
 
-        last_check_time = None
+        last_check_time = self.store.get("last_check_time")
 
         while True:
+            self.profiler.tick()
+            self.metrics.loop()
             try:
-                df = self.get_data(n=5)
-                if df is None:
+                if self.market and not self.market.is_open():
+                    wait_for_open(
+                        self.market,
+                        config.market_hours["prewarm"],
+                        warm=self.prewarm,
+                        sleep=self.metrics.sleep,
+                    )
+                    continue
+                if not self.link.ensure():
+                    self.metrics.sleep(self.link.retry_in())
+                    continue
+                rates = self.get_rates(n=5)
+                if rates is None:
                     logger.warning("Datos no disponibles, esperando...")
-                    time.sleep(30)
+                    # Si es un corte, reconectar ya en lugar de dormir a ciegas
+                    if self.link.probe(force=True):
+                        self.metrics.sleep(30)
                     continue
 
-                current_time = df["time"].iloc[-1]
+                current_time = last_bar_time(rates)
                 self.manage_positions()
 
                 if current_time != last_check_time:
                     last_check_time = current_time
+                    self.metrics.bar(current_time)
+                    self.store.put("last_check_time", current_time)
+                    self.store.put("bars", self.bars.to_rows())
 
                     open_positions = self.count_positions()
                     logger.info(
@@ -284,7 +397,7 @@ class GoldTrendBot:
                         logger.info(
                             "Máximo de posiciones abiertas alcanzado, no se abrirán nuevas."
                         )
-                        time.sleep(30)
+                        self.metrics.sleep(30)
                         continue
 
                     signal = self.check_signal()
@@ -299,14 +412,15 @@ class GoldTrendBot:
                             "Ninguna señal válida encontrada en esta comprobación."
                         )
 
-                time.sleep(30)
+                self.metrics.sleep(30)
 
             except KeyboardInterrupt:
                 logger.info("Bot detenido manualmente por el usuario.")
                 break
             except Exception as e:
                 logger.error(f"Error inesperado: {e}", exc_info=True)
-                time.sleep(60)
+                if self.link.probe(force=True):
+                    self.metrics.sleep(60)
 
         logger.info("GoldTrendBot finalizado.")
 
@@ -1,10 +1,19 @@
 import MetaTrader5 as mt5
 import pandas as pd
-import time
 import logging
-from datetime import datetime
 import numpy as np
 import cfg.config as config
+import core.clock as clock
+import core.execution as execution
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.market_data import last_bar_time, rates_to_frame
+from core.indicators import RSI
+from core.shm_bus import MarketDataReader
+from core.position_bus import reader_for
+from core.journal import open_journal
+from core.market_hours import calendar_for, seconds_until_hours, wait_for_open
 
 # ----------------------------
 # Configuración de logging
@@ -13,17 +22,25 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[
-        logging.FileHandler("trading-bot/logs/trading_bot.log", mode="a"),
+        logging.FileHandler("trading_bot/logs/trading_bot.log", mode="a"),
         logging.StreamHandler(),
     ],
 )
 logger = logging.getLogger(__name__)
 
-CSV_FILE = "trading-bot/data/trades.csv"
-
 
 class FibonacciBot:
     def __init__(self):
+        self.profiler = LoopProfiler("gold_fibonacci_bot", **config.profiling)
+        self.metrics = BotMetrics("gold_fibonacci_bot")
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics,
+                config.metrics["host"],
+                config.metrics["ports"]["gold_fibonacci_bot"],
+            ).start()
+        # Aperturas, cierres y trailing en trading_bot/data/journal
+        self.journal = open_journal("gold_fibonacci_bot")
         self.account_balance = 0
         self.start_equity = 0
 
@@ -39,27 +56,56 @@ class FibonacciBot:
         self.atr_period = config.bot["atr_period"]
         self.session_hours = config.bot["session_hours"]
 
+        # Dormir con el mercado cerrado (fin de semana, pausa diaria, festivos)
+        self.market = (
+            calendar_for(self.symbol) if config.market_hours["enabled"] else None
+        )
+
         # conexión
         self.name = config.broker["name"]
         self.login = config.broker["login"]
         self.password = config.broker["password"]
         self.server = config.broker["server"]
+        # Reconexión con espera creciente en lugar de caer o dormir a ciegas
+        self.link = Mt5Supervisor(
+            {"login": self.login, "password": self.password, "server": self.server},
+            "gold_fibonacci_bot",
+            self.metrics,
+        )
 
         # filtros
         self.conditions = 0
         self.max_conditions = config.bot["max_conditions"]
 
+        # RSI incremental: se siembra una vez y luego O(1) por vela cerrada
+        self.rsi = RSI(config.bot["rsi_period"], config.bot["rsi_method"])
+        self.rsi_time = None  # última vela cerrada incorporada al RSI
+        self.rsi_warmup = config.bot["rsi_warmup"]
+
+        # Datos desde market_data_daemon.py si está activo
+        self.bus = (
+            MarketDataReader(
+                self.symbol,
+                prefix=config.market_bus["prefix"],
+                stale_after=config.market_bus["stale_after"],
+            )
+            if config.market_bus["enabled"]
+            else None
+        )
+
+        # Posiciones desde el snapshot compartido si está activo
+        self.positions_bus = reader_for(self.login)
+
         logger.info(f"FibonacciBot inicializado para {self.symbol}")
 
-    def connect(self, login=None, password=None, server=None):
-        login = login or self.login
-        password = password or self.password
-        server = server or self.server
+    def prewarm(self):
+        """Antes de la apertura: reconectar si hace falta y cargar velas."""
+        if not self.link.ensure():
+            return
+        self.update_rsi(self.get_rates(n=3))
 
-        if not mt5.initialize(login=login, password=password, server=server):
-            logger.error("Error al inicializar MetaTrader 5")
-            raise RuntimeError("MT5 no se pudo inicializar")
-        logger.info(f"Conexión a MetaTrader 5 establecida. Cuenta: {login}")
+    def connect(self):
+        self.link.connect(sleep=self.metrics.sleep)
 
         symbol_info = mt5.symbol_info(self.symbol)
         if symbol_info is None:
@@ -70,12 +116,26 @@ class FibonacciBot:
 
         logger.info(f"Spread actual: {symbol_info.spread} puntos")
 
-    def get_data(self, n=500, timeframe=None):
+    def get_rates(self, n=500, timeframe=None):
         tf = timeframe or self.timeframe
-        rates = mt5.copy_rates_from_pos(self.symbol, tf, 0, n)
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s")
-        return df
+        if self.bus:
+            rates = self.bus.rates(tf, n)
+            if rates is not None:
+                return rates
+        return self.metrics.call(mt5.copy_rates_from_pos, self.symbol, tf, 0, n)
+
+    def get_tick(self):
+        if self.bus:
+            tick = self.bus.tick()
+            if tick is not None:
+                return tick
+        return execution.tick(self.symbol)
+
+    def get_data(self, n=500, timeframe=None):
+        rates = self.get_rates(n, timeframe)
+        if rates is None:
+            return None
+        return rates_to_frame(rates)
 
     def calc_atr(self, df, period=14):
         high_low = df["high"] - df["low"]
@@ -88,6 +148,8 @@ class FibonacciBot:
 
     def check_fibonacci_filter(self):
         df = self.get_data(n=50)
+        if df is None:
+            return None
         swing_period = 5
         df["is_swing_high"] = False
         df["is_swing_low"] = False
@@ -149,15 +211,18 @@ class FibonacciBot:
         return None
 
     def check_trend_filter(self):
-        # Tendencia en 1H
         df_h1 = self.get_data(n=200, timeframe=mt5.TIMEFRAME_H1)
+        df_h4 = self.get_data(n=200, timeframe=mt5.TIMEFRAME_H4)
+        if df_h1 is None or df_h4 is None:
+            return None
+
+        # Tendencia en 1H
         df_h1["EMA20"] = df_h1["close"].ewm(span=20).mean()
         trend_h1 = (
             "buy" if df_h1["close"].iloc[-1] > df_h1["EMA20"].iloc[-1] else "sell"
         )
 
         # Tendencia en 4H
-        df_h4 = self.get_data(n=200, timeframe=mt5.TIMEFRAME_H4)
         df_h4["EMA20"] = df_h4["close"].ewm(span=20).mean()
         trend_h4 = (
             "buy" if df_h4["close"].iloc[-1] > df_h4["EMA20"].iloc[-1] else "sell"
@@ -167,18 +232,33 @@ class FibonacciBot:
             return trend_h1
         return None
 
-    def check_momentum_filter(self):
-        df = self.get_data(n=30)
+    def update_rsi(self, rates):
+        """Incorpora las velas cerradas nuevas; si no enlazan, vuelve a sembrar."""
+        closed = rates[:-1]
+        if self.rsi_time is None or int(closed["time"][0]) > self.rsi_time:
+            history = self.get_rates(n=self.rsi_warmup + 1)
+            if history is None or len(history) < 2:
+                # Sin datos: se vuelve a sembrar en la próxima comprobación
+                return
+            self.rsi.seed(history["close"][:-1])
+            self.rsi_time = last_bar_time(history, closed=True)
+            return
+        for close in closed["close"][closed["time"] > self.rsi_time].tolist():
+            self.rsi.update(close)
+        self.rsi_time = last_bar_time(rates, closed=True)
 
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        last_rsi = rsi.iloc[-1]
+    def check_momentum_filter(self):
+        rates = self.get_rates(n=3)
+        if rates is None or len(rates) < 2:
+            return None
+        self.update_rsi(rates)
+        # Como antes, el RSI incluye la vela en formación al precio actual
+        last_rsi = self.rsi.peek(float(rates["close"][-1]))
+        if last_rsi is None:
+            return None
 
         # Última vela como patrón simple
-        last_candle = df.iloc[-2]  # vela cerrada
+        last_candle = rates[-2]  # vela cerrada
         bullish = last_candle["close"] > last_candle["open"]
         bearish = last_candle["close"] < last_candle["open"]
 
@@ -188,12 +268,16 @@ class FibonacciBot:
             return "sell"
         return None
 
+    def get_positions(self):
+        positions = self.positions_bus.positions_or_live(self.symbol)
+        return self.journal.sync(positions, "FibonacciBot", magic=123456)
+
     def count_open_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = self.get_positions()
         return len(positions) if positions else 0
 
     def place_order(self, action, lot, atr):
-        tick = mt5.symbol_info_tick(self.symbol)
+        tick = execution.tick(self.symbol)
         price = tick.ask if action == "buy" else tick.bid
 
         sl_distance = atr * self.sl_atr_mult
@@ -202,6 +286,9 @@ class FibonacciBot:
         sl = price - sl_distance if action == "buy" else price + sl_distance
         tp = price + tp_distance if action == "buy" else price - tp_distance
 
+        if not self.positions_bus.check_exposure(self.symbol, action, lot):
+            return None
+
         request = {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": self.symbol,
@@ -210,14 +297,17 @@ class FibonacciBot:
             "price": price,
             "sl": sl,
             "tp": tp,
-            "deviation": 50,
             "magic": 123456,
             "comment": "FibonacciBot",
-            "type_filling": mt5.ORDER_FILLING_IOC,
         }
 
-        result = mt5.order_send(request)
-        if result.retcode == mt5.TRADE_RETCODE_DONE:
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "FibonacciBot")
+        if result is None:
+            logger.error(f"{action.upper()} sin respuesta {mt5.last_error()}")
+            self.link.probe(force=True)
+        elif result.retcode == mt5.TRADE_RETCODE_DONE:
             logger.info(
                 f"{action.upper()} ejecutada a {price:.2f} SL:{sl:.2f} TP:{tp:.2f}"
             )
@@ -228,13 +318,18 @@ class FibonacciBot:
         return result
 
     def apply_trailing_stop(self, atr_mult=1.0):
-        positions = mt5.positions_get(symbol=self.symbol)
+        positions = self.get_positions()
         if not positions:
             return
 
-        atr = self.calc_atr(self.get_data(n=100), self.atr_period)
+        df = self.get_data(n=100)
+        if df is None:
+            return
+        tick = self.get_tick()
+        if tick is None:
+            return
+        atr = self.calc_atr(df, self.atr_period)
         for pos in positions:
-            tick = mt5.symbol_info_tick(self.symbol)
             price = tick.bid if pos.type == mt5.POSITION_TYPE_BUY else tick.ask
             new_sl = (
                 price - atr * atr_mult
@@ -252,13 +347,15 @@ class FibonacciBot:
                     "sl": new_sl,
                     "tp": pos.tp,
                 }
-                mt5.order_send(request)
+                result = execution.send(request)
+                self.metrics.order(result)
+                self.journal.order(request, result, "FibonacciBot", "Trailing Stop")
                 logger.info(
                     f"Trailing Stop actualizado: Pos {pos.ticket} -> SL {new_sl:.2f}"
                 )
 
     def in_session_hours(self):
-        now_hour = datetime.now().hour
+        now_hour = clock.now().hour
         return any(start <= now_hour < end for start, end in self.session_hours)
 
     def run(self):
@@ -273,18 +370,40 @@ class FibonacciBot:
         last_processed_time = None
 
         while True:
+            self.profiler.tick()
+            self.metrics.loop()
+            if self.market and not self.market.is_open():
+                wait_for_open(
+                    self.market,
+                    config.market_hours["prewarm"],
+                    warm=self.prewarm,
+                    sleep=self.metrics.sleep,
+                )
+                continue
+            if not self.link.ensure():
+                self.metrics.sleep(self.link.retry_in())
+                continue
             if not self.in_session_hours():
-                logger.info("Fuera de horario de sesión. Bot en pausa.")
-                time.sleep(60)
+                wait = seconds_until_hours(self.session_hours) or 60
+                logger.info(
+                    f"Fuera de horario de sesión. Bot en pausa {wait / 60:.0f} min."
+                )
+                self.metrics.sleep(wait)
                 continue
 
-            df = self.get_data(n=20)
-            last_closed_time = df["time"].iloc[-2]
+            rates = self.get_rates(n=20)
+            if rates is None:
+                # Si es un corte, reconectar ya en lugar de dormir a ciegas
+                if self.link.probe(force=True):
+                    self.metrics.sleep(5)
+                continue
+            last_closed_time = last_bar_time(rates, closed=True)
 
             if last_closed_time != last_processed_time:
                 last_processed_time = last_closed_time
+                self.metrics.bar(last_closed_time)
 
-                atr = self.calc_atr(df, self.atr_period)
+                atr = self.calc_atr(rates_to_frame(rates), self.atr_period)
 
                 cond_fib = self.check_fibonacci_filter()
                 cond_trend = self.check_trend_filter()
@@ -321,7 +440,7 @@ class FibonacciBot:
 
             # trailing stop
             self.apply_trailing_stop(self.trailing_atr_mult)
-            time.sleep(5)
+            self.metrics.sleep(5)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
 import MetaTrader5 as mt5
 import pandas as pd
-import time
 import logging
 from datetime import datetime
 import numpy as np
 import cfg.config as config
+import core.execution as execution
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.market_data import last_bar_time, rates_to_frame
+from core.shm_bus import MarketDataReader
+from core.position_bus import reader_for
+from core.journal import open_journal
+from core.market_hours import calendar_for, wait_for_open
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[
-        logging.FileHandler("trading-bot/logs/trading_bot.log", mode="a"),
+        logging.FileHandler("trading_bot/logs/trading_bot.log", mode="a"),
         logging.StreamHandler(),
     ],
 )
@@ -19,34 +27,76 @@ logger = logging.getLogger(__name__)
 
 class GoldPullbackBot:
     def __init__(self):
+        self.profiler = LoopProfiler("gold_hammer_bot", **config.profiling)
+        self.metrics = BotMetrics("gold_hammer_bot")
+        self.journal = open_journal("gold_hammer_bot")
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics,
+                config.metrics["host"],
+                config.metrics["ports"]["gold_hammer_bot"],
+            ).start()
         # parámetros básicos
         self.symbol = config.bot["symbol"]
         self.timeframe = mt5.TIMEFRAME_M15  # Fijo en M15
         self.lot = config.bot["min_lot"]
         self.max_open_positions = config.bot["max_positions"]
 
+        # Dormir con el mercado cerrado (fin de semana, pausa diaria, festivos)
+        self.market = (
+            calendar_for(self.symbol) if config.market_hours["enabled"] else None
+        )
+
         # conexión
         self.login = config.broker2["login"]
         self.password = config.broker2["password"]
         self.server = config.broker2["server"]
+        # Reconexión con espera creciente en lugar de caer o dormir a ciegas
+        self.link = Mt5Supervisor(
+            {"login": self.login, "password": self.password, "server": self.server},
+            "gold_hammer_bot",
+            self.metrics,
+        )
+
+        # Datos desde market_data_daemon.py si está activo
+        self.bus = (
+            MarketDataReader(
+                self.symbol,
+                prefix=config.market_bus["prefix"],
+                stale_after=config.market_bus["stale_after"],
+            )
+            if config.market_bus["enabled"]
+            else None
+        )
+
+        # Posiciones desde el snapshot compartido si está activo
+        self.positions_bus = reader_for(self.login)
 
         logger.info(f"GoldPullbackBot inicializado - Hammer Strategy")
 
+    def prewarm(self):
+        """Antes de la apertura: reconectar si hace falta y cargar velas."""
+        if not self.link.ensure():
+            return
+        self.get_rates(n=30)
+
     def connect(self):
-        if not mt5.initialize(
-            login=self.login, password=self.password, server=self.server
-        ):
-            logger.error("Error al inicializar MetaTrader 5")
-            raise RuntimeError("MT5 no se pudo inicializar")
-        logger.info("Conexión establecida")
+        self.link.connect(sleep=self.metrics.sleep)
+
+    def get_rates(self, n=50):
+        if self.bus:
+            rates = self.bus.rates(self.timeframe, n)
+            if rates is not None:
+                return rates
+        return self.metrics.call(
+            mt5.copy_rates_from_pos, self.symbol, self.timeframe, 0, n
+        )
 
     def get_data(self, n=50):
-        rates = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 0, n)
+        rates = self.get_rates(n)
         if rates is None:
             return None
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s")
-        return df
+        return rates_to_frame(rates)
 
     def calc_atr(self, df, period=14):
         high_low = df["high"] - df["low"]
@@ -114,16 +164,22 @@ class GoldPullbackBot:
 
         return None
 
+    def get_positions(self):
+        positions = self.positions_bus.positions_or_live(self.symbol)
+        return self.journal.sync(positions, "GoldPullback", magic=777777)
+
     def count_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
-        return len(positions) if positions else 0
+        positions = self.get_positions()
+        count = len(positions) if positions else 0
+        self.metrics.positions(count)
+        return count
 
     def place_buy_order(self):
         """Orden con SL bajo EMA20 y TP conservador"""
         df = self.get_data(n=25)
         df["EMA20"] = df["close"].ewm(span=20).mean()
 
-        tick = mt5.symbol_info_tick(self.symbol)
+        tick = execution.tick(self.symbol)
         price = tick.ask
         ema20_current = df["EMA20"].iloc[-1]
         atr = self.calc_atr(df, 14)
@@ -135,6 +191,9 @@ class GoldPullbackBot:
         risk = price - sl
         tp = price + (risk * 2)  # Risk:Reward 1:2
 
+        if not self.positions_bus.check_exposure(self.symbol, "buy", self.lot):
+            return False
+
         request = {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": self.symbol,
@@ -143,13 +202,13 @@ class GoldPullbackBot:
             "price": price,
             "sl": sl,
             "tp": tp,
-            "deviation": 50,
             "magic": 777777,
             "comment": "GoldPullback",
-            "type_filling": mt5.ORDER_FILLING_IOC,
         }
 
-        result = mt5.order_send(request)
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "GoldPullback")
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             logger.info(
                 f"COMPRA a {price:.2f} | SL: {sl:.2f} | TP: {tp:.2f} | Risk:Reward 1:2"
@@ -168,20 +227,36 @@ class GoldPullbackBot:
         last_check_time = None
 
         while True:
+            self.profiler.tick()
+            self.metrics.loop()
             try:
-                df = self.get_data(n=10)
-                if df is None:
-                    time.sleep(10)
+                if self.market and not self.market.is_open():
+                    wait_for_open(
+                        self.market,
+                        config.market_hours["prewarm"],
+                        warm=self.prewarm,
+                        sleep=self.metrics.sleep,
+                    )
+                    continue
+                if not self.link.ensure():
+                    self.metrics.sleep(self.link.retry_in())
+                    continue
+                rates = self.get_rates(n=2)
+                if rates is None:
+                    # Si es un corte, reconectar ya en lugar de dormir a ciegas
+                    if self.link.probe(force=True):
+                        self.metrics.sleep(10)
                     continue
 
-                current_time = df["time"].iloc[-1]
+                current_time = last_bar_time(rates)
 
                 if current_time != last_check_time:
                     last_check_time = current_time
+                    self.metrics.bar(current_time)
 
                     if self.count_positions() >= self.max_open_positions:
                         logger.info("Máximo de posiciones alcanzado")
-                        time.sleep(60)
+                        self.metrics.sleep(60)
                         continue
 
                     # Chequear martillo alcista tras bajada
@@ -189,13 +264,14 @@ class GoldPullbackBot:
 
                     if signal == "buy":
                         if self.place_buy_order():
-                            time.sleep(300)
+                            self.metrics.sleep(300)
 
-                time.sleep(15)
+                self.metrics.sleep(15)
 
             except Exception as e:
                 logger.error(f"Error: {e}")
-                time.sleep(30)
+                if self.link.probe(force=True):
+                    self.metrics.sleep(30)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,17 @@
 import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
-import time
 import logging
+from core.market_data import last_bar_time, rates_to_frame
+from core.shm_bus import MarketDataReader
+from core.position_bus import reader_for
+import cfg.config as config
+import core.execution as execution
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.journal import open_journal
+from core.market_hours import calendar_for, wait_for_open
 
 # ----------------------------
 # CONFIGURACIÓN
@@ -24,25 +33,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Métricas Prometheus locales si están activas
+metrics = BotMetrics("gold_pullback_bot")
+if config.metrics["enabled"]:
+    MetricsServer(
+        metrics, config.metrics["host"], config.metrics["ports"]["gold_pullback_bot"]
+    ).start()
+
 # ----------------------------
 # CONEXIÓN
 # ----------------------------
-if not mt5.initialize():
-    logger.error("Error al inicializar MT5")
-    quit()
-logger.info("Conexión establecida con MT5")
+# Sesión del terminal; reintenta con espera creciente en lugar de salir
+link = Mt5Supervisor(None, "gold_pullback_bot", metrics)
+link.connect(sleep=metrics.sleep)
+# Cuenta netting: la reversión es una sola orden
+netting = execution.netting()
+journal = open_journal("gold_pullback_bot")
+
+# Datos desde market_data_daemon.py si está activo
+bus = (
+    MarketDataReader(
+        SYMBOL,
+        prefix=config.market_bus["prefix"],
+        stale_after=config.market_bus["stale_after"],
+    )
+    if config.market_bus["enabled"]
+    else None
+)
+
+# Posiciones desde el snapshot compartido si está activo
+positions_bus = reader_for(mt5.account_info().login)
 
 
 # ----------------------------
 # FUNCIONES
 # ----------------------------
+def get_rates(n=200):
+    if bus:
+        rates = bus.rates(TIMEFRAME, n)
+        if rates is not None:
+            return rates
+    return metrics.call(mt5.copy_rates_from_pos, SYMBOL, TIMEFRAME, 0, n)
+
+
 def get_data(n=200):
-    rates = mt5.copy_rates_from_pos(SYMBOL, TIMEFRAME, 0, n)
+    rates = get_rates(n)
     if rates is None:
         return None
-    df = pd.DataFrame(rates)
-    df["time"] = pd.to_datetime(df["time"], unit="s")
-    return df
+    return rates_to_frame(rates)
 
 
 def calc_atr(df, period=14):
@@ -78,43 +116,35 @@ def check_signal():
     return None
 
 
+def get_positions(live=False):
+    # Cierres y reversiones con las posiciones del terminal: el snapshot
+    # puede ir hasta un ciclo del daemon por detrás
+    if live:
+        positions = mt5.positions_get(symbol=SYMBOL)
+    else:
+        positions = positions_bus.positions_or_live(SYMBOL)
+    return journal.sync(positions, "GoldPullbackBot", magic=MAGIC)
+
+
 def count_positions():
-    positions = mt5.positions_get(symbol=SYMBOL)
-    return 0 if positions is None else len(positions)
+    positions = get_positions()
+    count = 0 if positions is None else len(positions)
+    metrics.positions(count)
+    return count
 
 
-def close_all_positions():
-    positions = mt5.positions_get(symbol=SYMBOL)
-    if not positions:
-        return
-    for pos in positions:
-        if pos.type == mt5.ORDER_TYPE_BUY:
-            order_type = mt5.ORDER_TYPE_SELL
-            price = mt5.symbol_info_tick(SYMBOL).bid
-        else:
-            order_type = mt5.ORDER_TYPE_BUY
-            price = mt5.symbol_info_tick(SYMBOL).ask
-
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": SYMBOL,
-            "volume": pos.volume,
-            "type": order_type,
-            "position": pos.ticket,
-            "price": price,
-            "deviation": 50,
-            "magic": MAGIC,
-            "comment": "Close signal",
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        result = mt5.order_send(request)
-        logger.info(f"Cerrada posición {pos.ticket} | Retcode: {result.retcode}")
+def send(request, reason=""):
+    result = execution.send(request)
+    metrics.order(result)
+    journal.order(request, result, "GoldPullbackBot", reason)
+    return result
 
 
-def place_order(direction):
+def order_request(direction, tick):
     df = get_data(100)
+    if df is None or tick is None:
+        return None
     atr = calc_atr(df, ATR_PERIOD)
-    tick = mt5.symbol_info_tick(SYMBOL)
 
     if direction == "buy":
         price = tick.ask
@@ -127,7 +157,10 @@ def place_order(direction):
         tp = price - atr * TP_ATR_MULTIPLIER
         order_type = mt5.ORDER_TYPE_SELL
 
-    request = {
+    if not positions_bus.check_exposure(SYMBOL, direction, LOT):
+        return None
+
+    return {
         "action": mt5.TRADE_ACTION_DEAL,
         "symbol": SYMBOL,
         "volume": LOT,
@@ -135,19 +168,59 @@ def place_order(direction):
         "price": price,
         "sl": sl,
         "tp": tp,
-        "deviation": 50,
         "magic": MAGIC,
         "comment": f"EMA9/21 {direction}",
-        "type_filling": mt5.ORDER_FILLING_IOC,
     }
 
-    result = mt5.order_send(request)
-    if result.retcode == mt5.TRADE_RETCODE_DONE:
-        logger.info(f"{direction.upper()} {price:.2f} | SL {sl:.2f} | TP {tp:.2f}")
+
+def log_open(direction, request, result):
+    if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+        logger.info(
+            f"{direction.upper()} {request['price']:.2f} | SL {request['sl']:.2f} | "
+            f"TP {request['tp']:.2f}"
+        )
         return True
-    else:
-        logger.error(f"Error al abrir: {result.retcode} - {result.comment}")
+    logger.error(f"Error al abrir: {result}")
+    return False
+
+
+def place_order(direction):
+    request = order_request(direction, execution.tick(SYMBOL))
+    if request is None:
         return False
+    return log_open(direction, request, send(request))
+
+
+def reverse_positions(direction):
+    """Cierre inverso y nueva entrada con un tick y en un solo viaje."""
+    positions = get_positions(live=True)
+    if not positions:
+        return place_order(direction)
+    tick = execution.tick(SYMBOL)
+    if tick is None:
+        return False
+    close = {"comment": "Close signal", "magic": MAGIC}
+    request = order_request(direction, tick)
+    if request is None:
+        done = execution.flatten(positions, tick, **close)
+    else:
+        done = execution.reverse(positions, tick, request, netting=netting, **close)
+    for result in done.results:
+        metrics.order(result)
+    metrics.flatten(done.seconds)
+
+    for pos, (close_req, result) in zip(positions, done.legs):
+        journal.order(close_req, result, "GoldPullbackBot", "Close signal")
+        logger.info(f"Cerrada posición {pos.ticket} | Retcode: {getattr(result, 'retcode', None)}")
+    opened = False
+    if request is not None:
+        journal.order(request, done.legs[-1][1], "GoldPullbackBot")
+        opened = log_open(direction, request, done.legs[-1][1])
+    logger.info(
+        f"Reversión a {direction.upper()}: {len(positions)} cierres en "
+        f"{done.seconds * 1000:.1f} ms ({len(done.results)} órdenes)"
+    )
+    return opened
 
 
 # ----------------------------
@@ -156,17 +229,37 @@ def place_order(direction):
 logger.info("Bot EMA9/21 iniciado (XAUUSD, H1, ATR SL/TP)")
 
 last_time = None
+profiler = LoopProfiler("gold_pullback_bot", **config.profiling)
+
+# Dormir con el mercado cerrado (fin de semana, pausa diaria, festivos)
+market = calendar_for(SYMBOL) if config.market_hours["enabled"] else None
 
 while True:
+    profiler.tick()
+    metrics.loop()
     try:
-        df = get_data(5)
-        if df is None:
-            time.sleep(30)
+        if market and not market.is_open():
+            wait_for_open(
+                market,
+                config.market_hours["prewarm"],
+                warm=lambda: get_rates(2),
+                sleep=metrics.sleep,
+            )
+            continue
+        if not link.ensure():
+            metrics.sleep(link.retry_in())
+            continue
+        rates = get_rates(2)
+        if rates is None:
+            # Si es un corte, reconectar ya en lugar de dormir a ciegas
+            if link.probe(force=True):
+                metrics.sleep(30)
             continue
 
-        current_time = df["time"].iloc[-1]
+        current_time = last_bar_time(rates)
         if current_time != last_time:
             last_time = current_time
+            metrics.bar(current_time)
 
             signal = check_signal()
             if signal and count_positions() == 0:
@@ -174,16 +267,16 @@ while True:
 
             elif signal and count_positions() > 0:
                 # cierre inverso
-                close_all_positions()
-                place_order(signal)
+                reverse_positions(signal)
 
-        time.sleep(10)
+        metrics.sleep(10)
 
     except KeyboardInterrupt:
         logger.info("Bot detenido por usuario")
         break
     except Exception as e:
         logger.error(f"Error: {e}")
-        time.sleep(30)
+        if link.probe(force=True):
+            metrics.sleep(30)
 
 mt5.shutdown()
@@ -1,10 +1,18 @@
 import MetaTrader5 as mt5
 import pandas as pd
-import time
 import logging
 import os
 import numpy as np
 import cfg.config as config
+import core.execution as execution
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.state_store import StateStore
+from core.journal import open_journal
+from core.bar_builder import BarBuilder
+from core.market_data import rates_to_frame
+from core.market_hours import calendar_for, wait_for_open
 
 filename = os.path.basename(__file__).replace(".py", "")
 logging.basicConfig(
@@ -20,6 +28,13 @@ logger = logging.getLogger(__name__)
 
 class ThresholdMomentumBot:
     def __init__(self):
+        self.profiler = LoopProfiler(filename, **config.profiling)
+        self.metrics = BotMetrics(filename)
+        self.journal = open_journal(filename)
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics, config.metrics["host"], config.metrics["ports"][filename]
+            ).start()
         self.symbol = config.bot["symbol"]
         self.lot = config.bot["lot"]
 
@@ -40,39 +55,108 @@ class ThresholdMomentumBot:
 
         self.max_open_positions = config.bot.get("max_positions", 1)
 
+        # Dormir con el mercado cerrado (fin de semana, pausa diaria, festivos)
+        self.market = (
+            calendar_for(self.symbol) if config.market_hours["enabled"] else None
+        )
+
         self.login = config.broker["login"]
         self.password = config.broker["password"]
         self.server = config.broker["server"]
+        # Reconexión con espera creciente en lugar de caer o dormir a ciegas
+        self.link = Mt5Supervisor(
+            {"login": self.login, "password": self.password, "server": self.server},
+            filename,
+            self.metrics,
+        )
 
         # Estado
         self.ref_price = None  # precio desde el que medimos el primer movimiento
         self.entry_price = None
         self.position_type = None  # "buy" o "sell"
         self.open_ticket = None
+        self.store = StateStore(
+            filename.replace(" ", "_"),
+            directory=config.state["dir"],
+            compact_every=config.state["compact_every"],
+        )
+
+        # Velas M1 construidas localmente con los ticks que ya sondeamos
+        self.atr = None
+        self.builder = BarBuilder({"M1": 60}, capacity=200)
+        self.builder.on_bar_close(self.on_bar_close)
 
         logger.info(f"ThresholdMomentumBot inicializado - {self.symbol}")
 
+    def prewarm(self):
+        """Antes de la apertura: reconectar si hace falta y cargar velas."""
+        if not self.link.ensure():
+            return
+        self.get_rates(n=50)
+
     def connect(self):
-        if not mt5.initialize(
-            login=self.login, password=self.password, server=self.server
-        ):
-            logger.error("Error al inicializar MetaTrader 5")
-            raise RuntimeError("MT5 no se pudo inicializar")
-        logger.info("Conexión establecida")
+        self.link.connect(sleep=self.metrics.sleep)
+
+    def restore_state(self):
+        saved = self.store.get("position", {})
+        self.ref_price = saved.get("ref_price")
+        self.entry_price = saved.get("entry_price")
+        self.position_type = saved.get("position_type")
+        self.open_ticket = saved.get("open_ticket")
+
+        # Si la posición se cerró mientras estábamos parados, limpiar
+        if self.entry_price is not None and self.count_open_positions() == 0:
+            logger.info("Posición guardada ya no está abierta, limpiando estado")
+            self.entry_price = None
+            self.position_type = None
+            self.open_ticket = None
+            self.save_state()
+
+        logger.info(
+            f"Estado restaurado: ref={self.ref_price} entry={self.entry_price} "
+            f"tipo={self.position_type} ticket={self.open_ticket}"
+        )
+
+    def save_state(self):
+        self.store.put(
+            "position",
+            {
+                "ref_price": self.ref_price,
+                "entry_price": self.entry_price,
+                "position_type": self.position_type,
+                "open_ticket": self.open_ticket,
+            },
+        )
 
     def get_price(self):
-        tick = mt5.symbol_info_tick(self.symbol)
+        tick = execution.tick(self.symbol)
         if tick is None:
             raise RuntimeError("No tick info")
+        self.builder.update(tick.time_msc, tick.bid, tick.ask)
+        self.builder.advance()  # cierra la vela aunque no haya tick nuevo
         return tick.bid, tick.ask
 
+    def get_rates(self, n=50):
+        # Sólo se pide histórico al broker para sembrar el constructor de velas
+        if self.builder.count("M1") >= n - 1:
+            return self.builder.rates("M1", n)
+        rates = self.metrics.call(
+            mt5.copy_rates_from_pos, self.symbol, mt5.TIMEFRAME_M1, 0, n
+        )
+        if rates is not None:
+            self.builder.seed("M1", rates)
+        return rates
+
     def get_data(self, n=50):
-        rates = mt5.copy_rates_from_pos(self.symbol, mt5.TIMEFRAME_M1, 0, n)
+        rates = self.get_rates(n)
         if rates is None:
             return None
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s")
-        return df
+        return rates_to_frame(rates)
+
+    def on_bar_close(self, timeframe, bar):
+        self.metrics.bar(int(bar["time"]))
+        if self.use_atr:
+            self.atr = self.calc_atr(14)
 
     def calc_atr(self, period=14):
         df = self.get_data(n=period + 5)
@@ -95,12 +179,12 @@ class ThresholdMomentumBot:
             "volume": self.lot,
             "type": mt5.ORDER_TYPE_BUY if order_type == "buy" else mt5.ORDER_TYPE_SELL,
             "price": price,
-            "deviation": 50,
             "magic": 123456,
             "comment": "ThresholdMomentum",
-            "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        result = mt5.order_send(request)
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "ThresholdMomentum")
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             self.entry_price = price
             self.position_type = order_type
@@ -112,6 +196,7 @@ class ThresholdMomentumBot:
             logger.info(f"{order_type.upper()} abierto a {price:.5f}")
             # Reset ref_price para evitar reentrada inmediata
             self.ref_price = None
+            self.save_state()
             return True
         else:
             logger.error(
@@ -123,39 +208,32 @@ class ThresholdMomentumBot:
         positions = mt5.positions_get(symbol=self.symbol)
         if not positions:
             return False
+        # Un único tick para todas y los cierres a la vez
+        tick = execution.tick(self.symbol)
+        if tick is None:
+            return False
+        done = execution.flatten(
+            positions, tick, comment=f"Close-{reason}", magic=123456
+        )
+        self.metrics.flatten(done.seconds)
         ok = True
-        for pos in positions:
-            # cerrar con la orden contraria
-            close_type = (
-                mt5.ORDER_TYPE_SELL
-                if pos.type == mt5.ORDER_TYPE_BUY
-                else mt5.ORDER_TYPE_BUY
-            )
-            bid, ask = self.get_price()
-            price = bid if close_type == mt5.ORDER_TYPE_SELL else ask
-            close_request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": self.symbol,
-                "volume": pos.volume,
-                "type": close_type,
-                "position": pos.ticket,
-                "price": price,
-                "deviation": 50,
-                "magic": 123456,
-                "comment": f"Close-{reason}",
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            result = mt5.order_send(close_request)
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
-                logger.info(f"Cerrada pos {pos.ticket} por {reason} a {price:.5f}")
+        for pos, (request, result) in zip(positions, done.legs):
+            self.metrics.order(result)
+            self.journal.order(request, result, "ThresholdMomentum", reason)
+            if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+                logger.info(
+                    f"Cerrada pos {pos.ticket} por {reason} a {request['price']:.5f}"
+                )
             else:
                 ok = False
-                logger.error(f"Error cerrando pos {pos.ticket}: {result.retcode}")
+                logger.error(f"Error cerrando pos {pos.ticket}: {result}")
+        logger.info(f"{len(positions)} cierres en {done.seconds * 1000:.1f} ms")
         # limpiar estado local si cerradas
         if ok:
             self.entry_price = None
             self.position_type = None
             self.open_ticket = None
+            self.save_state()
         return ok
 
     def update_sl(self, position_ticket, new_sl):
@@ -167,7 +245,9 @@ class ThresholdMomentumBot:
             "sl": new_sl,
             "tp": 0.0,
         }
-        result = mt5.order_send(request)
+        result = execution.send(request)
+        self.metrics.order(result)
+        self.journal.order(request, result, "ThresholdMomentum", "Trailing")
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             logger.info(f"SL actualizado pos {position_ticket} -> {new_sl:.5f}")
             return True
@@ -176,35 +256,53 @@ class ThresholdMomentumBot:
             return False
 
     def count_open_positions(self):
-        positions = mt5.positions_get(symbol=self.symbol)
-        return len(positions) if positions is not None else 0
+        positions = self.journal.sync(
+            mt5.positions_get(symbol=self.symbol), "ThresholdMomentum", magic=123456
+        )
+        count = len(positions) if positions is not None else 0
+        self.metrics.positions(count)
+        return count
 
     def run(self):
         self.connect()
+        self.restore_state()
         logger.info("ThresholdMomentumBot iniciado")
         consecutive_errors = 0
 
-        # Si usas ATR para ajustar threshold, calcula una vez al iniciar y periódicamente
-        atr = None
+        # Si usas ATR para ajustar threshold, se calcula al iniciar y con cada vela M1
         if self.use_atr:
-            atr = self.calc_atr(14)
-            if atr:
-                logger.info(f"ATR(14) inicial: {atr:.5f}")
+            self.atr = self.calc_atr(14)
+            if self.atr:
+                logger.info(f"ATR(14) inicial: {self.atr:.5f}")
 
         while True:
+            self.profiler.tick()
+            self.metrics.loop()
             try:
+                if self.market and not self.market.is_open():
+                    wait_for_open(
+                        self.market,
+                        config.market_hours["prewarm"],
+                        warm=self.prewarm,
+                        sleep=self.metrics.sleep,
+                    )
+                    continue
+                if not self.link.ensure():
+                    self.metrics.sleep(self.link.retry_in())
+                    continue
                 bid, ask = self.get_price()
                 mid_price = (bid + ask) / 2.0
 
                 # recalcula threshold dinámico si usas ATR
                 effective_threshold = self.threshold
-                if self.use_atr and atr:
-                    effective_threshold = atr * self.atr_mult_for_threshold
+                if self.use_atr and self.atr:
+                    effective_threshold = self.atr * self.atr_mult_for_threshold
 
                 # Si no hay ref_price definimos uno y esperamos un pequeño movimiento
                 if self.ref_price is None and self.entry_price is None:
                     self.ref_price = mid_price
-                    time.sleep(0.3)
+                    self.save_state()
+                    self.metrics.sleep(0.3)
                     continue
 
                 # Si no hay posición abierta, miramos si el movimiento desde ref supera threshold
@@ -221,7 +319,7 @@ class ThresholdMomentumBot:
                         self.open_order("sell")
 
                     # si no abrimos, dejamos ref_price y seguimos
-                    time.sleep(0.3)
+                    self.metrics.sleep(0.3)
                     continue
 
                 # Si hay posición abierta, gestionarla
@@ -296,7 +394,7 @@ class ThresholdMomentumBot:
                             self.close_all_positions(reason="TP")
                             continue
 
-                time.sleep(0.5)
+                self.metrics.sleep(0.5)
 
             except KeyboardInterrupt:
                 logger.info("Bot detenido por usuario")
@@ -304,12 +402,12 @@ class ThresholdMomentumBot:
             except Exception as e:
                 logger.error(f"Error inesperado: {e}")
                 consecutive_errors += 1
-                time.sleep(1)
+                self.metrics.sleep(1)
                 if consecutive_errors > 10:
                     # recalcula ATR por si lo usas
                     if self.use_atr:
-                        atr = self.calc_atr(14)
-                        logger.info(f"Recalculado ATR: {atr}")
+                        self.atr = self.calc_atr(14)
+                        logger.info(f"Recalculado ATR: {self.atr}")
                     consecutive_errors = 0
 
 
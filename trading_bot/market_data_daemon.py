@@ -0,0 +1,161 @@
+import MetaTrader5 as mt5
+import time
+import logging
+import os
+import cfg.config as config
+from core.profiling import LoopProfiler
+from core.metrics import BotMetrics, MetricsServer
+from core.connection import Mt5Supervisor
+from core.shm_bus import MarketDataBus
+from core.position_bus import PositionBus
+from core.market_hours import calendar_for
+
+filename = os.path.basename(__file__).replace(".py", "")
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.FileHandler(f"trading_bot/logs/{filename}.log", mode="a"),
+        logging.StreamHandler(),
+    ],
+)
+logger = logging.getLogger(__name__)
+
+
+class MarketDataDaemon:
+    """
+    Único proceso conectado al terminal para el símbolo: publica ticks y
+    velas en memoria compartida para que los bots no consulten al broker.
+    """
+
+    def __init__(self):
+        self.profiler = LoopProfiler(filename, **config.profiling)
+        self.metrics = BotMetrics(filename)
+        if config.metrics["enabled"]:
+            MetricsServer(
+                self.metrics, config.metrics["host"], config.metrics["ports"][filename]
+            ).start()
+        cfg = config.market_bus
+        self.symbol = cfg["symbol"]
+        self.timeframes = [getattr(mt5, f"TIMEFRAME_{tf}") for tf in cfg["timeframes"]]
+        self.window = cfg["bars"]
+        self.poll = cfg["poll"]
+
+        # Con el mercado cerrado sólo se mantiene vivo el heartbeat del bus
+        self.market = (
+            calendar_for(self.symbol) if config.market_hours["enabled"] else None
+        )
+
+        self.login = config.broker["login"]
+        self.password = config.broker["password"]
+        self.server = config.broker["server"]
+        # Reconexión con espera creciente en lugar de caer o dormir a ciegas
+        self.link = Mt5Supervisor(
+            {"login": self.login, "password": self.password, "server": self.server},
+            filename,
+            self.metrics,
+        )
+
+        self.bus = MarketDataBus(
+            self.symbol,
+            self.timeframes,
+            bars=cfg["bars"],
+            ticks=cfg["ticks"],
+            prefix=cfg["prefix"],
+        )
+        self.last_tick_msc = None
+
+        # Snapshot de posiciones de la cuenta: un único positions_get() por ciclo
+        self.positions_poll = config.position_bus["poll"]
+        self.positions_bus = (
+            PositionBus(
+                self.login,
+                capacity=config.position_bus["capacity"],
+                prefix=config.position_bus["prefix"],
+            )
+            if config.position_bus["enabled"]
+            else None
+        )
+        self.next_positions = 0.0
+
+    def connect(self):
+        self.link.connect(sleep=self.metrics.sleep)
+
+    def publish_bars(self, timeframe):
+        # Sólo las últimas velas si enlazan con lo publicado; si no, ventana completa
+        last_time = self.bus.last_bar_time(timeframe)
+        rates = self.metrics.call(mt5.copy_rates_from_pos, self.symbol, timeframe, 0, 3)
+        if rates is None:
+            return
+        if last_time is None or int(rates["time"][0]) > last_time:
+            rates = self.metrics.call(
+                mt5.copy_rates_from_pos, self.symbol, timeframe, 0, self.window
+            )
+            if rates is None:
+                return
+        self.bus.publish_rates(timeframe, rates)
+
+    def publish_tick(self):
+        tick = mt5.symbol_info_tick(self.symbol)
+        if tick is None or tick.time_msc == self.last_tick_msc:
+            return False
+        self.last_tick_msc = tick.time_msc
+        self.bus.publish_tick(tick)
+        return True
+
+    def publish_positions(self):
+        now = time.monotonic()
+        if now < self.next_positions:
+            return
+        self.next_positions = now + self.positions_poll
+        positions = mt5.positions_get()
+        if positions is None:
+            logger.warning("No se pudieron obtener posiciones abiertas.")
+            return
+        self.positions_bus.publish(positions)
+
+    def run(self):
+        self.connect()
+        logger.info(
+            f"MarketDataDaemon iniciado - {self.symbol} | timeframes {config.market_bus['timeframes']}"
+        )
+
+        while True:
+            self.profiler.tick()
+            self.metrics.loop()
+            try:
+                if self.market and not self.market.is_open():
+                    self.bus.heartbeat()
+                    wait = self.market.seconds_until_open() or self.poll
+                    self.metrics.sleep(min(wait, config.market_bus["stale_after"] / 2))
+                    continue
+                # Sin latido durante el corte: los lectores ven el bus caducado
+                if not self.link.ensure():
+                    self.metrics.sleep(self.link.retry_in())
+                    continue
+
+                # Las velas sólo cambian con un tick nuevo
+                if self.publish_tick():
+                    for tf in self.timeframes:
+                        self.publish_bars(tf)
+                if self.positions_bus:
+                    self.publish_positions()
+                self.bus.heartbeat()
+                self.metrics.sleep(self.poll)
+
+            except KeyboardInterrupt:
+                logger.info("Daemon detenido por usuario")
+                break
+            except Exception as e:
+                logger.error(f"Error inesperado: {e}", exc_info=True)
+                self.metrics.sleep(5)
+
+        self.bus.close()
+        if self.positions_bus:
+            self.positions_bus.close()
+        mt5.shutdown()
+
+
+if __name__ == "__main__":
+    daemon = MarketDataDaemon()
+    daemon.run()
@@ -0,0 +1,123 @@
+"""
+Walk-forward de FibonacciBot sobre el histórico del BarStore.
+
+Uso (desde la raíz del repo):
+    python trading_bot/optimize.py
+    python trading_bot/optimize.py --symbol XAUUSD --timeframe H1 --train 3000 --test 500
+    python trading_bot/optimize.py --trades oos_trades.csv
+    python trading_bot/optimize.py --live FibonacciBot
+
+Con --live se comparan las operaciones reales del diario (core/journal.py)
+con las out-of-sample del mismo periodo.
+
+Los parámetros por defecto y la rejilla están en config.walk_forward.
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import cfg.config as config
+from core.backtest import FibonacciStrategy, summary
+from core.bar_store import BarStore
+from core.journal import load_journal, trades
+from core.walk_forward import walk_forward
+
+
+def _date(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def main():
+    cfg = config.walk_forward
+    parser = argparse.ArgumentParser(description="Optimización walk-forward")
+    parser.add_argument("--symbol", default=cfg["symbol"])
+    parser.add_argument("--timeframe", default=cfg["timeframe"])
+    parser.add_argument("--train", type=int, default=cfg["train"])
+    parser.add_argument("--test", type=int, default=cfg["test"])
+    parser.add_argument("--anchored", action="store_true", default=cfg["anchored"])
+    parser.add_argument("--metric", default=cfg["metric"])
+    parser.add_argument("--min-trades", type=int, default=cfg["min_trades"])
+    parser.add_argument("--cost", type=float, default=cfg["cost"])
+    parser.add_argument("--workers", type=int, default=cfg["workers"])
+    parser.add_argument(
+        "--trades", help="CSV donde guardar las operaciones out-of-sample"
+    )
+    parser.add_argument(
+        "--live", metavar="SOURCE", help="bot del diario con el que comparar"
+    )
+    args = parser.parse_args()
+
+    rates = BarStore(config.bar_store["dir"]).load(args.symbol, args.timeframe)
+    if not len(rates):
+        sys.exit(
+            f"Sin histórico para {args.symbol} {args.timeframe} en {config.bar_store['dir']}"
+        )
+
+    result = walk_forward(
+        rates,
+        FibonacciStrategy(
+            atr_period=config.bot["atr_period"],
+            rsi_method=config.bot.get("rsi_method", "wilder"),
+        ),
+        cfg["grid"],
+        train=args.train,
+        test=args.test,
+        anchored=args.anchored,
+        metric=args.metric,
+        min_trades=args.min_trades,
+        cost=args.cost,
+        workers=args.workers,
+    )
+
+    print(
+        f"{'out-of-sample':<24} {'tp':>5} {'sl':>5} {'tol':>5} {'IS':>8} {'ops':>5} {'neto':>10}"
+    )
+    for w in result.windows:
+        oos = f"{_date(w['out_of_sample'][0])} → {_date(w['out_of_sample'][1])}"
+        p = w["params"]
+        print(
+            f"{oos:<24} {p['tp_atr_mult']:>5} {p['sl_atr_mult']:>5} {p['tolerance']:>5} "
+            f"{w['in_sample_score']:>8.2f} {w['trades']:>5} {w['net']:>10.2f}"
+        )
+
+    total = summary(result.trades)
+    print(
+        f"\nOut-of-sample encadenado: {total['trades']} operaciones | neto {total['net']:.2f} | "
+        f"acierto {total['win_rate']:.0%} | PF {total['profit_factor']:.2f} | "
+        f"máx. drawdown {total['max_drawdown']:.2f}"
+    )
+
+    if args.live:
+        compare_live(args.live, args.symbol, result.trades)
+
+    if args.trades:
+        df = pd.DataFrame(result.trades)
+        df["equity"] = result.equity
+        df.to_csv(args.trades, index=False)
+        print(f"Operaciones guardadas en {args.trades}")
+
+
+def compare_live(source, symbol, simulated):
+    live = trades(load_journal(config.journal["dir"]), source=source, symbol=symbol)
+    if not len(live):
+        print(f"\nSin operaciones cerradas de {source} en {config.journal['dir']}")
+        return
+    start, end = live["entry_time"].min(), live["exit_time"].max()
+    period = simulated[
+        (simulated["entry_time"] >= start) & (simulated["entry_time"] <= end)
+    ]
+    print(f"\nReal vs. backtest {_date(start)} → {_date(end)}")
+    print(f"{'':<10} {'ops':>5} {'neto':>10} {'acierto':>8} {'PF':>6} {'máx. DD':>10}")
+    for label, stats in (("real", summary(live)), ("backtest", summary(period))):
+        print(
+            f"{label:<10} {stats['trades']:>5} {stats['net']:>10.2f} "
+            f"{stats['win_rate']:>8.0%} {stats['profit_factor']:>6.2f} "
+            f"{stats['max_drawdown']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
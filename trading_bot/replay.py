@@ -0,0 +1,125 @@
+"""
+Replay acelerado de un bot sin modificar sobre el histórico del BarStore.
+
+Uso (desde la raíz del repo):
+    python trading_bot/replay.py trading_bot/gold_cross_bot.py --days 30
+    python trading_bot/replay.py trading_bot/gold_pullback_bot.py --start 2024-03-01 --end 2024-04-01
+    python trading_bot/replay.py trading_bot/run_strategies.py --synthetic -- --only Fibonacci
+    python trading_bot/replay.py trading_bot/gold_cross_bot.py --synthetic --outage 48:10
+
+Con --synthetic no hace falta histórico: se genera un paseo aleatorio M1
+determinista (--seed) con `--warmup` días previos para los indicadores.
+Estado y diario del replay van a --out (un directorio temporal si no).
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timezone
+
+import cfg.config as config
+from core.backtest import summary
+from core.replay import replay, span, stored_rates, synthetic_series, trade_table
+
+# Fin fijo del replay sintético: mismas velas en cada ejecución
+SYNTHETIC_END = 1_700_000_000
+
+
+def _epoch(text):
+    return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _date(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay acelerado de un bot")
+    parser.add_argument(
+        "script", help="script del bot (p. ej. trading_bot/gold_cross_bot.py)"
+    )
+    parser.add_argument("--symbols", nargs="+", default=["XAUUSD", "EURUSD"])
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--start", type=_epoch, help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--end", type=_epoch, help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument(
+        "--warmup", type=float, default=30, help="días previos sintéticos"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--spread", type=float, default=0.2)
+    parser.add_argument(
+        "--outage",
+        action="append",
+        default=[],
+        metavar="H:MIN",
+        help="corte del terminal a las H horas del inicio durante MIN minutos",
+    )
+    parser.add_argument("--out", help="directorio de estado y diario del replay")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--trades", action="store_true", help="listar las operaciones")
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    bot_args = argv[split + 1 :]
+
+    # Antes que el bot: su basicConfig ya no abre el log real
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(levelname)s %(name)s: %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+
+    if args.synthetic:
+        end = args.end or SYNTHETIC_END
+        start = args.start or end - args.days * 86400
+        series = synthetic_series(
+            args.symbols, start - args.warmup * 86400, end, seed=args.seed
+        )
+    else:
+        series = stored_rates(args.symbols)
+        if not series:
+            sys.exit(
+                f"Sin histórico de {args.symbols} en {config.bar_store['dir']} "
+                f"(usa --synthetic)"
+            )
+    start, end = span(series, args.days, args.start, args.end)
+
+    outages = []
+    for text in args.outage:
+        hours, minutes = (float(v) for v in text.split(":"))
+        outages.append((start + hours * 3600, start + hours * 3600 + minutes * 60))
+
+    result = replay(
+        args.script,
+        series,
+        start,
+        end,
+        bot_args,
+        out_dir=args.out,
+        spread=args.spread,
+        outages=outages,
+    )
+
+    days = (result.end - result.start) / 86400
+    print(
+        f"{_date(result.start)} → {_date(result.end)} ({days:.1f} días) en "
+        f"{result.wall_seconds:.1f}s | {result.sleeps} esperas | "
+        f"{result.requests} órdenes | balance {result.balance:.2f}"
+    )
+    stats = summary(result.trades)
+    print(
+        f"{stats['trades']} operaciones cerradas | neto {stats['net']:.2f} | "
+        f"acierto {stats['win_rate']:.0%} | PF {stats['profit_factor']:.2f} | "
+        f"máx. drawdown {stats['max_drawdown']:.2f}"
+    )
+    if outages:
+        recoveries = ", ".join(f"{s:.0f}s" for s in result.recoveries) or "ninguna"
+        print(f"{len(outages)} cortes | reconexión tras {recoveries}")
+    print(f"Estado y diario en {result.out_dir}")
+    if args.trades:
+        print(trade_table(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Monte Carlo de robustez sobre una lista de operaciones.
+
+Uso (desde la raíz del repo):
+    python trading_bot/robustness.py oos_trades.csv
+    python trading_bot/robustness.py trades.csv --method shuffle --slippage 0.2
+    python trading_bot/robustness.py trades.csv --paths 100000 --capital 5000 --scale 10
+    python trading_bot/robustness.py trading_bot/data/journal
+
+El CSV necesita una columna `pnl` por operación (optimize.py --trades); un
+directorio o fichero del diario (core/journal.py) usa sus operaciones
+cerradas. Los valores por defecto están en config.monte_carlo.
+"""
+
+import argparse
+import time
+
+import cfg.config as config
+from core.monte_carlo import METHODS, load_trades, report, simulate
+
+
+def main():
+    cfg = config.monte_carlo
+    parser = argparse.ArgumentParser(description="Monte Carlo de robustez")
+    parser.add_argument("trades", help="CSV con columna pnl o diario de operaciones")
+    parser.add_argument("--paths", type=int, default=cfg["paths"])
+    parser.add_argument("--method", choices=METHODS, default=cfg["method"])
+    parser.add_argument("--slippage", type=float, default=cfg["slippage"])
+    parser.add_argument("--capital", type=float, default=cfg["capital"])
+    parser.add_argument("--scale", type=float, default=cfg["scale"])
+    parser.add_argument("--ruin", type=float, default=cfg["ruin"])
+    parser.add_argument("--max-mb", type=int, default=cfg["max_mb"])
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    pnl = load_trades(args.trades)
+    start = time.perf_counter()
+    result = simulate(
+        pnl,
+        paths=args.paths,
+        method=args.method,
+        slippage=args.slippage,
+        capital=args.capital,
+        scale=args.scale,
+        ruin=args.ruin,
+        max_bytes=args.max_mb * 2**20,
+        seed=args.seed,
+    )
+    stats = report(result)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{stats['paths']} caminos ({args.method}) sobre {len(pnl)} operaciones "
+        f"en {elapsed:.1f}s"
+    )
+    print(f"{'':<18}" + "".join(f"{p:>12}" for p in stats["final"]))
+    for key, label, fmt in (
+        ("final", "Equity final", "{:12.2f}"),
+        ("max_drawdown", "Drawdown máx.", "{:12.2f}"),
+        ("max_drawdown_pct", "Drawdown máx. %", "{:12.1%}"),
+    ):
+        print(f"{label:<18}" + "".join(fmt.format(v) for v in stats[key].values()))
+    print(
+        f"\nProbabilidad de ruina (pérdida >= {args.ruin:.0%} del capital): "
+        f"{stats['ruin_probability']:.2%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
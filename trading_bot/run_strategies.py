@@ -0,0 +1,79 @@
+"""
+Ejecuta varias estrategias sobre un único motor (conexión, datos y órdenes
+compartidos).
+
+Uso (desde la raíz del repo):
+    python trading_bot/run_strategies.py
+    python trading_bot/run_strategies.py --only GoldTrendBot Hammer
+    python trading_bot/run_strategies.py --list
+
+Las estrategias y sus parámetros están en config.engine["strategies"].
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import cfg.config as config
+from core.engine import StrategyEngine
+from strategies.ema_pullback import EmaPullback
+from strategies.fibonacci import Fibonacci
+from strategies.hammer import Hammer
+from strategies.threshold import ThresholdMomentum
+from strategies.trend_cross import TrendCross
+
+STRATEGIES = {
+    cls.__name__: cls
+    for cls in (TrendCross, Fibonacci, Hammer, EmaPullback, ThresholdMomentum)
+}
+
+filename = os.path.basename(__file__).replace(".py", "")
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    handlers=[
+        logging.FileHandler(f"trading_bot/logs/{filename}.log", mode="a"),
+        logging.StreamHandler(),
+    ],
+)
+
+
+def build(specs, only=None):
+    """Instancia las estrategias de `specs` (dicts de config.engine)."""
+    strategies = []
+    for spec in specs:
+        spec = dict(spec)
+        cls = STRATEGIES[spec.pop("class")]
+        enabled = spec.pop("enabled", True)
+        name = spec.get("name", cls.__name__)
+        if only is not None:
+            if name not in only:
+                continue
+        elif not enabled:
+            continue
+        strategies.append(cls(**spec))
+    return strategies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de estrategias")
+    parser.add_argument("--only", nargs="+", help="nombres de estrategia a ejecutar")
+    parser.add_argument("--list", action="store_true", help="listar y salir")
+    args = parser.parse_args()
+
+    if args.list:
+        for spec in config.engine["strategies"]:
+            name = spec.get("name", spec["class"])
+            state = "" if spec.get("enabled", True) else "(desactivada)"
+            print(f"{name:<20} {spec['symbol']:<8} magic={spec['magic']} {state}")
+        return
+
+    strategies = build(config.engine["strategies"], args.only)
+    if not strategies:
+        sys.exit("Ninguna estrategia seleccionada")
+    StrategyEngine(strategies, name="strategy_engine").run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Cruce EMA9/21 siempre en mercado: la señal contraria cierra y revierte (gold_pullback_bot)."""
+
+from core.strategy import Strategy
+
+
+class EmaPullback(Strategy):
+    magic = 999004
+    timeframe = "H1"
+    warmup = 200
+
+    def setup(self):
+        self.sl_atr_mult = self.params.get("sl_atr_mult", 2.0)
+        self.tp_atr_mult = self.params.get("tp_atr_mult", 3.0)
+        self.fast = self.indicator("ema", 9)
+        self.slow = self.indicator("ema", 21)
+        self.atr = self.indicator("atr", self.params.get("atr_period", 14))
+
+    def signal(self):
+        fast, slow = self.fast, self.slow
+        if fast.prev is None:
+            return None
+        if fast.prev <= slow.prev and fast.value > slow.value:
+            return "buy"
+        if fast.prev >= slow.prev and fast.value < slow.value:
+            return "sell"
+        return None
+
+    def on_bar(self, bar):
+        signal = self.signal()
+        if signal is None or self.atr.value is None:
+            return
+        tick = self.tick()
+        if tick is None:
+            return
+        atr = self.atr.value
+        if signal == "buy":
+            price = tick.ask
+            sl, tp = price - atr * self.sl_atr_mult, price + atr * self.tp_atr_mult
+        else:
+            price = tick.bid
+            sl, tp = price + atr * self.sl_atr_mult, price - atr * self.tp_atr_mult
+        # Cierre inverso y nueva entrada con el mismo tick, en un solo viaje
+        self.reverse(signal, sl=sl, tp=tp, reason="signal")
@@ -0,0 +1,121 @@
+"""Consenso Fibonacci + tendencia H1/H4 + momentum RSI con trailing por ATR (gold_fibonacci_bot)."""
+
+import core.clock as clock
+from core.backtest import swing_levels
+from core.strategy import Strategy
+
+
+class Fibonacci(Strategy):
+    magic = 123456
+    timeframe = "H1"
+    tick_interval = 5  # trailing stop
+    warmup = 250
+
+    def setup(self):
+        p = self.params
+        self.sl_atr_mult = p.get("sl_atr_mult", 2.0)
+        self.tp_atr_mult = p.get("tp_atr_mult", 3.0)
+        self.trailing_atr_mult = p.get("trailing_atr_mult", 1.0)
+        self.tolerance = p.get("tolerance", 1.0)
+        self.min_agree = p.get("max_conditions", 2)
+        self.session_hours = p.get("session_hours")  # [(inicio, fin), ...] o None
+        self.swing_period = p.get("swing_period", 5)
+        self.lookback = p.get("lookback", 30)
+
+        self.atr = self.indicator("atr", p.get("atr_period", 14))
+        self.ema = self.indicator("ema", 20)
+        self.ema_upper = self.indicator(
+            "ema", 20, timeframe=p.get("trend_timeframe", "H4")
+        )
+        self.rsi = self.indicator(
+            "rsi", p.get("rsi_period", 14), p.get("rsi_method", "wilder")
+        )
+
+    def in_session_hours(self):
+        if not self.session_hours:
+            return True
+        hour = clock.now().hour
+        return any(start <= hour < end for start, end in self.session_hours)
+
+    # =============================
+    # FILTROS
+    # =============================
+    def fibonacci_filter(self, close):
+        rates = self.bars(self.lookback + 2 * self.swing_period + 10)
+        top, bottom = swing_levels(
+            rates["high"], rates["low"], self.swing_period, self.lookback
+        )
+        swing_high, swing_low, atr = top[-1], bottom[-1], self.atr.value
+        if swing_high != swing_high or swing_low != swing_low or atr is None:
+            return None  # NaN: sin swings confirmados
+        span = swing_high - swing_low
+        if span < atr * 2:
+            return None
+        near = atr * self.tolerance
+        for ratio in (0.382, 0.5):
+            if abs(close - (swing_high - span * ratio)) < near:
+                if close > swing_low * 1.01:
+                    return "buy"
+        for ratio in (0.618, 0.786):
+            if abs(close - (swing_high - span * ratio)) < near:
+                if close < swing_high * 0.99:
+                    return "sell"
+        return None
+
+    def trend_filter(self, close):
+        if self.ema.value is None or self.ema_upper.value is None:
+            return None
+        trend = "buy" if close > self.ema.value else "sell"
+        # El timeframe superior sigue en formación: EMA al precio actual
+        upper = "buy" if close > self.ema_upper.peek(close) else "sell"
+        return trend if trend == upper else None
+
+    def momentum_filter(self, bar):
+        value = self.rsi.value
+        if value is None:
+            return None
+        if value < 35 and bar["close"] > bar["open"]:
+            return "buy"
+        if value > 65 and bar["close"] < bar["open"]:
+            return "sell"
+        return None
+
+    def on_bar(self, bar):
+        if not self.in_session_hours():
+            return
+        close = float(bar["close"])
+        votes = [
+            self.fibonacci_filter(close),
+            self.trend_filter(close),
+            self.momentum_filter(bar),
+        ]
+        self.log.info(f"fib: {votes[0]}, trend: {votes[1]}, momentum: {votes[2]}")
+        signal = next(
+            (s for s in ("buy", "sell") if votes.count(s) >= self.min_agree), None
+        )
+        if signal is None or not self.can_open() or self.atr.value is None:
+            return
+        tick = self.tick()
+        if tick is None:
+            return
+        atr = self.atr.value
+        if signal == "buy":
+            price = tick.ask
+            self.buy(
+                sl=price - atr * self.sl_atr_mult, tp=price + atr * self.tp_atr_mult
+            )
+        else:
+            price = tick.bid
+            self.sell(
+                sl=price + atr * self.sl_atr_mult, tp=price - atr * self.tp_atr_mult
+            )
+
+    def on_tick(self, tick):
+        if self.atr.value is None:
+            return
+        offset = self.atr.value * self.trailing_atr_mult
+        for pos in self.positions():
+            buy = pos.type == 0
+            new_sl = tick.bid - offset if buy else tick.ask + offset
+            if (buy and new_sl > pos.sl) or (not buy and new_sl < pos.sl):
+                self.modify(pos, sl=new_sl, reason="Trailing Stop")
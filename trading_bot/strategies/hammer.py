@@ -0,0 +1,48 @@
+"""Martillo alcista tras tendencia bajista, SL bajo la EMA20 y TP 1:2 (gold_hammer_bot)."""
+
+from core.strategy import Strategy
+
+
+def is_hammer(bar):
+    """Cuerpo pequeño, mecha inferior >= 2x cuerpo, superior pequeña y cierre >= apertura."""
+    o, h, low, c = (float(bar[f]) for f in ("open", "high", "low", "close"))
+    body = abs(c - o)
+    if body == 0:
+        return False
+    upper_shadow = h - max(c, o)
+    lower_shadow = min(c, o) - low
+    return lower_shadow >= body * 2 and upper_shadow <= body * 0.3 and c >= o
+
+
+class Hammer(Strategy):
+    magic = 999003
+    timeframe = "M15"
+    warmup = 30
+
+    def setup(self):
+        self.lookback = self.params.get("lookback", 5)
+        self.ema = self.indicator("ema", 20)
+        self.atr = self.indicator("atr", 14)
+
+    def downtrend(self):
+        """Cierres estrictamente decrecientes en las últimas `lookback` velas."""
+        closes = self.bars(self.lookback)["close"]
+        return len(closes) == self.lookback and bool((closes[1:] < closes[:-1]).all())
+
+    def on_bar(self, bar):
+        if not self.can_open() or not is_hammer(bar) or not self.downtrend():
+            return
+        if self.atr.value is None:
+            return
+        self.log.info(
+            f"Martillo alcista tras bajada | O:{bar['open']:.2f} C:{bar['close']:.2f} "
+            f"H:{bar['high']:.2f} L:{bar['low']:.2f}"
+        )
+        tick = self.tick()
+        if tick is None:
+            return
+        price = tick.ask
+        sl = self.ema.value - self.atr.value * 0.5  # 0.5x ATR bajo la EMA20
+        if sl >= price:
+            return
+        self.buy(sl=sl, tp=price + (price - sl) * 2)  # Risk:Reward 1:2
@@ -0,0 +1,98 @@
+"""Entrada por movimiento desde un precio de referencia, stop adverso, trailing y TP (gold_threshold_bot)."""
+
+from core.strategy import Strategy
+
+
+class ThresholdMomentum(Strategy):
+    magic = 999005
+    timeframe = "M1"  # sólo para el ATR opcional
+    tick_interval = 0.5
+    warmup = 20
+
+    def setup(self):
+        p = self.params
+        self.threshold = p.get("threshold", 0.20)  # unidad de precio
+        self.stop_loss = p.get("stop_loss", 0.10)  # stop adverso desde la entrada
+        self.tp_mult = p.get("tp_mult", 3.0)  # TP = threshold * tp_mult
+        self.trailing_start = p.get("trailing_start", 1.0)
+        self.trailing_buffer = p.get("trailing_buffer", 0.2)
+        self.use_atr = p.get("use_atr", False)
+        self.atr_mult_for_threshold = p.get("atr_mult_for_threshold", 0.5)
+        self.atr = self.indicator("atr", 14)
+
+        self.ref_price = None  # precio desde el que medimos el movimiento
+        self.entry_price = None
+        self.position_type = None  # "buy" o "sell"
+
+    def to_state(self):
+        return {
+            "ref_price": self.ref_price,
+            "entry_price": self.entry_price,
+            "position_type": self.position_type,
+        }
+
+    def load_state(self, state):
+        self.ref_price = state.get("ref_price")
+        self.entry_price = state.get("entry_price")
+        self.position_type = state.get("position_type")
+
+    def on_start(self):
+        # Si la posición se cerró mientras estábamos parados, limpiar
+        if self.entry_price is not None and not self.positions():
+            self.entry_price = self.position_type = None
+
+    def on_fill(self, fill):
+        if fill.event == "open":
+            self.entry_price = fill.price
+            self.position_type = fill.direction
+            self.ref_price = None  # evita reentrada inmediata
+        elif not self.positions():
+            self.entry_price = self.position_type = None
+
+    def effective_threshold(self):
+        if self.use_atr and self.atr.value:
+            return self.atr.value * self.atr_mult_for_threshold
+        return self.threshold
+
+    def on_tick(self, tick):
+        bid, ask = tick.bid, tick.ask
+        threshold = self.effective_threshold()
+
+        if self.entry_price is None:
+            mid_price = (bid + ask) / 2.0
+            if self.ref_price is None:
+                self.ref_price = mid_price
+                return
+            move = mid_price - self.ref_price
+            if move >= threshold:
+                self.buy()
+            elif move <= -threshold:
+                self.sell()
+            return
+
+        buy = self.position_type == "buy"
+        close_price = bid if buy else ask
+        move = close_price - self.entry_price if buy else self.entry_price - close_price
+        positions = self.positions()
+
+        if move <= -self.stop_loss:
+            self.log.info(f"Retroceso adverso {move:.5f} <= -{self.stop_loss:.5f}")
+            for pos in positions:
+                self.close(pos, reason="AdverseStop")
+            return
+
+        if move >= threshold * self.tp_mult:
+            self.log.info(f"TP alcanzado {close_price:.5f}")
+            for pos in positions:
+                self.close(pos, reason="TP")
+            return
+
+        if move >= self.trailing_start:
+            if buy:
+                new_sl = close_price - self.trailing_buffer
+                better = [p for p in positions if new_sl > p.sl]
+            else:
+                new_sl = close_price + self.trailing_buffer
+                better = [p for p in positions if p.sl == 0.0 or new_sl < p.sl]
+            for pos in better:
+                self.modify(pos, sl=new_sl, tp=0.0, reason="Trailing")
@@ -0,0 +1,108 @@
+"""Cruce EMA9/21 con filtro EMA50, SL/TP por ATR, breakeven y trailing (gold_cross_bot / eurusd_cross_bot)."""
+
+from core.ledger import PositionLedger
+from core.strategy import Strategy
+
+
+class TrendCross(Strategy):
+    magic = 999001
+    timeframe = "H1"
+    tick_interval = 30  # gestión de posiciones abiertas
+    warmup = 100
+
+    def setup(self):
+        p = self.params
+        self.max_bars_since_cross = p.get("max_bars_since_cross", 3)
+        self.sl_atr_mult = p.get("sl_atr_mult", 1.5)
+        self.tp_atr_mult = p.get("tp_atr_mult", 2.0)
+        self.breakeven_at = p.get("breakeven_at", 0.5)  # fracción del recorrido al TP
+        self.trailing_atr_mult = p.get("trailing_atr_mult", 0.5)
+
+        self.fast = self.indicator("ema", 9)
+        self.slow = self.indicator("ema", 21)
+        self.trend = self.indicator("ema", 50)
+        self.atr = self.indicator("atr", p.get("atr_period", 14))
+        self.cross = self.indicator("cross", 9, 21)
+
+        self.ledger = PositionLedger()
+
+    # =============================
+    # ESTADO
+    # =============================
+    def to_state(self):
+        return {"ledger": self.ledger.to_state()}
+
+    def load_state(self, state):
+        # "initial_targets": formato anterior {ticket: {entry, sl, tp}}
+        self.ledger.load_state(state.get("ledger", state.get("initial_targets")))
+
+    def on_start(self):
+        # Descartar tickets que ya no están abiertos
+        self.ledger.sync(self.positions())
+
+    def on_fill(self, fill):
+        if fill.event == "open":
+            self.ledger.add(
+                fill.ticket, fill.direction, fill.price, fill.sl, fill.tp, fill.volume
+            )
+        else:
+            self.ledger.remove(fill.ticket)
+
+    # =============================
+    # SEÑAL
+    # =============================
+    def signal(self, close):
+        if self.cross.direction is None or self.trend.value is None:
+            return None
+        if self.cross.bars_since > self.max_bars_since_cross:
+            return None
+        if self.cross.direction == "buy":
+            if self.fast.value > self.slow.value and close > self.trend.value:
+                return "buy"
+        elif self.fast.value < self.slow.value and close < self.trend.value:
+            return "sell"
+        return None
+
+    def on_bar(self, bar):
+        close = float(bar["close"])
+        self.log.info(
+            f"Cierre {close:.2f} | EMA9 {self.fast.value:.2f} | "
+            f"EMA21 {self.slow.value:.2f} | EMA50 {self.trend.value:.2f}"
+        )
+        if not self.can_open():
+            return
+        signal = self.signal(close)
+        if signal is None or self.atr.value is None:
+            return
+        tick = self.tick()
+        if tick is None:
+            return
+
+        atr = self.atr.value
+        if signal == "buy":
+            price = tick.ask
+            self.buy(
+                sl=price - atr * self.sl_atr_mult, tp=price + atr * self.tp_atr_mult
+            )
+        else:
+            price = tick.bid
+            self.sell(
+                sl=price + atr * self.sl_atr_mult, tp=price - atr * self.tp_atr_mult
+            )
+
+    # =============================
+    # GESTIÓN
+    # =============================
+    def on_tick(self, tick):
+        positions = {pos.ticket: pos for pos in self.positions()}
+        # Sin bajas: los cierres llegan por on_fill
+        self.ledger.sync(positions.values(), evict=False)
+        offset = None
+        if self.atr.value is not None:
+            offset = self.atr.value * self.trailing_atr_mult
+        moves = self.ledger.stops(tick.bid, tick.ask, self.breakeven_at, offset)
+        for ticket, sl, reason in moves:
+            if ticket in positions and self.modify(
+                positions[ticket], sl=sl, reason=reason
+            ):
+                self.ledger.set_stop(ticket, sl)
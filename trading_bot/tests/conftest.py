@@ -0,0 +1,29 @@
+"""
+Pruebas sin red ni terminal: core/fake_binance.py y core/fake_mt5.py.
+
+    python -m pytest -q trading_bot/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+# Los módulos se importan como en los bots: `import core.x` desde trading_bot/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fake_mt5 import FakeMT5  # noqa: E402
+
+# core/connection.py importa MetaTrader5 al cargarse
+FakeMT5().install()
+
+import core.clock as clock  # noqa: E402
+
+
+@pytest.fixture
+def sim_clock():
+    """Reloj simulado del proceso; se restaura el anterior al terminar."""
+    sim = clock.SimClock(start=1_700_000_000)
+    previous = clock.install(sim)
+    yield sim
+    clock.install(previous)
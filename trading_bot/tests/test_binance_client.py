@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from core.binance_client import BinanceAPIError, FuturesClient, WeightLimiter
+from core.fake_binance import FakeBinance
+
+
+@pytest.fixture
+def fake():
+    with FakeBinance() as fake:
+        yield fake
+
+
+def make_client(fake, **kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    return FuturesClient("key", "secret", base_url=fake.url, **kwargs)
+
+
+def market_order(client):
+    return client.futures_create_order(
+        symbol="BTCUSDT", side="BUY", type="MARKET", quantity="0.001"
+    )
+
+
+# =============================
+# 429 / 418
+# =============================
+def test_429_waits_retry_after_and_retries(fake):
+    client = make_client(fake)
+    fake.fail_next(429, retry_after=0.3)
+    began = time.monotonic()
+    ticker = client.futures_symbol_ticker("BTCUSDT")
+    assert ticker["price"] == "30000.00"
+    assert time.monotonic() - began >= 0.3
+    assert len(fake.requests) == 2
+
+
+def test_429_retries_orders(fake):
+    # Binance rechaza sin ejecutar: también se reintenta una orden
+    client = make_client(fake)
+    fake.fail_next(429, retry_after=0.1)
+    order = market_order(client)
+    assert order["status"] == "FILLED"
+    assert len(fake.orders) == 1
+
+
+def test_418_pauses_and_raises(fake):
+    client = make_client(fake)
+    fake.fail_next(418, retry_after=0.5)
+    with pytest.raises(BinanceAPIError) as err:
+        client.futures_symbol_ticker("BTCUSDT")
+    assert err.value.status == 418
+    assert len(fake.requests) == 1
+    assert client.limiter.paused_until - time.monotonic() > 0.3
+
+
+def test_5xx_not_retried_for_orders(fake):
+    client = make_client(fake)
+    fake.fail_next(503)
+    with pytest.raises(BinanceAPIError):
+        market_order(client)
+    assert len(fake.requests) == 1
+
+
+# =============================
+# PESO
+# =============================
+def test_limiter_paces_when_bucket_empty():
+    limiter = WeightLimiter(weight_per_minute=600, safety=1.0)  # 10 por segundo
+    limiter.acquire(600)
+    began = time.monotonic()
+    limiter.acquire(3)
+    assert time.monotonic() - began >= 0.25
+
+
+def test_limiter_follows_used_weight_header(fake):
+    limiter = WeightLimiter(weight_per_minute=600, safety=1.0)
+    client = make_client(fake, limiter=limiter)
+    client.futures_symbol_ticker("BTCUSDT")
+    assert client.used_weight == fake.used_weight()
+    limiter.observe(598)
+    began = time.monotonic()
+    limiter.acquire(4)
+    assert time.monotonic() - began >= 0.15
+
+
+# =============================
+# CONEXIONES
+# =============================
+def test_pooled_connection_reused(fake):
+    client = make_client(fake)
+    for _ in range(3):
+        client.futures_symbol_ticker("BTCUSDT")
+    assert len(fake.connections) == 1
+
+
+def test_order_survives_idle_connection_closed_by_server(fake):
+    client = make_client(fake)
+    client.futures_symbol_ticker("BTCUSDT")
+    fake.drop_idle()
+    order = market_order(client)
+    assert order["status"] == "FILLED"
+    assert len(fake.orders) == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from core.binance_client import FuturesClient
+from core.brackets import BracketManager
+from core.fake_binance import FakeBinance
+
+
+@pytest.fixture
+def fake():
+    with FakeBinance(price=30000.0) as fake:
+        yield fake
+
+
+@pytest.fixture
+def bracket(fake):
+    client = FuturesClient("key", "secret", base_url=fake.url, backoff_base=0.01)
+    return BracketManager(client, "BTCUSDT")
+
+
+def test_open_places_entry_and_exits_in_one_batch(fake, bracket):
+    entry = bracket.open("BUY", 0.01, sl=29500.0, tp=31000.0)
+    assert entry["status"] == "FILLED"
+    assert [r[1] for r in fake.requests] == ["/fapi/v1/batchOrders"]
+
+    sl = fake.orders[bracket.sl_order["orderId"]]
+    tp = fake.orders[bracket.tp_order["orderId"]]
+    assert (sl["type"], sl["side"], sl["stopPrice"]) == (
+        "STOP_MARKET",
+        "SELL",
+        "29500.0",
+    )
+    assert (tp["type"], tp["side"], tp["stopPrice"]) == (
+        "TAKE_PROFIT_MARKET",
+        "SELL",
+        "31000.0",
+    )
+    assert sl["reduceOnly"] == tp["reduceOnly"] == "true"
+    assert bracket.active
+
+
+def test_sync_cancels_surviving_leg_when_tp_fills(fake, bracket):
+    bracket.open("BUY", 0.01, sl=29500.0, tp=31000.0)
+    sl_id = bracket.sl_order["orderId"]
+    assert bracket.sync() is None
+
+    fake.set_price(31050.0)
+    assert bracket.sync() == "tp"
+    assert fake.orders[sl_id]["status"] == "CANCELED"
+    assert not bracket.active
+
+
+def test_sync_cancels_surviving_leg_when_sl_fills(fake, bracket):
+    bracket.open("SELL", 0.01, sl=30500.0, tp=29000.0)
+    tp_id = bracket.tp_order["orderId"]
+
+    fake.set_price(30600.0)
+    assert bracket.sync() == "sl"
+    assert fake.orders[tp_id]["status"] == "CANCELED"
+
+
+def test_update_places_new_leg_before_cancelling_old(fake, bracket):
+    bracket.open("BUY", 0.01, sl=29500.0, tp=31000.0)
+    old_id = bracket.sl_order["orderId"]
+
+    bracket.update(sl=29800.0)
+    new = fake.orders[bracket.sl_order["orderId"]]
+    assert new["stopPrice"] == "29800.0" and new["status"] == "NEW"
+    assert fake.orders[old_id]["status"] == "CANCELED"
+    paths = [(m, p) for m, p, _ in fake.requests]
+    assert paths[-2:] == [("POST", "/fapi/v1/order"), ("DELETE", "/fapi/v1/order")]
+
+
+def test_cancel_removes_both_legs(fake, bracket):
+    bracket.open("BUY", 0.01, sl=29500.0, tp=31000.0)
+    ids = bracket.sl_order["orderId"], bracket.tp_order["orderId"]
+
+    bracket.cancel()
+    assert all(fake.orders[i]["status"] == "CANCELED" for i in ids)
+    assert not bracket.active
@@ -0,0 +1,103 @@
+import pytest
+
+import core.connection as connection
+from core.fake_mt5 import FakeMT5
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeMT5()
+    monkeypatch.setattr(connection, "mt5", fake)
+    return fake
+
+
+@pytest.fixture
+def supervisor(fake, sim_clock):
+    sup = connection.Mt5Supervisor(name="test")
+    assert sup.ensure()
+    return sup
+
+
+def test_reconnects_with_growing_backoff(fake, sim_clock, supervisor):
+    fake.drop(failures=3)
+    assert not supervisor.probe(force=True)
+    assert supervisor.outages == 1
+
+    # Primer intento inmediato; luego esperas de 1, 2 y 4 s
+    waits = []
+    while not supervisor.ensure():
+        waits.append(supervisor.retry_in())
+        # Antes de tiempo no se vuelve a intentar
+        assert not supervisor.ensure()
+        sim_clock.sleep(supervisor.retry_in())
+    assert waits == [1.0, 2.0, 4.0]
+    assert supervisor.up
+    assert list(supervisor.recoveries) == [7.0]
+
+
+def test_backoff_is_bounded(fake, sim_clock, supervisor):
+    fake.drop(failures=20)
+    supervisor.probe(force=True)
+    waits = []
+    while not supervisor.ensure():
+        waits.append(supervisor.retry_in())
+        sim_clock.sleep(supervisor.retry_in())
+    assert max(waits) == supervisor.backoff_max
+
+
+def test_scheduled_outage_recovers_after_it_ends(fake, sim_clock, supervisor):
+    start = sim_clock.time()
+    fake.add_outage(start + 10, start + 30)
+    sim_clock.on_advance = fake.advance
+
+    sim_clock.sleep(15)
+    assert not supervisor.probe(force=True)
+    supervisor.connect(sleep=sim_clock.sleep)
+    assert sim_clock.time() >= start + 30
+    assert supervisor.recoveries[0] == pytest.approx(sim_clock.time() - start - 15)
+
+
+def test_deferred_intents_run_on_reconnect(fake, sim_clock, supervisor):
+    ran = []
+    fake.drop(failures=1)
+    supervisor.probe(force=True)
+    assert not supervisor.ensure()
+
+    supervisor.defer("open", lambda: ran.append("open 1"))
+    supervisor.defer("sl", lambda: ran.append("sl"))
+    supervisor.defer("open", lambda: ran.append("open 2"))  # sustituye a la anterior
+    assert supervisor.pending() == ["sl", "open"]
+
+    sim_clock.sleep(supervisor.retry_in())
+    assert supervisor.ensure()
+    assert ran == ["sl", "open 2"]
+    assert supervisor.pending() == []
+
+
+def test_expired_intents_are_dropped(fake, sim_clock, supervisor):
+    ran = []
+    fake.drop(failures=1000)
+    supervisor.probe(force=True)
+    supervisor.ensure()
+    supervisor.defer("open", lambda: ran.append("open"))
+
+    sim_clock.sleep(supervisor.intent_ttl + 1)
+    fake.init_failures = 0
+    supervisor.connect(sleep=sim_clock.sleep)
+    assert ran == []
+
+
+def test_on_reconnect_runs_before_intents(fake, sim_clock):
+    calls = []
+    sup = connection.Mt5Supervisor(
+        name="test", on_reconnect=lambda: calls.append("sync")
+    )
+    sup.ensure()
+    fake.drop(failures=1)
+    sup.probe(force=True)
+    sup.ensure()
+    sup.defer("close", lambda: calls.append("close"))
+
+    sim_clock.sleep(sup.retry_in())
+    sup.ensure()
+    assert calls == ["sync", "sync", "close"]
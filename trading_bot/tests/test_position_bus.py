@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+import core.position_bus as position_bus
+import core.shm_bus as shm_bus
+from core.fake_mt5 import FakeMT5, synthetic_rates
+from core.position_bus import PositionBus, PositionReader
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeMT5()
+    fake.connected = True
+    fake.set_rates("XAUUSD", fake.TIMEFRAME_M1, synthetic_rates(10, step=60))
+    monkeypatch.setattr(position_bus, "mt5", fake)
+    return fake
+
+
+def buy(fake, volume):
+    fake.order_send(
+        {
+            "action": fake.TRADE_ACTION_DEAL,
+            "symbol": "XAUUSD",
+            "volume": volume,
+            "type": fake.ORDER_TYPE_BUY,
+            "magic": 1,
+        }
+    )
+
+
+@pytest.fixture
+def prefix(monkeypatch):
+    # Lector y daemon en el mismo proceso comparten resource_tracker: el
+    # lector no debe quitarle el registro al segmento que borra el daemon
+    monkeypatch.setattr(shm_bus, "_untrack", lambda shm: None)
+    return f"test{os.getpid()}"
+
+
+@pytest.fixture
+def bus(prefix):
+    bus = PositionBus(1, capacity=16, prefix=prefix)
+    yield bus, prefix
+    bus.close()
+
+
+def test_disabled_reader_reads_terminal(fake):
+    reader = PositionReader(1, enabled=False, max_symbol_lots={"XAUUSD": 0.1})
+    buy(fake, 0.3)
+    assert len(reader.positions_or_live("XAUUSD")) == 1
+    # Sin snapshot no hay límite de cuenta
+    assert reader.check_exposure("XAUUSD", "buy", 1.0)
+
+
+def test_snapshot_caps_net_exposure(fake, bus):
+    bus, prefix = bus
+    buy(fake, 0.3)
+    bus.publish(fake.positions_get())
+    reader = PositionReader(1, prefix=prefix, max_symbol_lots={"XAUUSD": 0.5})
+
+    assert reader.check_exposure("XAUUSD", "buy", 0.2)
+    assert not reader.check_exposure("XAUUSD", "buy", 0.3)
+    assert reader.check_exposure("XAUUSD", "sell", 0.8)
+    assert reader.check_exposure("EURUSD", "buy", 5.0)
+
+
+def test_snapshot_preferred_over_terminal(fake, bus):
+    bus, prefix = bus
+    bus.publish(fake.positions_get())
+    buy(fake, 0.1)  # el daemon aún no lo ha publicado
+    reader = PositionReader(1, prefix=prefix)
+    assert reader.positions_or_live("XAUUSD") == ()
+    reader.enabled = False
+    assert len(reader.positions_or_live("XAUUSD")) == 1
+
+
+def test_reader_follows_daemon_restart(fake, prefix):
+    bus = PositionBus(1, capacity=16, prefix=prefix)
+    buy(fake, 0.1)
+    bus.publish(fake.positions_get())
+    reader = PositionReader(1, prefix=prefix, stale_after=0.2, retry_every=0.1)
+    assert len(reader.positions_or_live("XAUUSD")) == 1
+
+    # Reinicio: el daemon nuevo borra los segmentos y crea otros
+    bus.close()
+    restarted = PositionBus(1, capacity=16, prefix=prefix)
+    try:
+        buy(fake, 0.1)
+        restarted.publish(fake.positions_get()[:1])
+        time.sleep(0.2)
+        assert reader.positions("XAUUSD") is None  # mapeo viejo sin heartbeat
+        assert len(reader.positions_or_live("XAUUSD")) == 2  # terminal
+
+        time.sleep(0.15)
+        restarted.heartbeat()
+        assert len(reader.positions_or_live("XAUUSD")) == 1  # snapshot nuevo
+    finally:
+        restarted.close()
@@ -0,0 +1,62 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import core.shm_bus as shm_bus
+from core.fake_mt5 import Tick, synthetic_rates
+from core.shm_bus import MarketDataBus, MarketDataReader
+
+STALE = 0.2
+
+
+@pytest.fixture
+def prefix(monkeypatch):
+    # Lector y daemon en el mismo proceso comparten resource_tracker: el
+    # lector no debe quitarle el registro al segmento que borra el daemon
+    monkeypatch.setattr(shm_bus, "_untrack", lambda shm: None)
+    return f"test{os.getpid()}"
+
+
+def start_bus(prefix, price):
+    bus = MarketDataBus("XAUUSD", ["H1"], bars=50, ticks=16, prefix=prefix)
+    bus.publish_rates("H1", synthetic_rates(20, price=price))
+    bus.publish_tick(Tick(1, price, price + 0.2, 0.0, 0, 1000, 0, 0.0))
+    bus.heartbeat()
+    return bus
+
+
+def test_reader_follows_daemon_restart(prefix):
+    reader = MarketDataReader(
+        "XAUUSD", prefix=prefix, stale_after=STALE, retry_every=0.1
+    )
+    bus = start_bus(prefix, 2000.0)
+    assert reader.alive()
+    assert reader.tick().bid == 2000.0
+
+    # Reinicio: el daemon nuevo borra los segmentos y crea otros
+    bus.close()
+    bus = start_bus(prefix, 1500.0)
+    time.sleep(STALE)
+    assert not reader.alive()  # mapeo viejo sin heartbeat
+
+    time.sleep(0.15)
+    bus.heartbeat()
+    try:
+        assert reader.alive()
+        assert reader.tick().bid == 1500.0
+        rates = reader.rates("H1", 10)
+        assert np.all(rates["close"] < 1800.0)
+        assert reader.wait(last_seq=0, timeout=0.05) is not None
+    finally:
+        bus.close()
+
+
+def test_reader_without_daemon_waits_and_returns_none(prefix):
+    reader = MarketDataReader("XAUUSD", prefix=prefix, stale_after=STALE)
+    assert not reader.alive()
+    assert reader.tick() is None
+    began = time.monotonic()
+    assert reader.wait(timeout=0.05) is None
+    assert time.monotonic() - began >= 0.05
@@ -0,0 +1,28 @@
+from core.state_store import StateStore
+
+
+def test_delete_none_value_survives_restart(tmp_path):
+    store = StateStore("bot", directory=str(tmp_path), fsync=False)
+    store.put("pending", None)
+    store.put("ledger", [1, 2])
+    store.delete("pending")
+    store.delete("missing")
+    store.close()
+
+    store = StateStore("bot", directory=str(tmp_path), fsync=False)
+    assert "pending" not in store.state
+    assert store.get("ledger") == [1, 2]
+    store.close()
+
+
+def test_deletes_survive_compaction(tmp_path):
+    store = StateStore("bot", directory=str(tmp_path), compact_every=3, fsync=False)
+    for i in range(4):
+        store.put(f"k{i}", None if i % 2 else i)
+    store.delete("k1")
+    store.delete("k2")
+    store.close()
+
+    store = StateStore("bot", directory=str(tmp_path), fsync=False)
+    assert store.state == {"k0": 0, "k3": None}
+    store.close()